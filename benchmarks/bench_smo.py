@@ -0,0 +1,47 @@
+"""
+Benchmark the training time of SMO for the support vector classifier and
+regressor with a gaussian kernel on synthetic problems of increasing size.
+
+    python benchmarks/bench_smo.py --n_samples 2000 5000 10000
+"""
+import argparse
+from time import perf_counter
+
+from sklearn.datasets import make_classification, make_regression
+from sklearn.preprocessing import StandardScaler
+
+from optiml.ml.svm import DualSVC, DualSVR
+from optiml.ml.svm.kernels import GaussianKernel
+
+
+def bench_svc(n_samples, cache_size, working_set):
+    X, y = make_classification(n_samples=n_samples, n_features=20, flip_y=0.1, random_state=1)
+    X = StandardScaler().fit_transform(X)
+    start = perf_counter()
+    svc = DualSVC(kernel=GaussianKernel(), cache_size=cache_size, working_set=working_set).fit(X, y)
+    return perf_counter() - start, svc.kernel_row_cache_.misses, len(svc.support_), svc.score(X, y)
+
+
+def bench_svr(n_samples, cache_size, working_set):
+    X, y = make_regression(n_samples=n_samples, n_features=20, noise=10, random_state=1)
+    X = StandardScaler().fit_transform(X)
+    y = (y - y.mean()) / y.std()
+    start = perf_counter()
+    svr = DualSVR(kernel=GaussianKernel(), cache_size=cache_size, working_set=working_set).fit(X, y)
+    return perf_counter() - start, svr.kernel_row_cache_.misses, len(svr.support_), svr.score(X, y)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n_samples', type=int, nargs='+', default=[2000, 5000, 10000])
+    parser.add_argument('--cache_size', type=float, default=1000, help='kernel rows cache size in MB')
+    parser.add_argument('--working_set', nargs='+', default=['first_order', 'second_order'],
+                        choices=['first_order', 'second_order'])
+    args = parser.parse_args()
+
+    print('model\t working_set\t n_samples\t time (s)\t rows\t n_sv\t score')
+    for n_samples in args.n_samples:
+        for name, bench in (('svc', bench_svc), ('svr', bench_svr)):
+            for working_set in args.working_set:
+                time, rows, n_sv, score = bench(n_samples, args.cache_size, working_set)
+                print(f'{name}\t {working_set}\t {n_samples:9d}\t {time:8.2f}\t {rows:6d}\t {n_sv:4d}\t {score:1.4f}')
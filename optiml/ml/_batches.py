@@ -0,0 +1,46 @@
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.utils import gen_batches
+
+
+def predict_in_batches(predict, X, batch_size=None, n_jobs=None, out=None):
+    """
+    Evaluate ``predict`` over the chunks of ``batch_size`` rows of ``X`` and
+    write them into ``out``, so that only the intermediate results of the
+    chunks in flight, e.g., their kernel matrix wrt the support vectors or
+    their activations, are held in memory. The chunks are evaluated in waves
+    of ``n_jobs`` by joblib, i.e., threads by default or processes within a
+    ``joblib.parallel_backend('loky')`` context, and their results are written
+    by the caller, so that ``out`` is never shared with the workers.
+
+    :param predict:    the function which maps the [m x d] rows to their [m x ...] predictions.
+    :param X:          [n x d] data matrix, either a dense array or a sparse matrix.
+    :param batch_size: the number of rows of each chunk, if None the whole ``X`` is a chunk.
+    :param n_jobs:     the number of workers, ``None`` means 1 and ``-1`` all the processors.
+    :param out:        [n x ...] preallocated output array, e.g., a memory-mapped one,
+                       if None it is allocated as the first chunk is evaluated.
+    :return:           the [n x ...] predictions.
+    """
+    n_samples = X.shape[0]
+    if batch_size is None:
+        batch_size = max(n_samples, 1)
+    if not batch_size > 0:
+        raise ValueError('batch_size must be > 0')
+    if out is not None and len(out) != n_samples:
+        raise ValueError(f'out has {len(out)} rows but X has {n_samples}')
+
+    batches = list(gen_batches(n_samples, batch_size))
+    if not batches:
+        # no rows, so the empty predictions keep their trailing shape and dtype
+        return np.asarray(predict(X[:0])) if out is None else out
+    n_jobs = effective_n_jobs(n_jobs)
+
+    with Parallel(n_jobs=n_jobs, prefer='threads') as parallel:
+        for start in range(0, len(batches), n_jobs):
+            wave = batches[start:start + n_jobs]
+            for batch, y in zip(wave, parallel(delayed(predict)(X[batch]) for batch in wave)):
+                if out is None:
+                    out = np.empty((n_samples,) + np.shape(y)[1:], dtype=np.asarray(y).dtype)
+                out[batch] = y
+
+    return out
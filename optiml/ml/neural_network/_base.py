@@ -11,6 +11,7 @@ from .activations import sigmoid, linear, softmax
 from .layers import Layer, ParamLayer
 from .losses import (CategoricalCrossEntropy, SparseCategoricalCrossEntropy,
                      MeanSquaredError, BinaryCrossEntropy, mean_squared_error, NeuralNetworkLoss)
+from .._batches import predict_in_batches
 from ...opti import Optimizer
 from ...opti.unconstrained.line_search import LineSearchOptimizer
 from ...opti.unconstrained.stochastic import StochasticOptimizer, StochasticGradientDescent
@@ -67,9 +68,9 @@ class NeuralNetwork(BaseEstimator, Layer, ABC):
             else:
                 self.best_loss = np.inf
 
-    def forward(self, X):
+    def forward(self, X, training=True):
         for layer in self.layers:
-            X = layer.forward(X)
+            X = layer.forward(X, training)
         return X
 
     def backward(self, delta):
@@ -310,13 +311,15 @@ class NeuralNetworkClassifier(ClassifierMixin, NeuralNetwork):
 
         return super().fit(X, y)
 
-    def predict(self, X):
+    def predict(self, X, batch_size=None, n_jobs=None, out=None):
+        if batch_size is not None or out is not None:
+            return predict_in_batches(self.predict, X, batch_size, n_jobs, out)
         if self.layers[-1].activation == sigmoid:
-            return self.forward(X) >= 0.5
+            return self.forward(X, training=False) >= 0.5
         elif self.layers[-1].activation == softmax:
-            return np.argmax(self.forward(X), axis=1)
+            return np.argmax(self.forward(X, training=False), axis=1)
         else:
-            return self.forward(X)
+            return self.forward(X, training=False)
 
     def score(self, X, y, sample_weight=None):
         y = np.argmax(y, axis=1) if isinstance(self.loss, CategoricalCrossEntropy) else y
@@ -360,8 +363,10 @@ class NeuralNetworkRegressor(RegressorMixin, NeuralNetwork):
 
         return super().fit(X, y)
 
-    def predict(self, X):
+    def predict(self, X, batch_size=None, n_jobs=None, out=None):
+        if batch_size is not None or out is not None:
+            return predict_in_batches(self.predict, X, batch_size, n_jobs, out)
         if self.layers[-1].fan_out == 1:  # one target
-            return self.forward(X).ravel()
+            return self.forward(X, training=False).ravel()
         else:  # multi target
-            return self.forward(X)
+            return self.forward(X, training=False)
@@ -9,7 +9,7 @@ from .regularizers import l2
 
 class Layer(ABC):
 
-    def forward(self, X):
+    def forward(self, X, training=True):
         raise NotImplementedError
 
     def backward(self, delta):
@@ -85,12 +85,13 @@ class FullyConnected(ParamLayer):
         self.fan_in = n_in
         self.fan_out = n_out
 
-    def forward(self, X):
-        self._X = X
-        self._WX_b = np.dot(self._X, self.coef_)
+    def forward(self, X, training=True):
+        WX_b = np.dot(X, self.coef_)
         if self.fit_intercept:
-            self._WX_b += self.inter_
-        return self.activation(self._WX_b)
+            WX_b += self.inter_
+        if training:  # cache the input and the pre-activation for backward
+            self._X, self._WX_b = X, WX_b
+        return self.activation(WX_b)
 
     def backward(self, delta):
         # dW, db
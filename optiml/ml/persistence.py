@@ -0,0 +1,239 @@
+import json
+import struct
+
+import numpy as np
+
+from .neural_network import NeuralNetworkClassifier, NeuralNetworkRegressor, activations, losses
+from .neural_network.layers import FullyConnected
+from .svm import PrimalSVC, DualSVC, PrimalSVR, DualSVR, kernels
+from .svm.kernels import Kernel, LinearKernel
+
+FORMAT_VERSION = (1, 0)
+
+_MAGIC = b'\x93OPTIML'
+_ALIGN = 64
+
+# the estimators which can be saved, with their parameters and fitted
+# arrays used for prediction, apart from the kernel, labels and layers
+_ESTIMATORS = {
+    'PrimalSVC': (PrimalSVC, ('multi_class',), ('coef_', 'intercept_')),
+    'DualSVC': (DualSVC, ('multi_class', 'max_tile_bytes'),
+                ('support_', 'support_vectors_', 'dual_coef_', 'intercept_', 'coef_')),
+    'PrimalSVR': (PrimalSVR, (), ('coef_', 'intercept_')),
+    'DualSVR': (DualSVR, ('max_tile_bytes',),
+                ('support_', 'support_vectors_', 'dual_coef_', 'intercept_', 'coef_')),
+    'NeuralNetworkClassifier': (NeuralNetworkClassifier, (), ()),
+    'NeuralNetworkRegressor': (NeuralNetworkRegressor, (), ())
+}
+
+
+def _json_default(obj):
+    # the numpy scalars, e.g., the resolved gamma, are stored as Python ones
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f'{obj!r} is not JSON serializable')
+
+
+def _save_kernel(kernel):
+    if isinstance(kernel, str):  # precomputed
+        return kernel
+    if getattr(kernels, type(kernel).__name__, None) is not type(kernel):
+        raise TypeError(f'{kernel} is not a kernel function which can be saved')
+    params = kernel.get_params()
+    params.pop('distance_cache', None)  # a training-time cache
+    # the fitted attributes, e.g., gamma_, are the frozen kernel parameters
+    fitted = {name: value for name, value in vars(kernel).items()
+              if name.endswith('_') and not name.startswith('_')}
+    return {'name': type(kernel).__name__, 'params': params, 'fitted': fitted}
+
+
+def _load_kernel(spec):
+    if isinstance(spec, str):  # precomputed
+        return spec
+    kernel_cls = getattr(kernels, spec['name'], None)
+    if not (isinstance(kernel_cls, type) and issubclass(kernel_cls, Kernel)):
+        raise ValueError(f'unknown kernel {spec["name"]}')
+    kernel = kernel_cls(**spec['params'])
+    for name, value in spec['fitted'].items():
+        setattr(kernel, name, value)
+    return kernel
+
+
+def _activation(name):
+    # the activations are compared by identity, e.g., in predict, so
+    # they are resolved to the shared module-level instances
+    for activation in vars(activations).values():
+        if isinstance(activation, activations.Activation) and type(activation).__name__ == name:
+            return activation
+    raise ValueError(f'unknown activation function {name}')
+
+
+def _is_fitted(model, array_names):
+    # all the arrays used for prediction are required, but coef_ by the dual nonlinear models
+    if hasattr(model, 'kernel') and not isinstance(model.kernel, LinearKernel):
+        array_names = [array for array in array_names if array != 'coef_']
+    if hasattr(model, 'lb') and not hasattr(model.lb, 'classes_'):
+        return False
+    if any(getattr(layer, 'coef_', None) is None for layer in getattr(model, 'layers', ())):
+        return False
+    return all(hasattr(model, array) for array in array_names)
+
+
+def _align(f):
+    f.write(b'\x00' * (-f.tell() % _ALIGN))
+
+
+def save_model(model, file):
+    """
+    Save the fitted ``model`` into ``file`` in a compact binary format which
+    is loaded back by ``load_model`` through memory maps, so that the worker
+    processes serving the same model share a single copy of its support
+    vectors or weights through the page cache instead of a private one each.
+
+    The file starts with the magic string ``\\x93OPTIML``, the major and minor
+    version of the format, i.e., two unsigned bytes, the little-endian uint32
+    length of the header and the header itself, i.e., a JSON object with the
+    name of the estimator, its parameters used for prediction, e.g., the frozen
+    kernel parameters, and the names of the arrays, padded with spaces up to a
+    multiple of 64 bytes. The arrays, e.g., ``support_vectors_``, ``dual_coef_``
+    or the ``coef_`` and ``inter_`` of each layer, follow in that order, each
+    one as a ``.npy`` block which starts at a multiple of 64 bytes, so that its
+    data is aligned as well. Only the state used for prediction is saved, i.e.,
+    neither the fitted loss, which holds the training data, nor the optimizer.
+
+    :param model: a fitted PrimalSVC, DualSVC, PrimalSVR, DualSVR,
+                  NeuralNetworkClassifier or NeuralNetworkRegressor.
+    :param file:  the path of the file, which is overwritten.
+    """
+    name = type(model).__name__
+    if name not in _ESTIMATORS or type(model) is not _ESTIMATORS[name][0]:
+        raise TypeError(f'{type(model).__name__} cannot be saved')
+    _, param_names, array_names = _ESTIMATORS[name]
+
+    if hasattr(model, 'kernel') and model.approximation is not None:
+        raise ValueError(f'{name} with kernel approximation cannot be saved')
+    if not _is_fitted(model, array_names):
+        raise ValueError(f'this {name} instance is not fitted yet')
+    params = {param: getattr(model, param) for param in param_names}
+    # coef_ is only stored by the dual models with the linear kernel
+    arrays = {array: getattr(model, array) for array in array_names if hasattr(model, array)}
+
+    if hasattr(model, 'kernel'):
+        params['kernel'] = _save_kernel(model.kernel)
+    if hasattr(model, 'lb'):
+        arrays['classes_'] = model.lb.classes_
+    if hasattr(model, 'layers'):
+        params['loss'] = model.loss.__name__ if isinstance(model.loss, type) else type(model.loss).__name__
+        params['layers'] = []
+        for i, layer in enumerate(model.layers):
+            if type(layer) is not FullyConnected:
+                raise TypeError(f'{type(layer).__name__} layer cannot be saved')
+            params['layers'].append({'activation': type(layer.activation).__name__,
+                                     'fit_intercept': layer.fit_intercept})
+            arrays[f'layers.{i}.coef_'] = layer.coef_
+            if layer.fit_intercept:
+                arrays[f'layers.{i}.inter_'] = layer.inter_
+
+    for array, value in arrays.items():
+        if not isinstance(value, (np.ndarray, np.generic, float, int)):
+            raise TypeError(f'{array} of type {type(value).__name__} cannot be saved, '
+                            f'only dense arrays are supported')
+
+    header = json.dumps({'estimator': name, 'params': params, 'arrays': list(arrays)},
+                        default=_json_default).encode('utf-8')
+    # the header is padded so that the first array starts aligned
+    prefix_len = len(_MAGIC) + 2 + 4
+    header += b' ' * (-(prefix_len + len(header)) % _ALIGN)
+
+    with open(file, 'wb') as f:
+        f.write(_MAGIC)
+        f.write(struct.pack('<BBI', *FORMAT_VERSION, len(header)))
+        f.write(header)
+        for value in arrays.values():
+            _align(f)
+            np.lib.format.write_array(f, np.asarray(value), allow_pickle=False)
+
+
+def _read_arrays(file, names, offset, mmap_mode):
+    arrays = {}
+    with open(file, 'rb') as f:
+        f.seek(offset)
+        for name in names:
+            f.seek(-f.tell() % _ALIGN, 1)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            offset = f.tell()
+            size = int(np.prod(shape)) * dtype.itemsize
+            if mmap_mode is None or not shape or not size:
+                # the scalars, e.g., the intercept of a binary classifier, are read in
+                # memory as well as the empty arrays, which cannot be memory-mapped
+                array = np.fromfile(f, dtype=dtype, count=size // dtype.itemsize)
+                array = array.reshape(shape, order='F' if fortran_order else 'C')
+                arrays[name] = array[()] if not shape else array
+            else:
+                arrays[name] = np.memmap(file, dtype=dtype, mode=mmap_mode, offset=offset,
+                                         shape=shape, order='F' if fortran_order else 'C')
+            f.seek(offset + size)
+    return arrays
+
+
+def load_model(file, mmap_mode='r'):
+    """
+    Load the model saved into ``file`` by ``save_model``.
+
+    :param file:      the path of the file.
+    :param mmap_mode: the mode of the memory-mapped arrays, i.e., 'r' to share the
+                      read-only pages of the file among the processes, 'c' for
+                      copy-on-write or 'r+' to update the file, if None they are
+                      read in memory.
+    :return:          the fitted model, ready for prediction.
+    """
+    if mmap_mode not in (None, 'r', 'r+', 'c'):
+        raise ValueError(f'unknown mmap_mode {mmap_mode}')
+
+    with open(file, 'rb') as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f'{file} is not an optiml model file')
+        major, minor, header_len = struct.unpack('<BBI', f.read(6))
+        if major != FORMAT_VERSION[0]:
+            raise ValueError(f'{file} has format version {major}.{minor}, '
+                             f'which is not supported by this version {FORMAT_VERSION[0]}.x')
+        header = json.loads(f.read(header_len).decode('utf-8'))
+        offset = f.tell()
+
+    name, params = header['estimator'], header['params']
+    if name not in _ESTIMATORS:
+        raise ValueError(f'unknown estimator {name}')
+    arrays = _read_arrays(file, header['arrays'], offset, mmap_mode)
+
+    model_cls = _ESTIMATORS[name][0]
+    if 'kernel' in params:
+        params['kernel'] = _load_kernel(params['kernel'])
+    if 'layers' in params:
+        loss = getattr(losses, params['loss'], None)
+        if not (isinstance(loss, type) and issubclass(loss, losses.NeuralNetworkLoss)):
+            raise ValueError(f'unknown loss function {params["loss"]}')
+        params['loss'] = loss
+        layers = []
+        for i, layer in enumerate(params['layers']):
+            coef = arrays.pop(f'layers.{i}.coef_')
+            # the weights are not initialized since they are replaced by the loaded ones
+            layer = FullyConnected(*coef.shape, activation=_activation(layer['activation']),
+                                   coef_init=lambda shape, random_state: None,
+                                   inter_init=lambda shape, random_state: None,
+                                   fit_intercept=layer['fit_intercept'])
+            layer.coef_ = coef
+            if layer.fit_intercept:
+                layer.inter_ = arrays.pop(f'layers.{i}.inter_')
+            layers.append(layer)
+        params['layers'] = tuple(layers)
+
+    model = model_cls(**params)
+    if 'classes_' in arrays:
+        model.lb.fit(arrays.pop('classes_'))
+    for array, value in arrays.items():
+        setattr(model, array, value)
+    return model
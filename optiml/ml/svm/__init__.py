@@ -1,3 +1,4 @@
-__all__ = ['SVM', 'PrimalSVC', 'DualSVC', 'PrimalSVR', 'DualSVR']
+__all__ = ['SVM', 'PrimalSVC', 'DualSVC', 'PrimalSVR', 'DualSVR', 'CascadeSVC']
 
 from ._base import SVM, PrimalSVC, DualSVC, PrimalSVR, DualSVR
+from ._cascade import CascadeSVC
@@ -1,26 +1,164 @@
+import os
+import tempfile
 import warnings
 from abc import ABC
+from copy import copy
+from itertools import combinations
 
 import numpy as np
+import scipy.sparse as sp
+from joblib import Parallel, delayed
 from qpsolvers import solve_qp
-from sklearn.base import ClassifierMixin, BaseEstimator, RegressorMixin
+from sklearn.base import ClassifierMixin, BaseEstimator, RegressorMixin, clone
+from sklearn.cluster import KMeans
 from sklearn.exceptions import ConvergenceWarning
 from sklearn.linear_model._base import LinearClassifierMixin, SparseCoefMixin, LinearModel
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelBinarizer
-
-from .kernels import gaussian, Kernel, LinearKernel
-from .losses import squared_hinge, SVMLoss, SVCLoss, SVRLoss, epsilon_insensitive
+from sklearn.utils.extmath import safe_sparse_dot
+from sklearn.utils.multiclass import _ovr_decision_function
+
+from .kernel_approximation import Nystroem, RandomFourierFeatures, TensorSketch
+from .kernels import gaussian, Kernel, LinearKernel, GaussianKernel, KernelRowCache, KernelMatrixCache, \
+    _KernelRowsSubset, _tile_slices
+from .losses import squared_hinge, SVMLoss, SVCLoss, SVRLoss, epsilon_insensitive, SquaredHinge, \
+    SquaredEpsilonInsensitive
+from .dcd import DCD, DCDClassifier, DCDRegression
 from .smo import SMO, SMOClassifier, SMORegression
-from ...opti import Optimizer
-from ...opti import Quadratic
+from .._batches import predict_in_batches
+from ...opti import Optimizer, OptimizationFunction
+from ...opti import Quadratic, LowPrecisionHessian, BlockQuadratic
 from ...opti.constrained import LagrangianDual
 from ...opti.constrained import BoxConstrainedQuadraticOptimizer, LagrangianBoxConstrainedQuadratic
-from ...opti.unconstrained import ProximalBundle
-from ...opti.unconstrained.line_search import LineSearchOptimizer
+from ...opti.unconstrained import ProximalBundle, TrustRegionNewton
+from ...opti.unconstrained.line_search import LineSearchOptimizer, NonlinearConjugateGradient
 from ...opti.unconstrained.stochastic import StochasticOptimizer, StochasticGradientDescent, AdaGrad
 
 
+def _multiclass_subproblems(Y, multi_class):
+    """
+    Return the binary subproblems of the one-vs-rest or one-vs-one scheme
+    over the [n x n_classes] {-1, +1} label indicator matrix ``Y`` as a list
+    of (idx, y) pairs, where idx are the indices of the examples of the
+    subproblem, None if all of them, and y their {-1, +1} labels.
+    """
+    if multi_class == 'ovr':
+        return [(None, Y[:, c]) for c in range(Y.shape[1])]
+    subproblems = []
+    for i, j in combinations(range(Y.shape[1]), 2):
+        idx = np.flatnonzero(np.logical_or(Y[:, i] == 1, Y[:, j] == 1))
+        # the class i is the negative one, the class j the positive one
+        subproblems.append((idx, Y[idx, j]))
+    return subproblems
+
+
+def _ovo_decision_function(scores, n_classes):
+    # count the votes of the one-vs-one classifiers
+    # and break the ties by their summed confidences
+    return _ovr_decision_function(scores > 0, scores, n_classes)
+
+
+def _biased(X):
+    """
+    Append the constant feature of the intercept to the data matrix ``X``.
+    """
+    if sp.issparse(X):
+        return sp.hstack((X, np.ones((X.shape[0], 1))), format='csr')
+    return np.c_[X, np.ones(X.shape[0])]
+
+
+def _support_vectors(X, idx):
+    """
+    Return the rows ``idx`` of ``X``, i.e., the support vectors, as a C-contiguous
+    array, i.e., in the layout the kernel rows are computed from at prediction.
+    """
+    return np.ascontiguousarray(X[idx])
+
+
+def _free_support(alphas, C):
+    """
+    Return the mask of the free multipliers ``alphas``, i.e., strictly
+    within the box [0, C], or of the nonzero ones if none is free.
+    """
+    free = np.logical_and(alphas > 1e-5, alphas < C - 1e-5)
+    if not np.any(free):
+        return alphas > 1e-5
+    return free
+
+
+def _fit_binary(estimator, X, y, K):
+    """
+    Fit the binary DualSVC ``estimator`` over the precomputed kernel matrix ``K``.
+    """
+    y = estimator._validate_targets(y)
+    estimator._fit_dual(X, y, K, estimator._dual_hessian(K, y))
+    return estimator
+
+
+def _reduced_set_coef(kernel, Z, X, alphas, max_tile_bytes=None, n_jobs=None):
+    """
+    Return the coefficients [k x m] beta of the reduced set ``Z`` which minimize
+    ||sum_i alphas_i phi(x_i) - sum_j beta_j phi(z_j)||^2 for each of the k rows
+    of ``alphas``, i.e., the solution of K(Z, Z) beta^T = K(Z, X) alphas^T, and
+    the kernel matrices K(Z, Z) and K(Z, X).
+    """
+    K_zz = kernel.matrix(Z, max_tile_bytes=max_tile_bytes, n_jobs=n_jobs)
+    K_zx = kernel.matrix(Z, X, max_tile_bytes=max_tile_bytes, n_jobs=n_jobs)
+    # the kernel matrix of the reduced set is nearly singular when two vectors
+    # coalesce, so a tiny ridge keeps beta, and the distance, a smooth function of Z
+    ridge = 1e-8 * np.trace(K_zz) / len(Z)
+    beta = np.linalg.solve(K_zz + ridge * np.identity(len(Z)), safe_sparse_dot(K_zx, alphas.T)).T
+    return beta, K_zz, K_zx
+
+
+class _ReducedSetExpansion(OptimizationFunction):
+    """
+    The squared distance in the feature space of the gaussian kernel between the
+    expansions sum_i alphas_i phi(x_i) and sum_j beta_j phi(z_j), relative to the
+    squared norm of the former, as a function of the flattened reduced set Z only,
+    since beta is always the optimal one, so that, by the envelope theorem, the
+    gradient wrt Z is the one of the distance at that fixed beta, i.e., the
+    pre-image problem of the reduced set method by Schölkopf et al.
+    """
+
+    def __init__(self, kernel, X, alphas, n_vectors, max_tile_bytes=2 ** 27, n_jobs=None):
+        super().__init__(ndim=n_vectors * X.shape[1])
+        self.kernel = kernel
+        self.X = X
+        self.alphas = alphas
+        self.max_tile_bytes = max_tile_bytes
+        self.n_jobs = n_jobs
+        self.alphas_K_alphas = sum(np.sum(alphas[:, rows] * np.dot(alphas[:, cols], K.T))
+                                   for rows, cols, K in kernel.tiles(X, max_tile_bytes=max_tile_bytes,
+                                                                     n_jobs=n_jobs))
+        self._last_x, self._expansion = None, None
+
+    def expansion(self, x):
+        # the function and its gradient are evaluated
+        # at the same point, so they share the expansion
+        if self._last_x is None or not np.array_equal(x, self._last_x):
+            # the optimizer may update x in place
+            self._last_x = x.copy()
+            Z = self._last_x.reshape(-1, self.X.shape[1])
+            self._expansion = (Z,) + _reduced_set_coef(self.kernel, Z, self.X, self.alphas,
+                                                       self.max_tile_bytes, self.n_jobs)
+        return self._expansion
+
+    def function(self, x):
+        Z, beta, K_zz, K_zx = self.expansion(x)
+        # beta^T K_zz beta - 2 alphas^T K_xz beta = -alphas^T K_xz beta at the optimal beta
+        return 1 - np.sum(beta * safe_sparse_dot(self.alphas, K_zx.T)) / self.alphas_K_alphas
+
+    def jacobian(self, x):
+        Z, beta, K_zz, K_zx = self.expansion(x)
+        # d k(z, x) / dz = -2 gamma (z - x) k(z, x)
+        W_zz = np.dot(beta.T, beta) * K_zz
+        W_zx = np.dot(beta.T, self.alphas) * K_zx
+        G = (W_zz.sum(axis=1)[:, np.newaxis] * Z - np.dot(W_zz, Z) -
+             W_zx.sum(axis=1)[:, np.newaxis] * Z + safe_sparse_dot(W_zx, self.X))
+        return (-4 * self.kernel.gamma_ / self.alphas_K_alphas * G).ravel()
+
+
 class SVM(BaseEstimator, ABC):
     """
     Base abstract class for all SVM-type estimator.
@@ -41,14 +179,21 @@ class SVM(BaseEstimator, ABC):
         `LBFGS` quasi-Newton method or, alternatively, a subclass of the `StochasticOptimizer`
         e.g, the `StochasticGradientDescent` or `Adam`, which works well on relatively
         large datasets (with thousands of training samples or more) in terms of both
-        training time and validation score.
+        training time and validation score. For the linear PrimalSVC and PrimalSVR it
+        can also be the dual coordinate descent `DCDClassifier` or `DCDRegression`,
+        respectively, which is the method of choice for large and sparse datasets,
+        or the `TrustRegionNewton` method with the squared hinge or the squared
+        epsilon-insensitive loss, respectively, whose Hessian-vector products
+        only involve the examples with a nonzero loss, which converges faster
+        than `LBFGS` on high-dimensional datasets.
 
     max_iter : int, default=1000
         Maximum number of iterations. The solver iterates until convergence
         (determined by ``tol``) or this number of iterations. If the optimizer
         is a subclass of `StochasticOptimizer`, this value determines the number
         of epochs (how many times each data point will be used), not the number
-        of gradient steps.
+        of gradient steps. If the optimizer is SMO, this value determines the
+        number of loops over all the training examples.
 
     learning_rate : double, default=0.1
         The initial learning rate used for weight update. It controls the
@@ -75,7 +220,8 @@ class SVM(BaseEstimator, ABC):
 
     shuffle : bool, default=True
         Whether to shuffle samples for batch sampling in each iteration. Only
-        used when the ``optimizer`` is a subclass of `StochasticOptimizer`.
+        used when the ``optimizer`` is a subclass of `StochasticOptimizer` or,
+        to visit the coordinates in random order, of `DCD`.
 
     random_state : int, default=None
         Controls the pseudo random number generation for train-test split if
@@ -98,7 +244,14 @@ class SVM(BaseEstimator, ABC):
 
     Notes
     -----
-
+    The ``predict`` and ``decision_function`` methods also accept the
+    ``batch_size``, ``n_jobs`` and ``out`` keyword arguments, which differ
+    from the homonymous estimator parameters: if ``batch_size`` is given,
+    the test set is evaluated by chunks of ``batch_size`` rows, possibly by
+    ``n_jobs`` threads (or processes within a joblib ``parallel_backend``
+    context), whose results are written into ``out``, e.g., a memory-mapped
+    array, if it is given, so that the kernel matrix between the support
+    vectors and the whole test set is never materialized.
 
     References
     ----------
@@ -159,6 +312,7 @@ class PrimalSVM(SVM, ABC):
                  fit_intercept=True,
                  master_solver='ecos',
                  master_verbose=False,
+                 shrinking=True,
                  shuffle=True,
                  random_state=None,
                  verbose=False):
@@ -175,13 +329,14 @@ class PrimalSVM(SVM, ABC):
                          random_state=random_state,
                          verbose=verbose)
         self.loss = loss
-        if not issubclass(self.optimizer, Optimizer):
+        if not issubclass(self.optimizer, (Optimizer, DCD)):
             raise TypeError(f'{optimizer} is not an allowed optimization method')
         self.validation_split = validation_split
         self.early_stopping = early_stopping
         self.patience = patience
         self.master_solver = master_solver
         self.master_verbose = master_verbose
+        self.shrinking = shrinking
         self.coef_ = np.zeros(0)
         self.intercept_ = 0.
         self.fit_intercept = fit_intercept
@@ -262,13 +417,114 @@ class DualSVM(SVM, ABC):
     Parameters
     ----------
 
-    kernel : Kernel instance like {linear, poly, gaussian, laplacian, sigmoid}, default=gaussian
+    kernel : Kernel instance like {linear, poly, gaussian, laplacian, sigmoid} or 'precomputed', default=gaussian
         Specifies the kernel type to be used in the algorithm.
-        It must be one of linear, poly, gaussian, laplacian, sigmoid or
-        a custom one which extend the method ``__call__`` of the ``Kernel`` class.
+        It must be one of linear, poly, gaussian, laplacian, sigmoid, 'precomputed'
+        or a custom one which extend the method ``__call__`` of the ``Kernel`` class.
         If none is given, 'gaussian' will be used. If a custom is given it is
         used to pre-compute the kernel matrix from data matrices; that matrix
-        should be an array of shape ``(n_samples, n_samples)``.
+        should be an array of shape ``(n_samples, n_samples)``. If 'precomputed'
+        is given, the data matrix given to ``fit`` must be the kernel matrix of
+        shape ``(n_samples, n_samples)`` and the one given to ``predict`` the
+        kernel matrix between the test and the training samples of shape
+        ``(n_samples_test, n_samples)``.
+
+    max_tile_bytes : int, default=None
+        Memory budget in bytes for the kernel matrix tiles computed at the same
+        time. If given, the kernel matrices are computed by row/column blocks
+        which never exceed this budget, otherwise in a single shot.
+
+    n_jobs : int, default=None
+        The number of threads used to compute the kernel matrix tiles when
+        ``max_tile_bytes`` is given and of the workers used to train the
+        binary classifiers of a multiclass DualSVC. ``None`` means 1 and
+        ``-1`` means using all the processors.
+
+    memmap_dir : str, default=None
+        If given, the kernel matrix and the Hessian matrix of the dual problem,
+        the latter only for DualSVC since the one of DualSVR is kept implicit,
+        are written by tiles, bounded by ``max_tile_bytes`` or 128MB if it is
+        None, to a temporary memory-mapped file in this directory, the same
+        one if the kernel matrix is overwritten by the Hessian, which is
+        removed when the matrices are released, so that they are never held in
+        memory as a whole and the bound constrained optimizers run out-of-core.
+        Note that `ActiveSet` and `InteriorPoint` still factorize dense
+        submatrices of the Hessian, while `ProjectedGradient` and `FrankWolfe`
+        only need matrix-vector products. It is ignored by SMO, which never
+        materializes the kernel matrix.
+
+    dtype : {np.float64, np.float32}, default=np.float64
+        The precision of the kernel and Hessian matrices of the dual problem
+        computed by the estimator, i.e., not precomputed or cached ones, which
+        are stored in float32, if given, to halve their memory, while the
+        optimization runs in float64 over them without upcasting them. It is
+        ignored by SMO, which never materializes the kernel matrix.
+
+    cache_size : float, default=200
+        Specify the size of the kernel rows cache (in MB) used when the
+        ``optimizer`` is SMO, which never materializes the kernel matrix.
+
+    working_set : {'first_order', 'second_order'}, default='first_order'
+        The working set selection used when the ``optimizer`` is SMO. If
+        'first_order', the multiplier jointly optimized with the examined
+        one is the maximal violating one, otherwise the one which maximizes
+        the second order approximation of the decrease of the dual objective,
+        which usually requires less iterations and kernel rows evaluations.
+
+    shrinking : bool, default=True
+        Whether to use the shrinking heuristic when the ``optimizer`` is SMO,
+        i.e., to stop examining the multipliers which have been at the bounds
+        and optimal for a while until the optimality over the other ones is
+        attained.
+
+    max_time : float, default=None
+        If given, the maximum time in seconds of the optimization when the
+        ``optimizer`` is SMO, after which it is stopped as when ``max_iter``
+        is reached.
+
+    checkpoint : str, default=None
+        If given, the path of the file where the state of SMO is saved when
+        its optimization is stopped by ``max_iter`` or ``max_time`` and from
+        which it is resumed, if it exists, at the next fit over the same
+        data. The file is removed once the optimization converges.
+
+    kernel_cache : KernelMatrixCache instance, default=None
+        If given, the kernel matrices are looked up in and stored into this
+        cache, keyed by the training data and the kernel hyperparameters, so
+        that repeated fits over the same data, e.g., a sweep over C, compute
+        the kernel matrix only once. The cache is shared among the clones of
+        the estimator. In this case SMO uses the whole cached kernel matrix
+        instead of its rows cache.
+
+    approximation : {'nystroem', 'random_fourier', 'tensor_sketch'}, default=None
+        If given, the kernel is approximated by an explicit feature map of
+        dimension ``n_components``, i.e., by the Nystroem method for any kernel,
+        by random Fourier features for the gaussian kernel or by the tensor
+        sketch for the polynomial one, and the model is trained in the primal by
+        the linear estimator over the mapped data, i.e., in O(n_samples
+        n_components) instead of O(n_samples^2). In this case the ``optimizer``
+        must be a subclass of `LineSearchOptimizer`, `StochasticOptimizer` or
+        `ProximalBundle`, otherwise the default one of the linear estimator
+        is used.
+
+    n_components : int, default=100
+        The dimension of the feature map used when ``approximation`` is given.
+
+    multi_class : {'ovo', 'ovr'}, default='ovo'
+        Only for DualSVC, the multiclass scheme used over more than two labels,
+        i.e., one-vs-one, which trains a binary classifier for each pair of
+        classes over their examples only, or one-vs-rest, which trains one for
+        each class against all the others. The kernel matrix is computed once
+        over all the examples, and sliced for each pair of classes, since SMO
+        does not use its rows cache in this case, and the binary classifiers
+        are trained in parallel by joblib over ``n_jobs`` workers, i.e.,
+        threads by default or processes within a ``joblib.parallel_backend('loky')``
+        context. They are stored in ``estimators_`` and share the union of
+        their support vectors, whose coefficients are stacked by row in
+        ``dual_coef_``, so that the kernel between the support vectors and
+        the test examples is computed once. ``decision_function`` returns the
+        [n_samples x n_classes] scores, i.e., the votes of the pairwise
+        classifiers plus their normalized confidences for 'ovo'.
     """
 
     def __init__(self,
@@ -284,6 +540,18 @@ class DualSVM(SVM, ABC):
                  max_f_eval=15000,
                  master_solver='ecos',
                  master_verbose=False,
+                 max_tile_bytes=None,
+                 n_jobs=None,
+                 memmap_dir=None,
+                 dtype=np.float64,
+                 cache_size=200,
+                 working_set='first_order',
+                 shrinking=True,
+                 max_time=None,
+                 checkpoint=None,
+                 kernel_cache=None,
+                 approximation=None,
+                 n_components=100,
                  shuffle=True,
                  random_state=None,
                  verbose=False):
@@ -299,7 +567,7 @@ class DualSVM(SVM, ABC):
                          shuffle=shuffle,
                          random_state=random_state,
                          verbose=verbose)
-        if not isinstance(kernel, Kernel):
+        if not (isinstance(kernel, Kernel) or kernel == 'precomputed'):
             raise TypeError(f'{kernel} is not an allowed kernel function')
         self.kernel = kernel
         if not (isinstance(optimizer, str) or
@@ -308,12 +576,333 @@ class DualSVM(SVM, ABC):
             raise TypeError(f'{optimizer} is not an allowed optimization method')
         self.master_solver = master_solver
         self.master_verbose = master_verbose
+        if max_tile_bytes is not None and not max_tile_bytes > 0:
+            raise ValueError('max_tile_bytes must be > 0')
+        self.max_tile_bytes = max_tile_bytes
+        self.n_jobs = n_jobs
+        self.memmap_dir = memmap_dir
+        if np.dtype(dtype) not in (np.float32, np.float64):
+            raise ValueError(f'unknown dtype {dtype}')
+        self.dtype = dtype
+        if not cache_size > 0:
+            raise ValueError('cache_size must be > 0')
+        self.cache_size = cache_size
+        if working_set not in ('first_order', 'second_order'):
+            raise ValueError(f'unknown working set selection {working_set}')
+        self.working_set = working_set
+        self.shrinking = shrinking
+        if max_time is not None and not max_time > 0:
+            raise ValueError('max_time must be > 0')
+        self.max_time = max_time
+        self.checkpoint = checkpoint
+        if not (kernel_cache is None or isinstance(kernel_cache, KernelMatrixCache)):
+            raise TypeError(f'{kernel_cache} is not an allowed kernel cache')
+        self.kernel_cache = kernel_cache
+        if approximation not in (None, 'nystroem', 'random_fourier', 'tensor_sketch'):
+            raise ValueError(f'unknown kernel approximation {approximation}')
+        if approximation is not None and kernel == 'precomputed':
+            raise ValueError('a precomputed kernel cannot be approximated')
+        self.approximation = approximation
+        if not n_components > 0:
+            raise ValueError('n_components must be > 0')
+        self.n_components = n_components
         if isinstance(self.kernel, LinearKernel):
             self.coef_ = np.zeros(0)
         self.intercept_ = 0.
 
+    def _fit_feature_map(self, X):
+        if self.approximation == 'nystroem':
+            feature_map = Nystroem
+        elif self.approximation == 'random_fourier':
+            feature_map = RandomFourierFeatures
+        else:  # tensor_sketch
+            feature_map = TensorSketch
+        self.feature_map_ = feature_map(kernel=self.kernel,
+                                        n_components=self.n_components,
+                                        random_state=self.random_state).fit(X)
+        return self.feature_map_.transform(X)
+
+    def _primal_optimizer(self, default):
+        if (isinstance(self.optimizer, type) and
+                issubclass(self.optimizer, (LineSearchOptimizer, StochasticOptimizer, ProximalBundle))):
+            return self.optimizer
+        return default
+
+    def _primal_params(self):
+        return dict(C=self.C,
+                    tol=self.tol,
+                    max_iter=self.max_iter,
+                    learning_rate=self.learning_rate,
+                    momentum_type=self.momentum_type,
+                    momentum=self.momentum,
+                    batch_size=self.batch_size,
+                    max_f_eval=self.max_f_eval,
+                    master_solver=self.master_solver,
+                    master_verbose=self.master_verbose,
+                    shuffle=self.shuffle,
+                    random_state=self.random_state,
+                    verbose=self.verbose)
+
+    def _more_tags(self):
+        # let the model selection utilities slice the rows and the
+        # columns of the precomputed kernel matrix for each fold
+        return {'pairwise': isinstance(self.kernel, str) and self.kernel == 'precomputed'}
+
+    def _fit_kernel(self, X):
+        # resolve the kernel parameters, e.g., gamma, once on the training
+        # data and freeze them for prediction; the kernel is copied since
+        # the default ones are shared module-level instances
+        if isinstance(self.kernel, Kernel):
+            self.kernel = clone(self.kernel).fit(X)
+
+    def _memmap(self, shape):
+        # backed by an anonymous temporary file, i.e., it is removed as
+        # soon as the memory-mapped array is released
+        return np.memmap(tempfile.TemporaryFile(dir=self.memmap_dir), dtype=self.dtype, mode='w+', shape=shape)
+
+    def _tile_bytes(self):
+        # the matrices written to disk are always computed by tiles, so
+        # that they are never held in memory as a whole
+        return 2 ** 27 if self.max_tile_bytes is None else self.max_tile_bytes
+
+    def _kernel_matrix(self, X):
+        if isinstance(self.kernel, str):  # precomputed
+            return X
+        if self.kernel_cache is not None:
+            return self.kernel_cache.matrix(self.kernel, X, max_tile_bytes=self.max_tile_bytes, n_jobs=self.n_jobs)
+        if self.memmap_dir is not None:
+            return self.kernel.matrix(X, out=self._memmap((len(X), len(X))),
+                                      max_tile_bytes=self._tile_bytes(),
+                                      n_jobs=self.n_jobs)
+        if np.dtype(self.dtype) != np.float64:
+            # the float64 tiles are bounded to 16MB, if no budget is given, so
+            # that they are small wrt the float32 kernel matrix they fill
+            return self.kernel.matrix(X, out=np.empty((len(X), len(X)), dtype=self.dtype),
+                                      max_tile_bytes=self.max_tile_bytes or 2 ** 24,
+                                      n_jobs=self.n_jobs)
+        return self.kernel.matrix(X, max_tile_bytes=self.max_tile_bytes, n_jobs=self.n_jobs)
+
+    def _owns_kernel_matrix(self):
+        # the kernel matrix computed by the estimator can be overwritten, while
+        # the precomputed or cached ones are shared with the caller
+        return not isinstance(self.kernel, str) and self.kernel_cache is None
+
+    def _smo_kernel_matrix(self, X):
+        # the kernel matrix is materialized only if it is precomputed or
+        # it is cached, otherwise its rows are computed on-demand by SMO
+        # and kept in a LRU cache
+        if isinstance(self.kernel, str) or self.kernel_cache is not None:
+            return self._kernel_matrix(X)
+        self.kernel_row_cache_ = KernelRowCache(self.kernel, X, self.cache_size)
+        return self.kernel_row_cache_
+
+    def _minimize_smo(self, smo, resume=True):
+        # the incremental updates change the problem of the
+        # checkpoint, so they neither resume from nor save it
+        checkpoint = self.checkpoint if resume else None
+
+        if checkpoint is not None and os.path.exists(checkpoint):
+            smo.load_checkpoint(checkpoint)
+
+        smo.minimize()
+
+        if smo.status == 'stopped':
+            if checkpoint is not None:
+                smo.save_checkpoint(checkpoint)
+            if smo._max_time_reached():
+                warnings.warn('max_time reached but the optimization has not converged yet', ConvergenceWarning)
+            else:
+                warnings.warn('max_iter reached but the optimization has not converged yet', ConvergenceWarning)
+        elif checkpoint is not None and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        return smo
+
+    def _validate_targets(self, y):
+        raise NotImplementedError
+
+    def _dual_matrices(self, X, y):
+        """
+        Return the kernel matrix, or its rows cache if the ``optimizer`` is
+        SMO, and the Hessian matrix of the dual problem, if it is explicit.
+        The kernel matrix is None if it has been overwritten by the Hessian.
+        """
+        raise NotImplementedError
+
+    def _fit_dual(self, X, y, K, Q=None, alphas=None):
+        """
+        Solve the dual problem over the matrices given by ``_dual_matrices``
+        starting from the multipliers ``alphas``, if given, clipped into the
+        box, and return the whole vector of the optimal ones.
+        """
+        raise NotImplementedError
+
+    def fit(self, X, y):
+        y = self._validate_targets(y)
+
+        self._fit_kernel(X)
+
+        if self.approximation is not None:
+            self.primal_ = self._fit_primal(self._fit_feature_map(X), y)
+            return self
+
+        self._fit_dual(X, y, *self._dual_matrices(X, y))
+
+        return self
+
+    def fit_path(self, X, y, Cs):
+        """
+        Fit a model for each regularization parameter in ``Cs`` over the same
+        kernel and Hessian matrices, computed only once. The problems are solved
+        by increasing C, each one warm-started from the solution of the previous
+        one, clipped into its box, if the ``optimizer`` is SMO, a subclass of
+        `BoxConstrainedQuadraticOptimizer` or a solver of qpsolvers which accepts
+        initial values. If ``approximation`` is given, the models are fitted
+        independently.
+
+        :param X:  [n x d] data matrix.
+        :param y:  [n] target vector.
+        :param Cs: the regularization parameters.
+        :return:   the list of the fitted models, one for each C in ``Cs``.
+        """
+        if self.approximation is not None:
+            return [clone(self).set_params(C=C).fit(X, y) for C in Cs]
+
+        path = clone(self)
+        path._fit_kernel(X)
+        K, Q = path._dual_matrices(X, path._validate_targets(y))
+
+        models = [None] * len(Cs)
+        alphas = None
+        for i in np.argsort(Cs, kind='stable'):
+            # the state of SMO depends on C, so the checkpoint is not shared
+            model = clone(self).set_params(C=Cs[i], checkpoint=None)
+            model.kernel = path.kernel
+            alphas = model._fit_dual(X, model._validate_targets(y), K, Q, alphas)
+            models[i] = model
+
+        return models
+
+    def _dual_decision_function(self, X):
+        """
+        Compute dual_coef_^T K(support_vectors_, X) accumulating over the
+        kernel tiles, if ``max_tile_bytes`` is given, so that the whole
+        [n_sv x n_samples] kernel matrix is never materialized.
+        """
+        if isinstance(self.kernel, str):  # precomputed
+            return np.dot(self.dual_coef_, X[:, self.support_].T)
+        if self.max_tile_bytes is None:
+            return np.dot(self.dual_coef_, self.kernel(self.support_vectors_, X))
+        # the dual coefficients of the multiclass DualSVC are stacked by row
+        y = np.zeros(self.dual_coef_.shape[:-1] + (len(X),))
+        for rows, cols, K in self.kernel.tiles(self.support_vectors_, X,
+                                               max_tile_bytes=self.max_tile_bytes,
+                                               n_jobs=self.n_jobs):
+            y[..., cols] += np.dot(self.dual_coef_[..., rows], K)
+        return y
+
+    def compress(self, n_vectors, X_val=None, max_iter=100):
+        """
+        Return a copy of the model whose decision function is expanded over a
+        budget of ``n_vectors`` synthetic vectors, i.e., a reduced set, instead
+        of the support vectors, so that the cost of the prediction is reduced
+        by a factor of about ``len(support_vectors_) / n_vectors``.
+
+        The support vectors are merged into the centroids of their k-means
+        clusters, weighted by the magnitude of their dual coefficients, whose
+        coefficients are then the ones which minimize the distance between the
+        reduced and the original expansions in the feature space, i.e.,
+        ||sum_i dual_coef_i phi(sv_i) - sum_j beta_j phi(z_j)||^2, which is a
+        linear least squares problem in the kernel matrices, while the intercept
+        is unchanged. With the gaussian kernel the centroids are then moved to
+        minimize that distance too, i.e., the pre-image problem of the reduced
+        set method, by the nonlinear conjugate gradient method. Note that
+        ``support_`` is empty since the new vectors are not training examples.
+
+        :param n_vectors: the number of vectors of the reduced set.
+        :param X_val:     [m x d] holdout data matrix, if given the relative root mean
+                          squared error between the decision functions of the reduced
+                          and the original models over it is stored in ``compression_error_``.
+        :param max_iter:  the maximum number of iterations of the optimization of the
+                          reduced set with the gaussian kernel, 0 to keep the centroids.
+        :return:          the compressed model.
+        """
+        if isinstance(self.kernel, str):
+            raise ValueError('a model with a precomputed kernel cannot be compressed')
+        if self.approximation is not None:
+            raise ValueError('a model with a kernel approximation cannot be compressed')
+        n_sv = len(self.support_vectors_)
+        if not 0 < n_vectors < n_sv:
+            raise ValueError(f'n_vectors must be in (0, {n_sv}), i.e., less than the number of support vectors')
+
+        # the dual coefficients of the multiclass DualSVC are stacked by row
+        dual_coef = np.atleast_2d(self.dual_coef_)
+        Z = KMeans(n_clusters=n_vectors, n_init=3, random_state=self.random_state).fit(
+            self.support_vectors_, sample_weight=np.abs(dual_coef).sum(axis=0)).cluster_centers_
+        if isinstance(self.kernel, GaussianKernel) and max_iter > 0:
+            f = _ReducedSetExpansion(self.kernel, self.support_vectors_, dual_coef, n_vectors,
+                                     max_tile_bytes=self._tile_bytes(), n_jobs=self.n_jobs)
+            # the distance is not convex in Z, so the monotone backtracking line search
+            # is used, i.e., m2=0, since the Armijo-Wolfe one may end at a worse point
+            Z = NonlinearConjugateGradient(f=f, x=Z.ravel(), max_iter=max_iter,
+                                           m2=0).minimize().x.reshape(Z.shape)
+        beta = _reduced_set_coef(self.kernel, Z, self.support_vectors_, dual_coef,
+                                 self.max_tile_bytes, self.n_jobs)[0]
+
+        model = copy(self)
+        # the copy keeps only the state used for prediction, i.e., neither the multipliers of the
+        # training examples nor the dual problem, e.g., its Hessian, nor the kernel rows cache
+        for attr in ('sv_y', 'alphas', 'alphas_p', 'alphas_n', 'estimators_', 'obj', 'kernel_row_cache_'):
+            model.__dict__.pop(attr, None)
+        # and the fitted optimizer, e.g., SMO with its error cache, is replaced by its class
+        optimizer = self.optimizer
+        if isinstance(optimizer, LagrangianDual):
+            optimizer = optimizer.optimizer
+        model.optimizer = optimizer if isinstance(optimizer, (str, type)) else type(optimizer)
+        model.support_ = np.zeros(0, dtype=int)
+        model.support_vectors_ = Z
+        model.dual_coef_ = beta.reshape(self.dual_coef_.shape[:-1] + (n_vectors,))
+        if isinstance(self.kernel, LinearKernel):
+            model.coef_ = np.dot(model.dual_coef_, Z)
+
+        if X_val is not None:
+            f = self._dual_decision_function(X_val)
+            model.compression_error_ = np.sqrt(np.mean((model._dual_decision_function(X_val) - f) ** 2) /
+                                               np.mean((f.T + self.intercept_) ** 2))
+            if self.verbose:
+                print(f'compressed {n_sv} support vectors into {n_vectors} with '
+                      f'relative holdout error {model.compression_error_:1.4e}')
+
+        return model
+
 
 class PrimalSVC(LinearClassifierMixin, SparseCoefMixin, PrimalSVM):
+    """
+
+    Parameters
+    ----------
+
+    shrinking : bool, default=True
+        Whether to use the shrinking heuristic when the ``optimizer`` is
+        `DCDClassifier`, i.e., to stop visiting the coordinates which have
+        been at the bounds and optimal in the last outer iteration until
+        the optimality over the other ones is attained.
+
+    multi_class : {'ovr', 'ovo'}, default='ovr'
+        The multiclass scheme used over more than two labels, i.e., one-vs-rest,
+        which trains a binary classifier for each class against all the others,
+        or one-vs-one, which trains one for each pair of classes over their
+        examples only. The binary classifiers are stored in ``estimators_``
+        and stacked in ``coef_`` and ``intercept_``, while ``decision_function``
+        returns the [n_samples x n_classes] scores, i.e., the votes of the
+        pairwise classifiers plus their normalized confidences for 'ovo'.
+
+    n_jobs : int, default=None
+        The number of workers used to train the binary classifiers of the
+        multiclass scheme in parallel by joblib, i.e., threads by default or
+        processes within a ``joblib.parallel_backend('loky')`` context.
+        ``None`` means 1 and ``-1`` means using all the processors.
+    """
 
     def __init__(self,
                  C=1.,
@@ -332,6 +921,9 @@ class PrimalSVC(LinearClassifierMixin, SparseCoefMixin, PrimalSVM):
                  fit_intercept=True,
                  master_solver='ecos',
                  master_verbose=False,
+                 shrinking=True,
+                 multi_class='ovr',
+                 n_jobs=None,
                  shuffle=True,
                  random_state=None,
                  verbose=False):
@@ -351,11 +943,20 @@ class PrimalSVC(LinearClassifierMixin, SparseCoefMixin, PrimalSVM):
                          fit_intercept=fit_intercept,
                          master_solver=master_solver,
                          master_verbose=master_verbose,
+                         shrinking=shrinking,
                          shuffle=shuffle,
                          random_state=random_state,
                          verbose=verbose)
         if not issubclass(loss, SVCLoss):
             raise TypeError(f'{loss} is not an allowed LinearSVC loss function')
+        if issubclass(optimizer, DCD) and not issubclass(optimizer, DCDClassifier):
+            raise TypeError(f'{optimizer} is not an allowed optimization method')
+        if issubclass(optimizer, TrustRegionNewton) and not issubclass(loss, SquaredHinge):
+            raise TypeError(f'{optimizer} needs a twice differentiable loss function, i.e., the squared hinge')
+        if multi_class not in ('ovr', 'ovo'):
+            raise ValueError(f'unknown multiclass scheme {multi_class}')
+        self.multi_class = multi_class
+        self.n_jobs = n_jobs
         self.lb = LabelBinarizer(neg_label=-1)
 
     def _store_train_val_info(self, opt, X_batch, y_batch, X_val, y_val):
@@ -375,8 +976,7 @@ class PrimalSVC(LinearClassifierMixin, SparseCoefMixin, PrimalSVM):
     def fit(self, X, y):
         self.lb.fit(y)
         if len(self.lb.classes_) > 2:
-            raise ValueError('use OneVsOneClassifier or OneVsRestClassifier from sklearn.multiclass '
-                             'to train a model over more than two labels')
+            return self._fit_multiclass(X, y)
         y = self.lb.transform(y).ravel()
 
         if issubclass(self.optimizer, LineSearchOptimizer):
@@ -421,6 +1021,47 @@ class PrimalSVC(LinearClassifierMixin, SparseCoefMixin, PrimalSVM):
 
             self._unpack(self.optimizer.x)
 
+        elif issubclass(self.optimizer, TrustRegionNewton):
+
+            if self.fit_intercept:
+                X_biased = np.c_[X, np.ones_like(y)]
+            else:
+                X_biased = X
+
+            self.loss = self.loss(self, X_biased, y)
+            self.optimizer = self.optimizer(f=self.loss,
+                                            x=np.zeros(self.loss.ndim),
+                                            eps=self.tol,
+                                            max_iter=self.max_iter,
+                                            verbose=self.verbose).minimize()
+
+            if self.optimizer.status == 'stopped':
+                warnings.warn('max_iter reached but the optimization has not converged yet', ConvergenceWarning)
+
+            self._unpack(self.optimizer.x)
+
+        elif issubclass(self.optimizer, DCD):
+
+            if self.fit_intercept:
+                X_biased = _biased(X)
+            else:
+                X_biased = X
+
+            self.loss = self.loss(self, X_biased, y)
+            self.optimizer = self.optimizer(X_biased, y, self.loss,
+                                            C=self.C,
+                                            tol=self.tol,
+                                            shrinking=self.shrinking,
+                                            max_iter=self.max_iter,
+                                            shuffle=self.shuffle,
+                                            random_state=self.random_state,
+                                            verbose=self.verbose).minimize()
+
+            if self.optimizer.status == 'stopped':
+                warnings.warn('max_iter reached but the optimization has not converged yet', ConvergenceWarning)
+
+            self._unpack(self.optimizer.w)
+
         elif issubclass(self.optimizer, StochasticOptimizer):
 
             if self.validation_split:
@@ -460,10 +1101,26 @@ class PrimalSVC(LinearClassifierMixin, SparseCoefMixin, PrimalSVM):
 
         return self
 
-    def decision_function(self, X):
-        return np.dot(X, self.coef_) + self.intercept_
+    def _fit_multiclass(self, X, y):
+        subproblems = _multiclass_subproblems(self.lb.transform(y), self.multi_class)
+        self.estimators_ = Parallel(n_jobs=self.n_jobs, prefer='threads')(
+            delayed(clone(self).fit)(X if idx is None else X[idx], y)
+            for idx, y in subproblems)
+        self.coef_ = np.array([estimator.coef_ for estimator in self.estimators_])
+        self.intercept_ = np.array([estimator.intercept_ for estimator in self.estimators_], dtype=float)
+        return self
 
-    def predict(self, X):
+    def decision_function(self, X, batch_size=None, n_jobs=None, out=None):
+        if batch_size is not None or out is not None:
+            return predict_in_batches(self.decision_function, X, batch_size, n_jobs, out)
+        scores = safe_sparse_dot(X, self.coef_.T) + self.intercept_
+        if self.multi_class == 'ovo' and len(self.lb.classes_) > 2:
+            return _ovo_decision_function(scores, len(self.lb.classes_))
+        return scores
+
+    def predict(self, X, batch_size=None, n_jobs=None, out=None):
+        if batch_size is not None or out is not None:
+            return predict_in_batches(self.predict, X, batch_size, n_jobs, out)
         return self.lb.inverse_transform(self.decision_function(X))
 
 
@@ -482,6 +1139,19 @@ class DualSVC(ClassifierMixin, DualSVM):
                  max_f_eval=15000,
                  master_solver='ecos',
                  master_verbose=False,
+                 max_tile_bytes=None,
+                 n_jobs=None,
+                 memmap_dir=None,
+                 dtype=np.float64,
+                 cache_size=200,
+                 working_set='first_order',
+                 shrinking=True,
+                 max_time=None,
+                 checkpoint=None,
+                 kernel_cache=None,
+                 approximation=None,
+                 n_components=100,
+                 multi_class='ovo',
                  shuffle=True,
                  random_state=None,
                  verbose=False):
@@ -497,40 +1167,145 @@ class DualSVC(ClassifierMixin, DualSVM):
                          max_f_eval=max_f_eval,
                          master_solver=master_solver,
                          master_verbose=master_verbose,
+                         max_tile_bytes=max_tile_bytes,
+                         n_jobs=n_jobs,
+                         memmap_dir=memmap_dir,
+                         dtype=dtype,
+                         cache_size=cache_size,
+                         working_set=working_set,
+                         shrinking=shrinking,
+                         max_time=max_time,
+                         checkpoint=checkpoint,
+                         kernel_cache=kernel_cache,
+                         approximation=approximation,
+                         n_components=n_components,
                          shuffle=shuffle,
                          random_state=random_state,
                          verbose=verbose)
+        if multi_class not in ('ovo', 'ovr'):
+            raise ValueError(f'unknown multiclass scheme {multi_class}')
+        self.multi_class = multi_class
         self.lb = LabelBinarizer(neg_label=-1)
 
+    def _validate_targets(self, y):
+        self.lb.fit(y)
+        if len(self.lb.classes_) > 2:
+            # the multiclass scheme is only implemented by fit of DualSVC
+            raise ValueError(f'{type(self).__name__} supports only binary targets')
+        return self.lb.transform(y).ravel()
+
+    def _fit_primal(self, X, y):
+        # train a linear classifier over the explicit feature map
+        return PrimalSVC(optimizer=self._primal_optimizer(StochasticGradientDescent),
+                         multi_class=self.multi_class,
+                         n_jobs=self.n_jobs,
+                         **self._primal_params()).fit(X, y)
+
+    def _dual_matrices(self, X, y):
+        if self.optimizer == SMOClassifier:
+            return self._smo_kernel_matrix(X), None
+        K = self._kernel_matrix(X)
+        if self._owns_kernel_matrix():
+            # the kernel matrix is not needed anymore once the Hessian
+            # is built, so the latter is formed in place of the former
+            return None, self._dual_hessian(K, y, overwrite_K=True)
+        return K, self._dual_hessian(K, y)
+
+    def _dual_hessian(self, K, y, overwrite_K=False):
+        """
+        Return the Hessian matrix of the dual problem, i.e., diag(y) K diag(y),
+        in ``dtype``, scaling the rows and the columns of K without building
+        the outer product of y, in place of K if ``overwrite_K`` is True.
+        """
+        if self.optimizer == SMOClassifier:
+            return None
+
+        n_samples = len(y)
+        y = y.astype(self.dtype)
+
+        if self.memmap_dir is None:
+            Q = np.multiply(K, y[:, np.newaxis], out=K if overwrite_K else None, dtype=self.dtype)
+            Q *= y
+        else:  # out-of-core
+            Q = K if overwrite_K else self._memmap((n_samples, n_samples))
+            for rows, cols in _tile_slices(n_samples, n_samples, self._tile_bytes(), Q.itemsize):
+                Q[rows, cols] = K[rows, cols] * np.outer(y[rows], y[cols])
+
+        return Q
+
     def fit(self, X, y):
         self.lb.fit(y)
         if len(self.lb.classes_) > 2:
-            raise ValueError('use OneVsOneClassifier or OneVsRestClassifier from sklearn.multiclass '
-                             'to train a model over more than two labels')
-        y = self.lb.transform(y).ravel()
+            return self._fit_multiclass(X, y)
+        return super().fit(X, y)
+
+    def fit_path(self, X, y, Cs):
+        if len(np.unique(y)) > 2:
+            raise ValueError(f'fit_path of {type(self).__name__} supports only binary targets')
+        return super().fit_path(X, y, Cs)
+
+    def _fit_multiclass(self, X, y):
+        self._fit_kernel(X)
+
+        if self.approximation is not None:
+            self.primal_ = self._fit_primal(self._fit_feature_map(X), y)
+            return self
+
+        K = self._kernel_matrix(X)
+
+        subproblems = _multiclass_subproblems(self.lb.transform(y), self.multi_class)
+
+        def binary():
+            # the kernel matrix is given to each binary
+            # classifier, which share the fitted kernel
+            estimator = clone(self).set_params(kernel_cache=None, checkpoint=None)
+            estimator.kernel = self.kernel
+            return estimator
+
+        self.estimators_ = Parallel(n_jobs=self.n_jobs, prefer='threads')(
+            delayed(_fit_binary)(binary(), X, y, K) if idx is None else
+            delayed(_fit_binary)(binary(), X[idx], y, K[np.ix_(idx, idx)])
+            for idx, y in subproblems)
+
+        # the support vectors are shared by the binary classifiers and
+        # indexed by the union of them over the whole training examples
+        supports = [estimator.support_ if idx is None else idx[estimator.support_]
+                    for estimator, (idx, _) in zip(self.estimators_, subproblems)]
+        self.support_ = np.unique(np.hstack(supports))
+        self.support_vectors_ = _support_vectors(X, self.support_)
+        self.dual_coef_ = np.zeros((len(self.estimators_), len(self.support_)))
+        for dual_coef, estimator, support in zip(self.dual_coef_, self.estimators_, supports):
+            dual_coef[np.searchsorted(self.support_, support)] = estimator.dual_coef_
+        self.intercept_ = np.array([estimator.intercept_ for estimator in self.estimators_], dtype=float)
 
+        if isinstance(self.kernel, LinearKernel):
+            self.coef_ = np.dot(self.dual_coef_, self.support_vectors_)
+
+        return self
+
+    def _fit_dual(self, X, y, K, Q=None, alphas=None):
         n_samples = len(y)
 
-        # kernel matrix
-        K = self.kernel(X)
+        if self.optimizer == SMOClassifier:
+
+            smo = SMOClassifier(None, X, y, K, self.kernel, self.C, self.tol, self.working_set,
+                                self.shrinking, self.max_iter, self.max_time, self.verbose)
+            if alphas is not None:
+                smo.warm_start(alphas)
+            self.optimizer = self._minimize_smo(smo)
+            return self._store_smo_solution()
 
-        Q = K * np.outer(y, y)
         q = -np.ones(n_samples)
 
         ub = np.ones(n_samples) * self.C  # upper bounds
 
-        self.obj = Quadratic(Q, q)
+        if alphas is not None:
+            alphas = np.clip(alphas, 0, ub)
 
-        if self.optimizer == SMOClassifier:
+        # the products of a float32 Hessian are computed in float32
+        self.obj = dual = Quadratic(Q if Q.dtype == np.float64 else LowPrecisionHessian(Q), q)
 
-            self.optimizer = SMOClassifier(self.obj, X, y, K, self.kernel, self.C,
-                                           self.tol, self.verbose).minimize()
-            alphas = self.optimizer.alphas
-            if isinstance(self.kernel, LinearKernel):
-                self.coef_ = self.optimizer.w
-            self.intercept_ = self.optimizer.b
-
-        elif isinstance(self.optimizer, str):
+        if isinstance(self.optimizer, str):
 
             lb = np.zeros(n_samples)  # lower bounds
             alphas = solve_qp(P=Q,
@@ -538,6 +1313,7 @@ class DualSVC(ClassifierMixin, DualSVM):
                               lb=lb,
                               ub=ub,
                               solver=self.optimizer,
+                              initvals=alphas,
                               verbose=self.verbose)
 
             if self.verbose:
@@ -549,6 +1325,7 @@ class DualSVC(ClassifierMixin, DualSVM):
 
                 self.optimizer = self.optimizer(f=self.obj,
                                                 ub=ub,
+                                                x=alphas,
                                                 max_iter=self.max_iter,
                                                 verbose=self.verbose).minimize()
 
@@ -580,32 +1357,182 @@ class DualSVC(ClassifierMixin, DualSVM):
             alphas = self.optimizer.x
 
         sv = alphas > 1e-5
-        self.support_ = np.arange(len(alphas))[sv]
-        self.support_vectors_, self.sv_y, self.alphas = X[sv], y[sv], alphas[sv]
+        self.support_ = np.flatnonzero(sv)
+        self.support_vectors_, self.sv_y, self.alphas = _support_vectors(X, sv), y[sv], alphas[sv]
         self.dual_coef_ = self.alphas * self.sv_y
 
-        if self.optimizer != SMOClassifier:
+        if isinstance(self.kernel, LinearKernel):
+            self.coef_ = np.dot(self.dual_coef_, self.support_vectors_)
 
-            if isinstance(self.kernel, LinearKernel):
-                self.coef_ = np.dot(self.dual_coef_, self.support_vectors_)
+        # y_i - sum_j alphas_j y_j K_ij = -y_i (Q alphas - 1)_i, i.e., the intercept is averaged over the free
+        # support vectors from the gradient of the dual problem, since the kernel matrix may be overwritten
+        free = _free_support(alphas, self.C)
+        self.intercept_ = np.mean(-y[free] * dual.jacobian(alphas)[free])
 
-            for n in range(len(self.alphas)):
-                self.intercept_ += self.sv_y[n]
-                self.intercept_ -= np.sum(self.dual_coef_ * K[self.support_[n], sv])
-            self.intercept_ /= len(self.alphas)
+        return alphas
+
+    def _store_smo_solution(self):
+        smo = self.optimizer
+        if isinstance(self.kernel, LinearKernel):
+            self.coef_ = smo.w
+        self.intercept_ = smo.b
+
+        sv = smo.alphas > 1e-5
+        self.support_ = np.flatnonzero(sv)
+        self.support_vectors_, self.sv_y, self.alphas = _support_vectors(smo.X, sv), smo.y[sv], smo.alphas[sv]
+        self.dual_coef_ = self.alphas * self.sv_y
+
+        return smo.alphas
+
+    def _incremental_smo(self):
+        if not isinstance(self.optimizer, SMOClassifier):
+            raise ValueError('incremental updates are only supported by a binary DualSVC fitted by SMO')
+        return self.optimizer
+
+    def partial_fit(self, X, y):
+        """
+        Add the examples ``X`` to the training set and update the model
+        incrementally, i.e., SMO is restarted from the current multipliers,
+        the new ones being null, over the new examples and the free support
+        vectors only, reusing their cached errors and kernel rows, so that
+        only the kernel rows between the new examples and the support
+        vectors are computed. The kernel hyperparameters resolved at fit,
+        e.g., gamma='scale', are kept. The model must be fitted by SMO over
+        two labels, otherwise it is fitted from scratch over ``X`` if it is
+        not fitted yet.
+
+        :param X: [m x d] data matrix of the new examples or, if the kernel
+                  is precomputed, [m x (n + m)] kernel matrix between them and
+                  the old and the new training examples, in this order.
+        :param y: [m] target vector of the new examples.
+        :return:  self
+        """
+        if not hasattr(self, 'support_') and not hasattr(self, 'primal_'):
+            return self.fit(X, y)
+
+        smo = self._incremental_smo()
+
+        if not np.isin(y, self.lb.classes_).all():
+            raise ValueError('y contains labels not seen in fit')
+        y = np.append(smo.y, self.lb.transform(y).ravel())
+
+        n_samples = len(smo.y)
+        if isinstance(self.kernel, str):  # precomputed
+            X = K = np.block([[smo.K, X[:, :n_samples].T], [X]])
+        elif isinstance(smo.K, KernelRowCache):
+            K = smo.K.append(X)
+            X = K.X
+        else:  # cached kernel matrix
+            K = np.block([[smo.K, self.kernel(smo.X, X)], [self.kernel(X, smo.X), self.kernel(X)]])
+            X = np.concatenate((smo.X, X))
+
+        self._minimize_smo(smo.add_samples(X, y, K), resume=False)
+        self._store_smo_solution()
 
         return self
 
-    def decision_function(self, X):
-        if not isinstance(self.kernel, LinearKernel):
-            return np.dot(self.dual_coef_, self.kernel(self.support_vectors_, X)) + self.intercept_
-        return np.dot(X, self.coef_) + self.intercept_
+    def remove_samples(self, idx):
+        """
+        Remove the training examples with index ``idx`` and update the model
+        decrementally, i.e., the removed multipliers are moved onto the other
+        ones of the same class, or taken from the ones of the other class, to
+        restore the equality constraint and SMO is restarted from them over
+        the changed multipliers and the free support vectors only. The model
+        must be fitted by SMO over two labels. Note that the indices of the
+        following training examples, e.g., in ``support_``, are shifted, as
+        well as the columns of the precomputed kernel matrix, if so, given
+        to ``predict``.
+
+        :param idx: the indices of the removed training examples, which must
+                    leave at least one training example of each label.
+        :return:    self
+        """
+        smo = self._incremental_smo()
+
+        n_samples = len(smo.y)
+        idx = np.unique(np.asarray(idx, dtype=int))
+        if idx.size and (idx[0] < 0 or idx[-1] >= n_samples):
+            raise ValueError(f'idx must be in [0, {n_samples}), i.e., the indices of the training examples')
+
+        keep = np.ones(n_samples, dtype=bool)
+        keep[idx] = False
+        if not np.any(keep):
+            raise ValueError('the removal would leave no training examples')
+        if len(np.unique(smo.y[keep])) < 2:
+            raise ValueError('the removal would leave the training examples of a single label')
+
+        if isinstance(smo.K, KernelRowCache):
+            K = smo.K.remove(idx)
+            X = K.X
+        else:  # precomputed or cached kernel matrix
+            K = smo.K[np.ix_(keep, keep)]
+            X = K if isinstance(self.kernel, str) else smo.X[keep]
+
+        self._minimize_smo(smo.remove_samples(idx, X, smo.y[keep], K), resume=False)
+        self._store_smo_solution()
+
+        return self
 
-    def predict(self, X):
+    def loo_decision_function(self):
+        """
+        Compute the exact leave-one-out decision function of the training
+        examples, i.e., the decision function of each example by the model
+        fitted over all the other ones, without refitting it n times: since
+        the model does not change when an example which is not a support
+        vector is removed, only each support vector is removed from a copy
+        of SMO, as in ``remove_samples``, sharing the kernel rows. The model
+        must be fitted by SMO over two labels.
+
+        :return: the [n] leave-one-out decision function.
+        """
+        smo = self._incremental_smo()
+
+        n_samples = len(smo.y)
+        f = smo._kernel_expansion(smo.alphas * smo.y, np.arange(n_samples)) + smo.b
+
+        for i in np.flatnonzero(smo.alphas):
+            idx = np.delete(np.arange(n_samples), i)
+            K = _KernelRowsSubset(smo.K, idx)
+            X = K if isinstance(self.kernel, str) else smo.X[idx]
+            # remove_samples replaces the arrays of the copy, so the
+            # state of the fitted SMO is left untouched
+            loo = copy(smo).remove_samples(i, X, smo.y[idx], K)
+            self._minimize_smo(loo, resume=False)
+            f[i] = np.dot(loo.alphas * loo.y, smo.K[i][idx]) + loo.b
+
+        return f
+
+    def decision_function(self, X, batch_size=None, n_jobs=None, out=None):
+        if batch_size is not None or out is not None:
+            return predict_in_batches(self.decision_function, X, batch_size, n_jobs, out)
+        if self.approximation is not None:
+            return self.primal_.decision_function(self.feature_map_.transform(X))
+        if not isinstance(self.kernel, LinearKernel):
+            scores = self._dual_decision_function(X).T + self.intercept_
+        else:
+            scores = np.dot(X, self.coef_.T) + self.intercept_
+        if self.multi_class == 'ovo' and len(self.lb.classes_) > 2:
+            return _ovo_decision_function(scores, len(self.lb.classes_))
+        return scores
+
+    def predict(self, X, batch_size=None, n_jobs=None, out=None):
+        if batch_size is not None or out is not None:
+            return predict_in_batches(self.predict, X, batch_size, n_jobs, out)
         return self.lb.inverse_transform(self.decision_function(X))
 
 
 class PrimalSVR(RegressorMixin, LinearModel, PrimalSVM):
+    """
+
+    Parameters
+    ----------
+
+    shrinking : bool, default=True
+        Whether to use the shrinking heuristic when the ``optimizer`` is
+        `DCDRegression`, i.e., to stop visiting the coordinates which have
+        been at the bounds and optimal in the last outer iteration until
+        the optimality over the other ones is attained.
+    """
 
     def __init__(self,
                  C=1.,
@@ -625,6 +1552,7 @@ class PrimalSVR(RegressorMixin, LinearModel, PrimalSVM):
                  fit_intercept=True,
                  master_solver='ecos',
                  master_verbose=False,
+                 shrinking=True,
                  shuffle=True,
                  random_state=None,
                  verbose=False):
@@ -644,11 +1572,17 @@ class PrimalSVR(RegressorMixin, LinearModel, PrimalSVM):
                          fit_intercept=fit_intercept,
                          master_solver=master_solver,
                          master_verbose=master_verbose,
+                         shrinking=shrinking,
                          shuffle=shuffle,
                          random_state=random_state,
                          verbose=verbose)
         if not issubclass(loss, SVRLoss):
             raise TypeError(f'{loss} is not an allowed LinearSVR loss function')
+        if issubclass(optimizer, DCD) and not issubclass(optimizer, DCDRegression):
+            raise TypeError(f'{optimizer} is not an allowed optimization method')
+        if issubclass(optimizer, TrustRegionNewton) and not issubclass(loss, SquaredEpsilonInsensitive):
+            raise TypeError(f'{optimizer} needs a twice differentiable loss function, '
+                            'i.e., the squared epsilon-insensitive')
         if not epsilon >= 0:
             raise ValueError('epsilon must be >= 0')
         self.epsilon = epsilon
@@ -715,6 +1649,48 @@ class PrimalSVR(RegressorMixin, LinearModel, PrimalSVM):
 
             self._unpack(self.optimizer.x)
 
+        elif issubclass(self.optimizer, TrustRegionNewton):
+
+            if self.fit_intercept:
+                X_biased = np.c_[X, np.ones_like(y)]
+            else:
+                X_biased = X
+
+            self.loss = self.loss(self, X_biased, y, self.epsilon)
+            self.optimizer = self.optimizer(f=self.loss,
+                                            x=np.zeros(self.loss.ndim),
+                                            eps=self.tol,
+                                            max_iter=self.max_iter,
+                                            verbose=self.verbose).minimize()
+
+            if self.optimizer.status == 'stopped':
+                warnings.warn('max_iter reached but the optimization has not converged yet', ConvergenceWarning)
+
+            self._unpack(self.optimizer.x)
+
+        elif issubclass(self.optimizer, DCD):
+
+            if self.fit_intercept:
+                X_biased = _biased(X)
+            else:
+                X_biased = X
+
+            self.loss = self.loss(self, X_biased, y, self.epsilon)
+            self.optimizer = self.optimizer(X_biased, y, self.loss,
+                                            C=self.C,
+                                            epsilon=self.epsilon,
+                                            tol=self.tol,
+                                            shrinking=self.shrinking,
+                                            max_iter=self.max_iter,
+                                            shuffle=self.shuffle,
+                                            random_state=self.random_state,
+                                            verbose=self.verbose).minimize()
+
+            if self.optimizer.status == 'stopped':
+                warnings.warn('max_iter reached but the optimization has not converged yet', ConvergenceWarning)
+
+            self._unpack(self.optimizer.w)
+
         elif issubclass(self.optimizer, StochasticOptimizer):
 
             if self.validation_split:
@@ -754,8 +1730,10 @@ class PrimalSVR(RegressorMixin, LinearModel, PrimalSVM):
 
         return self
 
-    def predict(self, X):
-        return np.dot(X, self.coef_) + self.intercept_
+    def predict(self, X, batch_size=None, n_jobs=None, out=None):
+        if batch_size is not None or out is not None:
+            return predict_in_batches(self.predict, X, batch_size, n_jobs, out)
+        return safe_sparse_dot(X, self.coef_) + self.intercept_
 
 
 class DualSVR(RegressorMixin, DualSVM):
@@ -774,6 +1752,18 @@ class DualSVR(RegressorMixin, DualSVM):
                  max_f_eval=15000,
                  master_solver='ecos',
                  master_verbose=False,
+                 max_tile_bytes=None,
+                 n_jobs=None,
+                 memmap_dir=None,
+                 dtype=np.float64,
+                 cache_size=200,
+                 working_set='first_order',
+                 shrinking=True,
+                 max_time=None,
+                 checkpoint=None,
+                 kernel_cache=None,
+                 approximation=None,
+                 n_components=100,
                  shuffle=True,
                  random_state=None,
                  verbose=False):
@@ -789,6 +1779,18 @@ class DualSVR(RegressorMixin, DualSVM):
                          max_f_eval=max_f_eval,
                          master_solver=master_solver,
                          master_verbose=master_verbose,
+                         max_tile_bytes=max_tile_bytes,
+                         n_jobs=n_jobs,
+                         memmap_dir=memmap_dir,
+                         dtype=dtype,
+                         cache_size=cache_size,
+                         working_set=working_set,
+                         shrinking=shrinking,
+                         max_time=max_time,
+                         checkpoint=checkpoint,
+                         kernel_cache=kernel_cache,
+                         approximation=approximation,
+                         n_components=n_components,
                          shuffle=shuffle,
                          random_state=random_state,
                          verbose=verbose)
@@ -796,112 +1798,137 @@ class DualSVR(RegressorMixin, DualSVM):
             raise ValueError('epsilon must be >= 0')
         self.epsilon = epsilon
 
-    def fit(self, X, y):
+    def _validate_targets(self, y):
         targets = y.shape[1] if y.ndim > 1 else 1
         if targets > 1:
             raise ValueError('use sklearn.multioutput.MultiOutputRegressor '
                              'to train a model over more than one target')
+        return y
 
-        n_samples = len(y)
-
-        # kernel matrix
-        K = self.kernel(X)
+    def _fit_primal(self, X, y):
+        # train a linear regressor over the explicit feature map
+        return PrimalSVR(epsilon=self.epsilon,
+                         optimizer=self._primal_optimizer(AdaGrad),
+                         **self._primal_params()).fit(X, y)
 
-        Q = np.vstack((np.hstack((K, -K)),
-                       np.hstack((-K, K))))
-        q = np.hstack((-y, y)) + self.epsilon
-
-        ub = np.ones(2 * n_samples) * self.C  # upper bounds
+    def _dual_matrices(self, X, y):
+        if self.optimizer == SMORegression:
+            return self._smo_kernel_matrix(X), None
+        # the Hessian [[K, -K], [-K, K]] + A A^T is kept implicit
+        # by K and A, i.e., it is never built as a [2n x 2n] matrix
+        return self._kernel_matrix(X), None
 
-        self.obj = Quadratic(Q, q)
+    def _fit_dual(self, X, y, K, Q=None, alphas=None):
+        n_samples = len(y)
 
         if self.optimizer == SMORegression:
 
-            self.optimizer = SMORegression(self.obj, X, y, K, self.kernel, self.C,
-                                           self.epsilon, self.tol, self.verbose).minimize()
+            smo = SMORegression(None, X, y, K, self.kernel, self.C, self.epsilon, self.tol, self.working_set,
+                                self.shrinking, self.max_iter, self.max_time, self.verbose)
+            if alphas is not None:
+                smo.warm_start(*np.split(alphas, 2))
+            self.optimizer = self._minimize_smo(smo)
             alphas_p, alphas_n = self.optimizer.alphas_p, self.optimizer.alphas_n
             if isinstance(self.kernel, LinearKernel):
                 self.coef_ = self.optimizer.w
             self.intercept_ = self.optimizer.b
 
-        else:
+            sv = np.logical_or(alphas_p > 1e-5, alphas_n > 1e-5)
+            self.support_ = np.flatnonzero(sv)
+            self.support_vectors_ = _support_vectors(X, sv)
+            self.sv_y, self.alphas_p, self.alphas_n = y[sv], alphas_p[sv], alphas_n[sv]
+            self.dual_coef_ = self.alphas_p - self.alphas_n
 
-            A = np.hstack((np.ones(n_samples), -np.ones(n_samples)))  # equality matrix
+            return np.hstack((alphas_p, alphas_n))
 
-            Q += np.outer(A, A)
-            self.obj = Quadratic(Q, q)
+        q = np.hstack((-y, y)) + self.epsilon
 
-            if isinstance(self.optimizer, str):
+        ub = np.ones(2 * n_samples) * self.C  # upper bounds
 
-                lb = np.zeros(2 * n_samples)  # lower bounds
+        if alphas is not None:
+            alphas = np.clip(alphas, 0, ub)
 
-                alphas = solve_qp(P=Q,
-                                  q=q,
-                                  lb=lb,
-                                  ub=ub,
-                                  solver=self.optimizer,
-                                  verbose=self.verbose)
+        A = np.hstack((np.ones(n_samples), -np.ones(n_samples)))  # equality matrix
 
-                if self.verbose:
-                    print()
+        self.obj = dual = BlockQuadratic(K, A, q)
 
-            else:
+        if isinstance(self.optimizer, str):
+
+            lb = np.zeros(2 * n_samples)  # lower bounds
 
-                if issubclass(self.optimizer, BoxConstrainedQuadraticOptimizer):
+            # the qpsolvers backends need the explicit Hessian
+            alphas = solve_qp(P=self.obj.Q.toarray(),
+                              q=q,
+                              lb=lb,
+                              ub=ub,
+                              solver=self.optimizer,
+                              initvals=alphas,
+                              verbose=self.verbose)
+
+            if self.verbose:
+                print()
+
+        else:
 
-                    self.optimizer = self.optimizer(f=self.obj,
-                                                    ub=ub,
-                                                    max_iter=self.max_iter,
-                                                    verbose=self.verbose).minimize()
+            if issubclass(self.optimizer, BoxConstrainedQuadraticOptimizer):
+
+                self.optimizer = self.optimizer(f=self.obj,
+                                                ub=ub,
+                                                x=alphas,
+                                                max_iter=self.max_iter,
+                                                verbose=self.verbose).minimize()
 
-                elif issubclass(self.optimizer, Optimizer):
+            elif issubclass(self.optimizer, Optimizer):
 
-                    self.obj = LagrangianBoxConstrainedQuadratic(self.obj, ub)
-                    self.optimizer = LagrangianDual(f=self.obj,
-                                                    optimizer=self.optimizer,
-                                                    step_size=self.learning_rate,
-                                                    momentum_type=self.momentum_type,
-                                                    momentum=self.momentum,
-                                                    batch_size=self.batch_size,
-                                                    max_iter=self.max_iter,
-                                                    max_f_eval=self.max_f_eval,
-                                                    shuffle=self.shuffle,
-                                                    random_state=self.random_state,
-                                                    verbose=self.verbose).minimize()
+                self.obj = LagrangianBoxConstrainedQuadratic(self.obj, ub)
+                self.optimizer = LagrangianDual(f=self.obj,
+                                                optimizer=self.optimizer,
+                                                step_size=self.learning_rate,
+                                                momentum_type=self.momentum_type,
+                                                momentum=self.momentum,
+                                                batch_size=self.batch_size,
+                                                max_iter=self.max_iter,
+                                                max_f_eval=self.max_f_eval,
+                                                shuffle=self.shuffle,
+                                                random_state=self.random_state,
+                                                verbose=self.verbose).minimize()
 
-                    if not isinstance(self.optimizer, StochasticOptimizer):
+                if not isinstance(self.optimizer, StochasticOptimizer):
 
-                        if self.optimizer.status == 'stopped':
-                            if self.optimizer.iter >= self.max_iter:
-                                warnings.warn('max_iter reached but the optimization has not converged yet',
-                                              ConvergenceWarning)
-                            elif self.optimizer.f_eval >= self.max_f_eval:
-                                warnings.warn('max_f_eval reached but the optimization has not converged yet',
-                                              ConvergenceWarning)
+                    if self.optimizer.status == 'stopped':
+                        if self.optimizer.iter >= self.max_iter:
+                            warnings.warn('max_iter reached but the optimization has not converged yet',
+                                          ConvergenceWarning)
+                        elif self.optimizer.f_eval >= self.max_f_eval:
+                            warnings.warn('max_f_eval reached but the optimization has not converged yet',
+                                          ConvergenceWarning)
 
-                alphas = self.optimizer.x
+            alphas = self.optimizer.x
 
-            alphas_p, alphas_n = np.split(alphas, 2)
+        alphas_p, alphas_n = np.split(alphas, 2)
 
         sv = np.logical_or(alphas_p > 1e-5, alphas_n > 1e-5)
-        self.support_ = np.arange(len(alphas_p))[sv]
-        self.support_vectors_, self.sv_y, self.alphas_p, self.alphas_n = X[sv], y[sv], alphas_p[sv], alphas_n[sv]
+        self.support_ = np.flatnonzero(sv)
+        self.support_vectors_ = _support_vectors(X, sv)
+        self.sv_y, self.alphas_p, self.alphas_n = y[sv], alphas_p[sv], alphas_n[sv]
         self.dual_coef_ = self.alphas_p - self.alphas_n
 
-        if self.optimizer != SMORegression:
-
-            if isinstance(self.kernel, LinearKernel):
-                self.coef_ = np.dot(self.dual_coef_, self.support_vectors_)
+        if isinstance(self.kernel, LinearKernel):
+            self.coef_ = np.dot(self.dual_coef_, self.support_vectors_)
 
-            for n in range(len(self.alphas_p)):
-                self.intercept_ += self.sv_y[n]
-                self.intercept_ -= np.sum(self.dual_coef_ * K[self.support_[n], sv])
-            self.intercept_ -= self.epsilon
-            self.intercept_ /= len(self.alphas_p)
+        # y_i - sum_j (alphas_p_j - alphas_n_j) K_ij -/+ epsilon = a^T alphas -/+ g_i, where g is the gradient of
+        # the dual problem and a^T alphas is the bias regularized by its Hessian, so the free support vectors
+        # only recover the latter, i.e., the intercept is averaged over all the support vectors instead
+        g_p, g_n = np.split(dual.jacobian(alphas), 2)
+        self.intercept_ = np.mean(A.dot(alphas) + np.where(self.dual_coef_ > 0, -g_p[sv], g_n[sv]))
 
-        return self
+        return alphas
 
-    def predict(self, X):
+    def predict(self, X, batch_size=None, n_jobs=None, out=None):
+        if batch_size is not None or out is not None:
+            return predict_in_batches(self.predict, X, batch_size, n_jobs, out)
+        if self.approximation is not None:
+            return self.primal_.predict(self.feature_map_.transform(X))
         if not isinstance(self.kernel, LinearKernel):
-            return np.dot(self.dual_coef_, self.kernel(self.support_vectors_, X)) + self.intercept_
+            return self._dual_decision_function(X) + self.intercept_
         return np.dot(X, self.coef_) + self.intercept_
@@ -0,0 +1,221 @@
+import warnings
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.exceptions import ConvergenceWarning
+
+from ._base import DualSVC, _support_vectors
+from .kernels import gaussian, LinearKernel
+from .smo import SMOClassifier
+
+
+def _fit_node(estimator, X, y, alphas):
+    """
+    Fit the binary DualSVC ``estimator`` over a node of the cascade,
+    warm-started from ``alphas``, and return its multipliers and intercept.
+    """
+    return estimator._fit_dual(X, y, *estimator._dual_matrices(X, y), alphas), estimator.intercept_
+
+
+def _expand(idx, alphas, node):
+    """
+    Return the multipliers over the sorted indices ``node`` given
+    the ``alphas`` of its subset ``idx`` and zero elsewhere.
+    """
+    expanded = np.zeros(len(node))
+    expanded[np.searchsorted(node, idx)] = alphas
+    return expanded
+
+
+class CascadeSVC(DualSVC):
+    """
+    Cascade SVM for binary classification, i.e., the training examples are
+    split into ``n_shards`` shards, the sub-SVMs of which are trained in
+    parallel, and the support vectors of each pair of them are merged and
+    trained again, layer by layer, up to a single SVM. Its support vectors
+    are fed back to each shard until they do not change anymore, i.e., the
+    solution of the whole problem is reached, or ``max_passes`` passes.
+
+    Each sub-SVM is a DualSVC with the same parameters, and it is warm-started
+    from the multipliers of the sub-SVMs it is fed with. The sub-SVMs of each
+    layer are trained by joblib over ``n_jobs`` worker processes, each one
+    computing the kernel over its own examples only. Since each pass trains
+    every shard together with all the support vectors of the last one, the
+    cascade pays off only when they are a small fraction of the examples.
+
+    Parameters
+    ----------
+
+    n_shards : int, default=8
+        The number of shards, i.e., of the sub-SVMs of the first layer, at
+        most the number of examples of the least frequent class, since each
+        shard holds the examples of both the classes.
+
+    max_passes : int, default=10
+        The maximum number of passes through the cascade.
+
+    n_jobs : int, default=None
+        The number of worker processes used to train the sub-SVMs of each
+        layer. ``None`` means 1 and ``-1`` means using all the processors.
+
+    random_state : int, default=None
+        Controls the random split of the training examples into the shards.
+
+    Attributes
+    ----------
+
+    n_passes_ : int
+        The number of passes through the cascade.
+
+    References
+
+    H.P. Graf, E. Cosatto, L. Bottou, I. Durdanovic, V. Vapnik. Parallel Support
+    Vector Machines: The Cascade SVM. Advances in Neural Information Processing
+    Systems 17, 2005.
+    """
+
+    def __init__(self,
+                 kernel=gaussian,
+                 C=1.,
+                 tol=1e-3,
+                 optimizer=SMOClassifier,
+                 max_iter=1000,
+                 learning_rate=0.1,
+                 momentum_type='none',
+                 momentum=0.9,
+                 batch_size=None,
+                 max_f_eval=15000,
+                 master_solver='ecos',
+                 master_verbose=False,
+                 max_tile_bytes=None,
+                 n_jobs=None,
+                 memmap_dir=None,
+                 dtype=np.float64,
+                 cache_size=200,
+                 working_set='first_order',
+                 shrinking=True,
+                 max_time=None,
+                 n_shards=8,
+                 max_passes=10,
+                 shuffle=True,
+                 random_state=None,
+                 verbose=False):
+        super().__init__(kernel=kernel,
+                         C=C,
+                         tol=tol,
+                         optimizer=optimizer,
+                         max_iter=max_iter,
+                         learning_rate=learning_rate,
+                         momentum_type=momentum_type,
+                         momentum=momentum,
+                         batch_size=batch_size,
+                         max_f_eval=max_f_eval,
+                         master_solver=master_solver,
+                         master_verbose=master_verbose,
+                         max_tile_bytes=max_tile_bytes,
+                         n_jobs=n_jobs,
+                         memmap_dir=memmap_dir,
+                         dtype=dtype,
+                         cache_size=cache_size,
+                         working_set=working_set,
+                         shrinking=shrinking,
+                         max_time=max_time,
+                         shuffle=shuffle,
+                         random_state=random_state,
+                         verbose=verbose)
+        if not n_shards > 0:
+            raise ValueError('n_shards must be > 0')
+        self.n_shards = n_shards
+        if not max_passes > 0:
+            raise ValueError('max_passes must be > 0')
+        self.max_passes = max_passes
+
+    def _subset(self, X, idx):
+        if isinstance(self.kernel, str):  # precomputed
+            return X[np.ix_(idx, idx)]
+        return X[idx]
+
+    def _node(self):
+        # the sub-SVMs are already trained in parallel, so each one runs in
+        # a single worker instead of oversubscribing the processors
+        node = DualSVC(**{param: value for param, value in self.get_params(deep=False).items()
+                          if param not in ('n_shards', 'max_passes', 'n_jobs')}, n_jobs=1)
+        # the sub-SVMs share the kernel fitted over all the examples
+        node.kernel = self.kernel
+        return node
+
+    def fit(self, X, y):
+        y = self._validate_targets(y)
+
+        self._fit_kernel(X)
+
+        # the split is stratified, i.e., the permuted examples of each class are dealt across
+        # the shards, so that each one holds both the classes and a sub-SVM can be trained over it
+        rs = np.random.RandomState(self.random_state)
+        n_shards = min(self.n_shards, np.min(np.bincount(y > 0)))
+        shards = [np.concatenate(shard) for shard in zip(*(np.array_split(rs.permutation(np.flatnonzero(y == label)),
+                                                                          n_shards) for label in (-1, 1)))]
+
+        # the support vectors of the last pass and their multipliers
+        sv, sv_alphas = np.zeros(0, dtype=int), np.zeros(0)
+
+        with Parallel(n_jobs=self.n_jobs) as parallel:
+
+            for self.n_passes_ in range(1, self.max_passes + 1):
+
+                # feed the support vectors of the last pass to each shard
+                nodes = [np.union1d(shard, sv) for shard in shards]
+                alphas = [_expand(sv, sv_alphas, node) if len(sv) else None for node in nodes]
+
+                while True:
+                    results = parallel(delayed(_fit_node)(self._node(), self._subset(X, node), y[node], node_alphas)
+                                       for node, node_alphas in zip(nodes, alphas))
+
+                    # keep the support vectors of each sub-SVM
+                    svs = [(node[node_alphas > 1e-5], node_alphas[node_alphas > 1e-5])
+                           for node, (node_alphas, _) in zip(nodes, results)]
+
+                    if len(svs) == 1:
+                        break
+
+                    # merge the support vectors of each pair of sub-SVMs
+                    nodes, alphas = [], []
+                    for pair in (svs[i:i + 2] for i in range(0, len(svs), 2)):
+                        node = np.union1d(pair[0][0], pair[-1][0])
+                        node_alphas = sum(_expand(idx, idx_alphas, node) for idx, idx_alphas in pair)
+                        # the sub-SVMs of the first layer share the support vectors fed back,
+                        # so their mean is taken to keep the equality constraint satisfied
+                        if len(pair) > 1 and len(node) < len(pair[0][0]) + len(pair[1][0]):
+                            node_alphas /= 2
+                        nodes.append(node)
+                        alphas.append(node_alphas)
+
+                last_sv, (sv, sv_alphas) = sv, svs[0]
+                self._store_support(X, y, sv, sv_alphas, results[0][1])
+
+                # the solution of the whole problem is reached when none of the
+                # other examples violates its margin wrt the last SVM, or when
+                # the support vectors do not change anymore
+                others = np.ones(len(y), dtype=bool)
+                others[sv] = False
+                n_violators = np.count_nonzero(y[others] * self.decision_function(X[others]) < 1 - 2 * self.tol)
+
+                if self.verbose:
+                    print(f'pass {self.n_passes_}: {len(sv)} support vectors, {n_violators} violators')
+
+                if n_violators == 0 or np.array_equal(sv, last_sv):
+                    break
+
+            else:
+                warnings.warn('max_passes reached but the support vectors have not stabilized yet',
+                              ConvergenceWarning)
+
+        return self
+
+    def _store_support(self, X, y, sv, alphas, intercept):
+        self.support_ = sv
+        self.support_vectors_, self.sv_y, self.alphas = _support_vectors(X, sv), y[sv], alphas
+        self.dual_coef_ = self.alphas * self.sv_y
+        self.intercept_ = intercept
+        if isinstance(self.kernel, LinearKernel):
+            self.coef_ = np.dot(self.dual_coef_, self.support_vectors_)
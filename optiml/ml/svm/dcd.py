@@ -0,0 +1,311 @@
+from abc import ABC
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.linalg.blas import ddot, daxpy
+
+from .losses import SquaredHinge, SquaredEpsilonInsensitive
+
+
+class DCD(ABC):
+    """
+    Base class for the dual coordinate descent algorithms, which train a
+    linear SVM by minimizing the box constrained dual problem one coordinate
+    at a time while keeping the weight vector ``w``, i.e., the primal
+    solution, explicitly, so that each coordinate step costs O(nnz(x_i)).
+
+    The data matrix ``X`` can be either a dense array or a scipy sparse
+    matrix, which is converted to the CSR format.
+
+    At each outer iteration, i.e., ``iter``, the coordinates of the active
+    set are visited in random order, if ``shuffle`` is True. If ``shrinking``
+    is True, the coordinates at the bounds whose projected gradient is
+    beyond the extreme ones of the previous outer iteration, i.e., which are
+    unlikely to move, are removed from the active set until the optimality
+    over it is attained, then the whole set is restored and checked, as
+    in liblinear.
+
+    The optimization stops, with ``status`` 'stopped' instead of 'optimal',
+    after ``max_iter`` outer iterations.
+
+    References
+
+    C.J. Hsieh, K.W. Chang, C.J. Lin, S.S. Keerthi, S. Sundararajan. A Dual
+    Coordinate Descent Method for Large-scale Linear SVM. ICML 2008.
+
+    R.E. Fan, K.W. Chang, C.J. Hsieh, X.R. Wang, C.J. Lin. LIBLINEAR: A Library
+    for Large Linear Classification. JMLR 9, 2008.
+    """
+
+    def __init__(self, X, y, C=1., tol=1e-3, shrinking=True, max_iter=1000,
+                 shuffle=True, random_state=None, verbose=False):
+        if not max_iter > 0:
+            raise ValueError('max_iter must be > 0')
+        if sp.issparse(X):
+            X = sp.csr_matrix(X, dtype=float)
+            self.X_sq = np.asarray(X.multiply(X).sum(axis=1)).ravel()
+        else:
+            X = np.ascontiguousarray(X, dtype=float)
+            self.X_sq = np.einsum('ij,ij->i', X, X)
+        self.X = X
+        self.y = y
+        # the rows are accessed by index in the inner loop, so the
+        # scalars are read as Python floats, which are faster
+        self._y = y.tolist()
+        self.w = np.zeros(X.shape[1])
+        self.C = C
+        self.tol = tol
+        self.shrinking = shrinking
+        self.max_iter = max_iter
+        self.shuffle = shuffle
+        self.random_state = np.random.RandomState(random_state)
+        self.iter = 0
+        self.status = 'unknown'
+        self.verbose = verbose
+
+    def _row_ops(self):
+        """
+        Return the functions which, given the index i, compute x_i^T w and
+        w += a x_i in O(nnz(x_i)), i.e., by BLAS over the dense rows or over
+        the nonzero entries of the sparse ones.
+        """
+        X, w = self.X, self.w
+        if sp.issparse(X):
+            indptr, indices, data = X.indptr.tolist(), X.indices, X.data
+
+            def dot(i):
+                start, end = indptr[i], indptr[i + 1]
+                return float(data[start:end].dot(w[indices[start:end]]))
+
+            def axpy(a, i):
+                start, end = indptr[i], indptr[i + 1]
+                w[indices[start:end]] += a * data[start:end]
+
+            return dot, axpy
+
+        return (lambda i: ddot(X[i], w)), (lambda a, i: daxpy(X[i], w, a=a))
+
+    def _sweep(self, active, PG_max, PG_min):
+        """
+        Minimize the dual problem wrt each coordinate in ``active`` in turn
+        and return their projected gradients and the mask of the shrunk ones,
+        i.e., the ones at a bound whose projected gradient is beyond ``PG_max``
+        or ``PG_min``, i.e., the extreme ones of the previous outer iteration,
+        whose projected gradients are not returned.
+        """
+        raise NotImplementedError
+
+    def _shrinking_bounds(self, PG):
+        """
+        Return the extreme projected gradients ``PG`` of the active
+        coordinates used to shrink them in the next outer iteration.
+        """
+        return PG.max(initial=-np.inf), PG.min(initial=np.inf)
+
+    def _converged(self, PG):
+        """
+        Return True if the projected gradients ``PG`` of
+        the active coordinates satisfy the stopping criterion.
+        """
+        raise NotImplementedError
+
+    def _dual_objective(self):
+        raise NotImplementedError
+
+    def minimize(self):
+        if self.verbose:
+            print('iter\t cost')
+
+        n_samples = self.X.shape[0]
+        active = np.arange(n_samples)
+        PG_max, PG_min = np.inf, -np.inf
+
+        while self.iter < self.max_iter:
+            if self.shuffle:
+                self.random_state.shuffle(active)
+
+            PG, shrunk = self._sweep(active, PG_max, PG_min)
+
+            if self.verbose and not self.iter % self.verbose:
+                print('{:4d}\t{: 1.4e}'.format(self.iter, self._dual_objective()))
+
+            self.iter += 1
+
+            if self._converged(PG):
+                if len(active) == n_samples:
+                    self.status = 'optimal'
+                    break
+                # check the optimality over the shrunk coordinates
+                # too and, if it is violated, go on over all
+                active = np.arange(n_samples)
+                PG_max, PG_min = np.inf, -np.inf
+                continue
+
+            active = active[~shrunk]
+            PG_max, PG_min = self._shrinking_bounds(PG)
+        else:
+            self.status = 'stopped'
+
+        if self.verbose:
+            print()
+
+        return self
+
+
+class DCDClassifier(DCD):
+    """
+    Implements the dual coordinate descent algorithm by Hsieh et al. for
+    training a linear support vector classifier with the hinge loss, i.e.,
+    0 <= alphas_i <= C, or the squared hinge loss, i.e., 0 <= alphas_i with
+    the diagonal 1 / (2 C) added to the Hessian matrix of the dual problem.
+    """
+
+    def __init__(self, X, y, loss, C=1., tol=1e-3, shrinking=True, max_iter=1000,
+                 shuffle=True, random_state=None, verbose=False):
+        super().__init__(X, y, C, tol, shrinking, max_iter, shuffle, random_state, verbose)
+        if isinstance(loss, SquaredHinge):
+            self.ub, self.D = np.inf, 0.5 / C
+        else:  # hinge
+            self.ub, self.D = C, 0.
+        self.alphas = np.zeros(len(y))
+        self._Q_diag = (self.X_sq + self.D).tolist()
+
+    def _sweep(self, active, PG_max, PG_min):
+        alphas, y, Q_diag = self.alphas, self._y, self._Q_diag
+        dot, axpy = self._row_ops()
+        ub, D, shrinking = self.ub, self.D, self.shrinking
+
+        PG = np.zeros(len(active))
+        shrunk = np.zeros(len(active), dtype=bool)
+        for s, i in enumerate(active.tolist()):
+            y_i, alpha_i = y[i], alphas.item(i)
+
+            G = y_i * dot(i) - 1 + D * alpha_i
+
+            PG_i = 0.
+            if alpha_i == 0:
+                if G > PG_max and shrinking:
+                    shrunk[s] = True
+                    continue
+                elif G < 0:
+                    PG_i = G
+            elif alpha_i == ub:
+                if G < PG_min and shrinking:
+                    shrunk[s] = True
+                    continue
+                elif G > 0:
+                    PG_i = G
+            else:
+                PG_i = G
+
+            if abs(PG_i) > 1e-12:
+                alphas[i] = min(max(alpha_i - G / Q_diag[i], 0.), ub)
+                axpy((alphas.item(i) - alpha_i) * y_i, i)
+
+            PG[s] = PG_i
+
+        return PG[~shrunk], shrunk
+
+    def _shrinking_bounds(self, PG):
+        PG_max, PG_min = super()._shrinking_bounds(PG)
+        # the coordinates are not shrunk by a bound which is not violated
+        return np.inf if PG_max <= 0 else PG_max, -np.inf if PG_min >= 0 else PG_min
+
+    def _converged(self, PG):
+        return PG.max(initial=0.) - PG.min(initial=0.) <= self.tol
+
+    def _dual_objective(self):
+        return 0.5 * (self.w.dot(self.w) + self.D * self.alphas.dot(self.alphas)) - np.sum(self.alphas)
+
+
+class DCDRegression(DCD):
+    """
+    Implements the dual coordinate descent algorithm by Ho and Lin for training
+    a linear support vector regression with the epsilon-insensitive loss, i.e.,
+    -C <= betas_i <= C, or the squared epsilon-insensitive loss, i.e., unbounded
+    betas with the diagonal 1 / (2 C) added to the Hessian matrix of the dual
+    problem, where betas = alphas_p - alphas_n.
+
+    References
+
+    C.H. Ho, C.J. Lin. Large-scale Linear Support Vector Regression. JMLR 13, 2012.
+    """
+
+    def __init__(self, X, y, loss, C=1., epsilon=0.1, tol=1e-3, shrinking=True, max_iter=1000,
+                 shuffle=True, random_state=None, verbose=False):
+        super().__init__(X, y, C, tol, shrinking, max_iter, shuffle, random_state, verbose)
+        if isinstance(loss, SquaredEpsilonInsensitive):
+            self.ub, self.D = np.inf, 0.5 / C
+        else:  # epsilon-insensitive
+            self.ub, self.D = C, 0.
+        self.epsilon = epsilon
+        self.betas = np.zeros(len(y))
+        self._Q_diag = (self.X_sq + self.D).tolist()
+        self._PG_norm1_init = None
+
+    def _sweep(self, active, PG_max, PG_min):
+        betas, y, Q_diag = self.betas, self._y, self._Q_diag
+        dot, axpy = self._row_ops()
+        ub, D, epsilon, shrinking = self.ub, self.D, self.epsilon, self.shrinking
+        # the maximal violation of the previous outer iteration
+        violation = max(PG_max, -PG_min)
+
+        PG = np.zeros(len(active))
+        shrunk = np.zeros(len(active), dtype=bool)
+        for s, i in enumerate(active.tolist()):
+            beta_i, H = betas.item(i), Q_diag[i]
+
+            G = dot(i) - y[i] + D * beta_i
+            G_p, G_n = G + epsilon, G - epsilon
+
+            PG_i = 0.
+            if beta_i == 0:
+                if G_p < 0:
+                    PG_i = G_p
+                elif G_n > 0:
+                    PG_i = G_n
+                elif G_p > violation and G_n < -violation and shrinking:
+                    shrunk[s] = True
+                    continue
+            elif beta_i >= ub:
+                if G_p > 0:
+                    PG_i = G_p
+                elif G_p < -violation and shrinking:
+                    shrunk[s] = True
+                    continue
+            elif beta_i <= -ub:
+                if G_n < 0:
+                    PG_i = G_n
+                elif G_n > violation and shrinking:
+                    shrunk[s] = True
+                    continue
+            elif beta_i > 0:
+                PG_i = G_p
+            else:
+                PG_i = G_n
+
+            # the Newton direction of the one-variable problem
+            if G_p < H * beta_i:
+                d = -G_p / H
+            elif G_n > H * beta_i:
+                d = -G_n / H
+            else:
+                d = -beta_i
+
+            if abs(d) > 1e-12:
+                betas[i] = min(max(beta_i + d, -ub), ub)
+                axpy(betas.item(i) - beta_i, i)
+
+            PG[s] = PG_i
+
+        return PG[~shrunk], shrunk
+
+    def _converged(self, PG):
+        PG_norm1 = np.sum(np.abs(PG))
+        if self._PG_norm1_init is None:
+            self._PG_norm1_init = PG_norm1
+        return PG_norm1 <= self.tol * self._PG_norm1_init
+
+    def _dual_objective(self):
+        return (0.5 * (self.w.dot(self.w) + self.D * self.betas.dot(self.betas)) -
+                self.y.dot(self.betas) + self.epsilon * np.sum(np.abs(self.betas)))
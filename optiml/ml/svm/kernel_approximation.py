@@ -0,0 +1,268 @@
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin, clone
+from sklearn.utils import check_random_state
+
+from .kernels import gaussian, poly, Kernel, GaussianKernel, PolyKernel
+
+
+class Nystroem(TransformerMixin, BaseEstimator):
+    """
+    Approximate a kernel map using a subset of the training data, i.e.,
+    the landmarks, by the Nystroem method:
+
+        K(X, Y) ~ K(X, L) K(L, L)^-1 K(L, Y) = phi(X) phi(Y)^T
+
+    with the explicit feature map phi(X) = K(X, L) K(L, L)^-1/2 of dimension
+    ``n_components``, so that a kernel machine can be trained by a linear one
+    in O(n r) memory instead of O(n^2).
+
+    Parameters
+    ----------
+    kernel : Kernel instance like {linear, poly, gaussian, sigmoid}, default=gaussian
+        The kernel to be approximated.
+
+    n_components : int, default=100
+        The number of landmarks, i.e., the dimension of the feature map.
+
+    landmarks : {'uniform', 'kmeans++', 'leverage'}, default='uniform'
+        The landmarks selection strategy:
+
+        - 'uniform' samples the landmarks uniformly at random without replacement;
+        - 'kmeans++' samples the landmarks by the k-means++ seeding in the feature
+          space induced by the kernel, i.e., each new landmark is chosen with
+          probability proportional to its squared kernel distance from the
+          nearest landmark already chosen;
+        - 'leverage' samples the landmarks with probability proportional to their
+          ridge leverage scores, approximated from a uniform Nystroem sketch.
+
+    random_state : int, default=None
+        Controls the pseudo random number generation for the landmarks selection.
+        Pass an int for reproducible output across multiple function calls.
+
+    Attributes
+    ----------
+    kernel_ : Kernel instance
+        The kernel fitted on the training data.
+
+    component_indices_ : ndarray of shape (n_components,)
+        The indices of the landmarks in the training data.
+
+    components_ : ndarray of shape (n_components, n_features)
+        The landmarks.
+
+    normalization_ : ndarray of shape (n_components, n_components)
+        The normalization matrix K(L, L)^-1/2.
+
+    References
+    ----------
+    C.K.I. Williams, M. Seeger. Using the Nystroem Method to Speed Up Kernel Machines.
+
+    A. Alaoui, M.W. Mahoney. Fast Randomized Kernel Ridge Regression with Statistical Guarantees.
+    """
+
+    def __init__(self, kernel=gaussian, n_components=100, landmarks='uniform', random_state=None):
+        if not isinstance(kernel, Kernel):
+            raise TypeError(f'{kernel} is not an allowed kernel function')
+        self.kernel = kernel
+        if not n_components > 0:
+            raise ValueError('n_components must be > 0')
+        self.n_components = n_components
+        if landmarks not in ('uniform', 'kmeans++', 'leverage'):
+            raise ValueError(f'unknown landmarks selection strategy {landmarks}')
+        self.landmarks = landmarks
+        self.random_state = random_state
+
+    def _kmeans_plus_plus(self, X, n_components, rs):
+        diag = self.kernel_.diag(X)
+        idx = [rs.randint(len(X))]
+        # squared distance in the feature space from the nearest landmark:
+        # ||phi(x) - phi(l)||^2 = K(x, x) + K(l, l) - 2 K(x, l)
+        d2 = np.maximum(diag + diag[idx[0]] - 2 * self.kernel_(X, X[idx[0], np.newaxis])[:, 0], 0)
+        for _ in range(1, n_components):
+            if d2.sum() > 0:
+                i = rs.choice(len(X), p=d2 / d2.sum())
+            else:  # all the remaining points coincide with some landmark
+                i = rs.choice(np.setdiff1d(np.arange(len(X)), idx))
+            idx.append(i)
+            d2 = np.minimum(d2, np.maximum(diag + diag[i] - 2 * self.kernel_(X, X[i, np.newaxis])[:, 0], 0))
+        return np.array(idx)
+
+    def _leverage(self, X, n_components, rs):
+        diag = self.kernel_.diag(X)
+        # the ridge parameter is taken as an upper bound of the tail of the
+        # spectrum, i.e., 1/k sum_{i > k} sigma_i(K) <= trace(K) / k
+        lmbda = diag.sum() / n_components
+        sketch = rs.choice(len(X), n_components, replace=False)
+        K_nS = self.kernel_(X, X[sketch])
+        K_SS = K_nS[sketch]
+        # tau_i = 1 / lambda (K_ii - K_iS (K_SS + lambda I)^-1 K_Si)
+        B = np.linalg.solve(K_SS + lmbda * np.identity(n_components), K_nS.T)
+        scores = np.maximum((diag - np.einsum('ij,ji->i', K_nS, B)) / lmbda, 1e-12)
+        return rs.choice(len(X), n_components, replace=False, p=scores / scores.sum())
+
+    def fit(self, X, y=None):
+        rs = check_random_state(self.random_state)
+        n_components = min(self.n_components, len(X))
+
+        self.kernel_ = clone(self.kernel).fit(X)
+
+        if self.landmarks == 'uniform':
+            self.component_indices_ = rs.choice(len(X), n_components, replace=False)
+        elif self.landmarks == 'kmeans++':
+            self.component_indices_ = self._kmeans_plus_plus(X, n_components, rs)
+        else:  # leverage
+            self.component_indices_ = self._leverage(X, n_components, rs)
+        self.components_ = X[self.component_indices_]
+
+        # K(L, L)^-1/2 by the svd since K(L, L) may be singular
+        U, S, V = np.linalg.svd(self.kernel_(self.components_))
+        S = np.maximum(S, 1e-12)
+        self.normalization_ = np.dot(U / np.sqrt(S), V)
+
+        return self
+
+    def transform(self, X):
+        return np.dot(self.kernel_(X, self.components_), self.normalization_.T)
+
+
+class RandomFourierFeatures(TransformerMixin, BaseEstimator):
+    """
+    Approximate the gaussian RBF kernel map by its Monte Carlo
+    approximation of the Fourier transform, i.e., by random Fourier features:
+
+        K(X, Y) = exp(-gamma ||X - Y||_2^2) ~ phi(X) phi(Y)^T
+
+    with phi(X) = sqrt(2 / D) cos(X W + b), W ~ N(0, 2 gamma) and b ~ U(0, 2 pi),
+    so that the feature map does not depend on the training data and any
+    sample is mapped in O(d D).
+
+    Parameters
+    ----------
+    kernel : GaussianKernel instance, default=gaussian
+        The gaussian kernel to be approximated, its ``gamma`` is resolved on
+        the training data if it is 'scale' or 'auto'.
+
+    n_components : int, default=100
+        The number of random features D, i.e., the dimension of the feature map.
+
+    random_state : int, default=None
+        Controls the pseudo random number generation for the random weights.
+        Pass an int for reproducible output across multiple function calls.
+
+    Attributes
+    ----------
+    kernel_ : GaussianKernel instance
+        The kernel fitted on the training data.
+
+    random_weights_ : ndarray of shape (n_features, n_components)
+        The random weights W.
+
+    random_offset_ : ndarray of shape (n_components,)
+        The random offsets b.
+
+    References
+    ----------
+    A. Rahimi, B. Recht. Random Features for Large-Scale Kernel Machines.
+    """
+
+    def __init__(self, kernel=gaussian, n_components=100, random_state=None):
+        if not isinstance(kernel, GaussianKernel):
+            raise TypeError(f'{kernel} is not a gaussian kernel')
+        self.kernel = kernel
+        if not n_components > 0:
+            raise ValueError('n_components must be > 0')
+        self.n_components = n_components
+        self.random_state = random_state
+
+    def fit(self, X, y=None):
+        rs = check_random_state(self.random_state)
+        self.kernel_ = clone(self.kernel).fit(X)
+        self.random_weights_ = rs.normal(scale=np.sqrt(2 * self.kernel_.gamma_),
+                                         size=(X.shape[1], self.n_components))
+        self.random_offset_ = rs.uniform(0, 2 * np.pi, size=self.n_components)
+        return self
+
+    def transform(self, X):
+        Z = np.dot(X, self.random_weights_)
+        Z += self.random_offset_
+        np.cos(Z, out=Z)
+        Z *= np.sqrt(2. / self.n_components)
+        return Z
+
+
+class TensorSketch(TransformerMixin, BaseEstimator):
+    """
+    Approximate the polynomial kernel map by the tensor sketch of the
+    degree-th tensor power of the (augmented) data:
+
+        K(X, Y) = (gamma <X, Y> + coef0)^degree = <X', Y'>^degree ~ phi(X) phi(Y)^T
+
+    with X' = [sqrt(gamma) X, sqrt(coef0)] and phi(X) = FFT^-1(FFT(C_1 X') * ... *
+    FFT(C_degree X')), where C_i are independent count sketches of dimension D,
+    so that the feature map does not depend on the training data and any
+    sample is mapped in O(degree (d + D log D)).
+
+    Parameters
+    ----------
+    kernel : PolyKernel instance, default=poly
+        The polynomial kernel to be approximated, its ``gamma`` is resolved on
+        the training data if it is 'scale' or 'auto', its ``degree`` must be an
+        integer and its ``coef0`` must be >= 0.
+
+    n_components : int, default=100
+        The dimension D of the feature map.
+
+    random_state : int, default=None
+        Controls the pseudo random number generation for the hash functions.
+        Pass an int for reproducible output across multiple function calls.
+
+    Attributes
+    ----------
+    kernel_ : PolyKernel instance
+        The kernel fitted on the training data.
+
+    index_hash_ : ndarray of shape (degree, n_features + 1)
+        The hash functions mapping the features into the sketch buckets.
+
+    bit_hash_ : ndarray of shape (degree, n_features + 1)
+        The hash functions mapping the features into the signs {-1, +1}.
+
+    References
+    ----------
+    N. Pham, R. Pagh. Fast and Scalable Polynomial Kernels via Explicit Feature Maps.
+    """
+
+    def __init__(self, kernel=poly, n_components=100, random_state=None):
+        if not isinstance(kernel, PolyKernel):
+            raise TypeError(f'{kernel} is not a polynomial kernel')
+        if int(kernel.degree) != kernel.degree:
+            raise ValueError('the degree of the polynomial kernel must be an integer')
+        if not kernel.coef0 >= 0:
+            raise ValueError('the coef0 of the polynomial kernel must be >= 0')
+        self.kernel = kernel
+        if not n_components > 0:
+            raise ValueError('n_components must be > 0')
+        self.n_components = n_components
+        self.random_state = random_state
+
+    def fit(self, X, y=None):
+        rs = check_random_state(self.random_state)
+        self.kernel_ = clone(self.kernel).fit(X)
+        degree = int(self.kernel_.degree)
+        self.index_hash_ = rs.randint(self.n_components, size=(degree, X.shape[1] + 1))
+        self.bit_hash_ = rs.choice([-1., 1.], size=(degree, X.shape[1] + 1))
+        return self
+
+    def transform(self, X):
+        X = np.hstack((np.sqrt(self.kernel_.gamma_) * X,
+                       np.full((len(X), 1), np.sqrt(self.kernel_.coef0))))
+        sketch_fft = np.ones((len(X), self.n_components // 2 + 1), dtype=complex)
+        for index_hash, bit_hash in zip(self.index_hash_, self.bit_hash_):
+            # count sketch of X' by the d-th pair of hash functions
+            count_sketch = np.zeros((len(X), self.n_components))
+            for j in range(X.shape[1]):
+                count_sketch[:, index_hash[j]] += bit_hash[j] * X[:, j]
+            # the circular convolution of the count sketches is
+            # the product of their fast Fourier transforms
+            sketch_fft *= np.fft.rfft(count_sketch, axis=1)
+        return np.fft.irfft(sketch_fft, n=self.n_components, axis=1)
@@ -1,14 +1,204 @@
+import hashlib
+import os
 from abc import ABC
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
-from sklearn.base import BaseEstimator
+from joblib import effective_n_jobs
+from sklearn.base import BaseEstimator, clone
+
+
+def row_norms_squared(X):
+    """
+    Compute the squared l2 norm of each row of X as:
+
+        ||x_i||_2^2 = <x_i, x_i>
+    """
+    return np.einsum('ij,ij->i', X, X)
+
+
+def squared_euclidean_distances(X, Y=None, X_norm_squared=None, Y_norm_squared=None):
+    """
+    Compute the pairwise squared euclidean distances between X and Y
+    by expanding the norm of the difference as:
+
+        ||x - y||_2^2 = ||x||_2^2 - 2 <x, y> + ||y||_2^2
+
+    so that only the row norms and a single X @ Y.T matrix product are
+    needed, i.e., the peak memory is O(n m) instead of O(n m d). The row
+    norms may be given if they are already known, e.g., cached at fit time.
+    """
+    if X_norm_squared is None:
+        X_norm_squared = row_norms_squared(X)
+    if Y is None:
+        Y, Y_norm_squared = X, X_norm_squared
+    elif Y_norm_squared is None:
+        Y_norm_squared = row_norms_squared(Y)
+    D = np.dot(X, Y.T)
+    if not np.issubdtype(D.dtype, np.floating):
+        D = D.astype(float)
+    D *= -2
+    D += X_norm_squared[:, np.newaxis]
+    D += Y_norm_squared[np.newaxis, :]
+    # clip the small negative values due to the cancellation errors
+    np.maximum(D, 0, out=D)
+    if Y is X:
+        np.fill_diagonal(D, 0)
+    return D
+
+
+def _gram(X, Y):
+    """
+    Compute the floating point matrix of the inner products <X, Y>,
+    which is then safe to be transformed in place.
+    """
+    K = np.dot(X, Y.T)
+    if not np.issubdtype(K.dtype, np.floating):
+        K = K.astype(float)
+    return K
+
+
+def _resolve_gamma(gamma, X):
+    if gamma == 'scale':
+        return 1. / (X.shape[1] * X.var())
+    elif gamma == 'auto':
+        return 1. / X.shape[1]
+    return gamma
+
+
+def _tile_slices(n_rows, n_cols, max_tile_bytes, itemsize=8):
+    """
+    Split a [n_rows x n_cols] matrix into row/column blocks whose size does
+    not exceed max_tile_bytes. Whole rows are preferred, so the matrix is
+    split by columns only when a single row does not fit into the budget.
+    """
+    max_tile_items = max_tile_bytes // itemsize
+    if not max_tile_items > 0:
+        raise ValueError('max_tile_bytes is too small to hold a single kernel entry')
+    if n_rows == 0 or n_cols == 0:  # an empty matrix has no tiles
+        return
+    if max_tile_items >= n_cols:
+        tile_rows, tile_cols = max_tile_items // n_cols, n_cols
+    else:
+        tile_rows, tile_cols = 1, max_tile_items
+    for start_row in range(0, n_rows, tile_rows):
+        for start_col in range(0, n_cols, tile_cols):
+            yield (slice(start_row, min(start_row + tile_rows, n_rows)),
+                   slice(start_col, min(start_col + tile_cols, n_cols)))
 
 
 class Kernel(BaseEstimator, ABC):
 
+    def fit(self, X, y=None):
+        """
+        Resolve the data-dependent parameters of the kernel, i.e., gamma
+        when it is 'scale' or 'auto', once on the training data X and
+        freeze them in the fitted attributes, e.g., ``gamma_``, so that
+        every later call reuses them instead of computing them again
+        from its own input.
+        """
+        if hasattr(self, 'gamma'):
+            self.gamma_ = _resolve_gamma(self.gamma, X)
+        return self
+
+    def _gamma(self, X):
+        return self.gamma_ if hasattr(self, 'gamma_') else _resolve_gamma(self.gamma, X)
+
     def __call__(self, X, Y=None):
         pass
 
+    def diag(self, X):
+        """
+        Compute the diagonal of the kernel matrix K(X, X), i.e., K(x_i, x_i),
+        without computing the whole matrix.
+        """
+        kernel = self._frozen(X)
+        return np.array([kernel(x[np.newaxis])[0, 0] for x in X])
+
+    def _frozen(self, X):
+        """
+        Return this kernel if it is already fitted, otherwise a copy of it
+        fitted on the whole X so that every tile or row is computed with
+        the same values of the data-dependent parameters.
+        """
+        if hasattr(self, 'gamma') and not hasattr(self, 'gamma_'):
+            return clone(self).fit(X)
+        return self
+
+    def tiles(self, X, Y=None, max_tile_bytes=2 ** 27, n_jobs=None):
+        """
+        Lazily compute the kernel matrix between X and Y by row/column blocks.
+
+        The tiles are filled concurrently on a thread pool of ``n_jobs``
+        workers (numpy releases the GIL in BLAS calls and ufuncs) and at
+        most ``n_jobs`` tiles are in flight at the same time, each one of
+        at most ``max_tile_bytes / n_jobs`` bytes.
+
+        :param X:              [n x d] data matrix.
+        :param Y:              [m x d] data matrix, if None X is used.
+        :param max_tile_bytes: the memory budget for the tiles in flight.
+        :param n_jobs:         the number of threads, -1 means all the cores.
+        :return:               a generator of (rows, cols, K[rows, cols]) tuples,
+                               with rows and cols slices, in row-major order.
+        """
+        kernel = self._frozen(X)
+        if Y is None:
+            Y = X
+        n_jobs = effective_n_jobs(n_jobs)
+        itemsize = np.result_type(X.dtype, Y.dtype, float).itemsize
+        blocks = _tile_slices(len(X), len(Y), max_tile_bytes // n_jobs, itemsize)
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            pending = deque()
+            for rows, cols in blocks:
+                pending.append((rows, cols, executor.submit(kernel, X[rows], Y[cols])))
+                if len(pending) >= n_jobs:
+                    rows, cols, tile = pending.popleft()
+                    yield rows, cols, tile.result()
+            while pending:
+                rows, cols, tile = pending.popleft()
+                yield rows, cols, tile.result()
+
+    def matrix(self, X, Y=None, out=None, max_tile_bytes=None, n_jobs=None):
+        """
+        Compute the kernel matrix between X and Y, possibly by tiles
+        bounded by ``max_tile_bytes`` and filled on a thread pool.
+
+        :param X:              [n x d] data matrix.
+        :param Y:              [m x d] data matrix, if None X is used.
+        :param out:            [n x m] preallocated output buffer, e.g., a
+                               memory-mapped array, if None a new one is allocated.
+        :param max_tile_bytes: the memory budget for the tiles in flight,
+                               if None the matrix is computed in a single shot.
+        :param n_jobs:         the number of threads, -1 means all the cores.
+        :return:               the [n x m] kernel matrix.
+        """
+        if max_tile_bytes is None:
+            K = self(X, Y)
+            if out is None:
+                return K
+            out[...] = K
+            return out
+
+        kernel = self._frozen(X)
+        if Y is None:
+            Y = X
+        if out is None:
+            out = np.empty((len(X), len(Y)), dtype=np.result_type(X.dtype, Y.dtype, float))
+        elif out.shape != (len(X), len(Y)):
+            raise ValueError(f'out has shape {out.shape} but the kernel matrix is {(len(X), len(Y))}')
+        n_jobs = effective_n_jobs(n_jobs)
+        itemsize = np.result_type(X.dtype, Y.dtype, float).itemsize
+
+        def fill(block):
+            rows, cols = block
+            out[rows, cols] = kernel(X[rows], Y[cols])
+
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            # consume the iterator to propagate any exception raised by the workers
+            list(executor.map(fill, _tile_slices(len(X), len(Y), max_tile_bytes // n_jobs, itemsize)))
+        return out
+
 
 class LinearKernel(Kernel):
     """
@@ -22,6 +212,9 @@ class LinearKernel(Kernel):
             Y = X
         return np.dot(X, Y.T)
 
+    def diag(self, X):
+        return row_norms_squared(X)
+
 
 class PolyKernel(Kernel):
     """
@@ -46,9 +239,16 @@ class PolyKernel(Kernel):
     def __call__(self, X, Y=None):
         if Y is None:
             Y = X
-        gamma = (1. / (X.shape[1] * X.var()) if self.gamma == 'scale' else  # auto
-                 1. / X.shape[1] if isinstance(self.gamma, str) else self.gamma)
-        return (gamma * np.dot(X, Y.T) + self.coef0) ** self.degree
+        gamma = self._gamma(X)
+        # computed in place, so that a tile needs no temporaries beyond itself
+        K = _gram(X, Y)
+        K *= gamma
+        K += self.coef0
+        return np.power(K, self.degree, out=K)
+
+    def diag(self, X):
+        gamma = self._gamma(X)
+        return (gamma * row_norms_squared(X) + self.coef0) ** self.degree
 
 
 class GaussianKernel(Kernel):
@@ -56,9 +256,13 @@ class GaussianKernel(Kernel):
     Compute the gaussian RBF kernel between X and Y:
 
         K(X, Y) = exp(-gamma ||X - Y||_2^2)
+
+    If a ``distance_cache`` is given, the squared distances D(X, X) are
+    taken from it, so that K(X, X) costs a single exp(-gamma D) pass
+    when the same X has already been seen, e.g., with another gamma.
     """
 
-    def __init__(self, gamma='scale'):
+    def __init__(self, gamma='scale', distance_cache=None):
         if isinstance(gamma, str):
             if gamma not in ('scale', 'auto'):
                 raise ValueError(f'unknown gamma type {gamma}')
@@ -66,13 +270,28 @@ class GaussianKernel(Kernel):
             if not gamma > 0:
                 raise ValueError('gamma must be > 0')
         self.gamma = gamma
+        if not (distance_cache is None or isinstance(distance_cache, SquaredDistanceCache)):
+            raise TypeError(f'{distance_cache} is not an allowed distance cache')
+        self.distance_cache = distance_cache
 
     def __call__(self, X, Y=None):
-        if Y is None:
-            Y = X
-        gamma = (1. / (X.shape[1] * X.var()) if self.gamma == 'scale' else  # auto
-                 1. / X.shape[1] if isinstance(self.gamma, str) else self.gamma)
-        return np.exp(-gamma * np.linalg.norm(X[:, np.newaxis] - Y[np.newaxis, :], axis=2) ** 2)
+        if Y is None and self.distance_cache is not None:
+            return self.matrix(X)
+        gamma = self._gamma(X)
+        D = squared_euclidean_distances(X, Y)
+        D *= -gamma
+        return np.exp(D, out=D)
+
+    def matrix(self, X, Y=None, out=None, max_tile_bytes=None, n_jobs=None):
+        if Y is not None or self.distance_cache is None:
+            return super().matrix(X, Y, out=out, max_tile_bytes=max_tile_bytes, n_jobs=n_jobs)
+        D = self.distance_cache.distances(X, max_tile_bytes=max_tile_bytes, n_jobs=n_jobs)
+        # the cached distances are read-only, so the kernel is written to out
+        out = np.multiply(D, -self._gamma(X), out=out)
+        return np.exp(out, out=out)
+
+    def diag(self, X):
+        return np.ones(len(X))
 
 
 class SigmoidKernel(Kernel):
@@ -95,12 +314,328 @@ class SigmoidKernel(Kernel):
     def __call__(self, X, Y=None):
         if Y is None:
             Y = X
-        gamma = (1. / (X.shape[1] * X.var()) if self.gamma == 'scale' else  # auto
-                 1. / X.shape[1] if isinstance(self.gamma, str) else self.gamma)
-        return np.tanh(gamma * np.dot(X, Y.T) + self.coef0)
+        gamma = self._gamma(X)
+        # computed in place, so that a tile needs no temporaries beyond itself
+        K = _gram(X, Y)
+        K *= gamma
+        K += self.coef0
+        return np.tanh(K, out=K)
+
+    def diag(self, X):
+        gamma = self._gamma(X)
+        return np.tanh(gamma * row_norms_squared(X) + self.coef0)
+
+
+class KernelRowCache:
+    """
+    Provide on-demand the rows of the kernel matrix K(X, X) keeping the most
+    recently used ones in a least-recently-used cache bounded by ``cache_size``
+    megabytes, as done in libsvm, so that the whole [n x n] kernel matrix is
+    never materialized. The diagonal of the kernel matrix is cached apart
+    since it is needed at each step by SMO.
+
+    It can be indexed as a dense kernel matrix by rows, i.e., cache[i]
+    returns the i-th row of K(X, X), and its diagonal is given by the
+    ``diagonal`` method.
+
+    Attributes
+    ----------
+    hits : int
+        The number of rows found in the cache.
+
+    misses : int
+        The number of rows which have been (re)computed.
+    """
+
+    def __init__(self, kernel, X, cache_size=200):
+        if not isinstance(kernel, Kernel):
+            raise TypeError(f'{kernel} is not an allowed kernel function')
+        if not cache_size > 0:
+            raise ValueError('cache_size must be > 0')
+        self.kernel = kernel._frozen(X)
+        self.X = X
+        self.shape = (len(X), len(X))
+        self.cache_size = cache_size
+        self._diag = self.kernel.diag(X)
+        self._rows = OrderedDict()
+        self._resize()
+        self.hits = 0
+        self.misses = 0
+
+    def _resize(self):
+        itemsize = np.result_type(self.X.dtype, float).itemsize
+        # at least two rows must be available at the same time, i.e., the
+        # ones of the pair of multipliers jointly optimized by SMO
+        self.max_rows = max(2, int(self.cache_size * 2 ** 20 // (len(self.X) * itemsize)))
+        while len(self._rows) > self.max_rows:
+            self._rows.popitem(last=False)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, i):
+        row = self._rows.get(i)
+        if row is not None:
+            self.hits += 1
+            self._rows.move_to_end(i)
+            return row
+        self.misses += 1
+        row = self.kernel(self.X[i:i + 1], self.X)[0]
+        if len(self._rows) >= self.max_rows:
+            self._rows.popitem(last=False)
+        self._rows[i] = row
+        return row
+
+    def diagonal(self):
+        return self._diag
+
+    def clear(self):
+        self._rows.clear()
+
+    def append(self, X):
+        """
+        Append the examples ``X`` to the ones of the kernel matrix, so
+        that the cached rows are extended by their new columns only.
+
+        :param X: [m x d] data matrix of the new examples.
+        :return: self
+        """
+        if self._rows:
+            K = self.kernel(self.X[list(self._rows)], X)
+            for i, row in zip(self._rows, K):
+                self._rows[i] = np.append(self._rows[i], row)
+        self.X = np.concatenate((self.X, X))
+        self.shape = (len(self.X), len(self.X))
+        self._diag = np.append(self._diag, self.kernel.diag(X))
+        self._resize()
+        return self
+
+    def remove(self, idx):
+        """
+        Remove the examples with index ``idx`` from the ones of the kernel
+        matrix, so that the other cached rows are kept, reindexed.
+
+        :param idx: the indices of the removed examples.
+        :return: self
+        """
+        keep = np.ones(len(self.X), dtype=bool)
+        keep[idx] = False
+        # the new index of each kept example
+        index = np.cumsum(keep) - 1
+        self._rows = OrderedDict((int(index[i]), row[keep]) for i, row in self._rows.items() if keep[i])
+        self.X = self.X[keep]
+        self.shape = (len(self.X), len(self.X))
+        self._diag = self._diag[keep]
+        self._resize()
+        return self
+
+
+class _KernelRowsSubset:
+    """
+    View of the kernel matrix, or of its rows cache, ``K`` restricted to
+    the examples with index ``idx``, whose rows are sliced on-demand.
+    """
+
+    def __init__(self, K, idx):
+        self.K = K
+        self.idx = idx
+        self.shape = (len(idx), len(idx))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, i):
+        return self.K[self.idx[i]][self.idx]
+
+    def diagonal(self):
+        return self.K.diagonal()[self.idx]
 
 
 linear = LinearKernel()
 poly = PolyKernel()
 gaussian = GaussianKernel()
 sigmoid = SigmoidKernel()
+
+
+class _ArrayCache:
+    """
+    Least-recently-used cache of [n x n] arrays bounded by ``max_bytes``
+    in memory and, if a ``directory`` is given, backed by .npy files on
+    disk which are loaded back as read-only memory-mapped arrays.
+    """
+
+    def __init__(self, max_bytes=2 ** 30, directory=None):
+        if not max_bytes >= 0:
+            raise ValueError('max_bytes must be >= 0')
+        self.max_bytes = max_bytes
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._arrays = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __len__(self):
+        return len(self._arrays)
+
+    def __repr__(self):
+        return f'{type(self).__name__}(max_bytes={self.max_bytes}, directory={self.directory!r})'
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npy')
+
+    def _save(self, key, A):
+        tmp = self._path(key) + '.tmp'
+        with open(tmp, 'wb') as file:
+            np.save(file, A)
+        os.replace(tmp, self._path(key))
+
+    def _store(self, key, A):
+        A.flags.writeable = False
+        self._arrays[key] = A
+        self.nbytes += A.nbytes
+        while self.nbytes > self.max_bytes:
+            evicted_key, evicted = self._arrays.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            if self.directory is not None and not os.path.exists(self._path(evicted_key)):
+                self._save(evicted_key, evicted)
+
+    def _get(self, key, n, dtype, compute):
+        """
+        Return the [n x n] array stored under key, looking for it in memory
+        first and then on disk; otherwise compute(out) fills a new one, with
+        out None to let it be allocated or a memory-mapped buffer if it is
+        too large to be kept in memory.
+        """
+        A = self._arrays.get(key)
+        if A is not None:
+            self.hits += 1
+            self._arrays.move_to_end(key)
+            return A
+
+        if self.directory is not None and os.path.exists(self._path(key)):
+            self.hits += 1
+            return np.load(self._path(key), mmap_mode='r')
+
+        self.misses += 1
+        if n ** 2 * np.dtype(dtype).itemsize > self.max_bytes:
+            if self.directory is None:
+                return compute(None)
+            # too large to be kept in memory, so it is written by tiles
+            # straight to the disk and loaded back as a memory-mapped array
+            tmp = self._path(key) + '.tmp'
+            A = np.lib.format.open_memmap(tmp, mode='w+', dtype=dtype, shape=(n, n))
+            compute(A)
+            A.flush()
+            del A
+            os.replace(tmp, self._path(key))
+            return np.load(self._path(key), mmap_mode='r')
+
+        A = compute(None)
+        self._store(key, A)
+        return A
+
+    def clear(self):
+        self._arrays.clear()
+        self.nbytes = 0
+
+
+class KernelMatrixCache(_ArrayCache):
+    """
+    Cache the kernel matrices K(X, X) keyed by a fingerprint of the data X
+    and of the kernel hyperparameters, so that repeated fits over the same
+    data, e.g., a sweep over C, skip the O(n^2 d) kernel computation.
+
+    The matrices are kept in memory in a least-recently-used cache bounded by
+    ``max_bytes``; if a ``directory`` is given, the matrices evicted from the
+    memory, or too large to fit in it, are stored as .npy files and then
+    loaded back as read-only memory-mapped arrays.
+
+    The cached matrices are read-only since they are shared among the fits.
+    The cache itself is shared, not copied, when the estimators which use
+    it are cloned, e.g., by a grid search.
+
+    Attributes
+    ----------
+    hits : int
+        The number of matrices found in the cache, either in memory or on disk.
+
+    misses : int
+        The number of matrices which have been computed.
+    """
+
+    @staticmethod
+    def fingerprint(kernel, X):
+        X = np.ascontiguousarray(X)
+        h = hashlib.sha1()
+        h.update(type(kernel).__name__.encode())
+        h.update(repr(sorted(kernel.get_params().items())).encode())
+        h.update(repr((X.shape, X.dtype.str)).encode())
+        h.update(X.data)
+        return h.hexdigest()
+
+    def matrix(self, kernel, X, max_tile_bytes=None, n_jobs=None):
+        """
+        Return the kernel matrix K(X, X) from the cache, computing it,
+        possibly by tiles, only if it is not already there.
+        """
+        return self._get(self.fingerprint(kernel, X), len(X), np.result_type(X.dtype, float),
+                         lambda out: kernel.matrix(X, out=out, max_tile_bytes=max_tile_bytes, n_jobs=n_jobs))
+
+
+class _SquaredEuclideanDistance(Kernel):
+    """
+    The pairwise squared euclidean distance wrapped as a kernel
+    so that it can be computed by tiles on a thread pool.
+    """
+
+    def __call__(self, X, Y=None):
+        return squared_euclidean_distances(X, Y)
+
+
+class SquaredDistanceCache(_ArrayCache):
+    """
+    Cache the pairwise squared euclidean distances D(X, X) keyed by a
+    fingerprint of the data X only, so that a gaussian kernel which uses
+    it computes K(X, X) for a new gamma by a single exp(-gamma D) pass
+    instead of the O(n^2 d) distances, e.g., in a sweep over gamma.
+
+    The distances are kept in memory in a least-recently-used cache bounded
+    by ``max_bytes``; if a ``directory`` is given, the distances evicted from
+    the memory, or too large to fit in it, are stored as .npy files and then
+    loaded back as read-only memory-mapped arrays, so that they are also
+    shared among the worker processes of a parallel grid search.
+
+    The cache itself is shared, not copied, when the kernels which use
+    it are cloned.
+
+    Attributes
+    ----------
+    hits : int
+        The number of distance matrices found in the cache, either in memory or on disk.
+
+    misses : int
+        The number of distance matrices which have been computed.
+    """
+
+    @staticmethod
+    def fingerprint(X):
+        X = np.ascontiguousarray(X)
+        h = hashlib.sha1()
+        h.update(b'squared_euclidean_distances')
+        h.update(repr((X.shape, X.dtype.str)).encode())
+        h.update(X.data)
+        return h.hexdigest()
+
+    def distances(self, X, max_tile_bytes=None, n_jobs=None):
+        """
+        Return the squared euclidean distances D(X, X) from the cache,
+        computing them, possibly by tiles, only if they are not already there.
+        """
+        return self._get(self.fingerprint(X), len(X), np.result_type(X.dtype, float),
+                         lambda out: _SquaredEuclideanDistance().matrix(
+                             X, out=out, max_tile_bytes=max_tile_bytes, n_jobs=n_jobs))
@@ -1,10 +1,44 @@
 from abc import ABC
 
 import autograd.numpy as np
+from scipy.sparse.linalg import LinearOperator
 
 from ...opti import OptimizationFunction
 
 
+class ActiveSetHessian(LinearOperator):
+
+    def __init__(self, X_active, C, n_samples):
+        """
+        Represent implicitly the [n x n] generalized Hessian matrix of the
+        squared losses, i.e., of the squared hinge and the squared
+        epsilon-insensitive ones:
+
+                        1 / n_samples * (I + 2 C X_A^T X_A)
+
+        by the rows X_A of the active examples only, i.e., the ones with a
+        nonzero loss, so that the products cost O(nnz(X_A)) without building it.
+
+        :param X_active:  ([n_active x n] real matrix): the active examples.
+        :param C:         (real scalar): the regularization parameter.
+        :param n_samples: (integer scalar): the number of examples.
+        """
+        self.X_active = X_active
+        self.C = C
+        self.n_samples = n_samples
+        super().__init__(dtype=float, shape=(X_active.shape[1], X_active.shape[1]))
+
+    def _matvec(self, x):
+        x = np.ravel(x)
+        return (x + 2 * self.C * self.X_active.T.dot(self.X_active.dot(x))) / self.n_samples
+
+    def _adjoint(self):
+        return self
+
+    def diagonal(self):
+        return (1 + 2 * self.C * np.sum(np.square(self.X_active), axis=0)) / self.n_samples
+
+
 class SVMLoss(OptimizationFunction, ABC):
 
     def __init__(self, svm, X, y):
@@ -75,7 +109,18 @@ class SquaredHinge(Hinge):
         return np.square(super().loss(y_pred, y_true))
 
     def loss_jacobian(self, packed_coef_inter, X_batch, y_batch):
-        return 2 * super().loss_jacobian(packed_coef_inter, X_batch, y_batch)
+        margins = 1. - y_batch * np.dot(X_batch, packed_coef_inter)
+        idx = np.argwhere(margins > 0.).ravel()
+        return 2 * np.dot(margins[idx] * y_batch[idx], X_batch[idx])
+
+    def hessian(self, packed_coef_inter, X_batch=None, y_batch=None):
+        if X_batch is None:
+            X_batch = self.X
+        if y_batch is None:
+            y_batch = self.y
+
+        active = y_batch * np.dot(X_batch, packed_coef_inter) < 1.
+        return ActiveSetHessian(X_batch[active], self.svm.C, X_batch.shape[0])
 
 
 class SVRLoss(SVMLoss, ABC):
@@ -132,7 +177,18 @@ class SquaredEpsilonInsensitive(EpsilonInsensitive):
         return np.square(super().loss(y_pred, y_true))
 
     def loss_jacobian(self, packed_coef_inter, X_batch, y_batch):
-        return 2 * super().loss_jacobian(packed_coef_inter, X_batch, y_batch)
+        residuals = y_batch - np.dot(X_batch, packed_coef_inter)
+        idx = np.argwhere(np.abs(residuals) > self.epsilon).ravel()
+        return 2 * np.dot(residuals[idx] - self.epsilon * np.sign(residuals[idx]), X_batch[idx])
+
+    def hessian(self, packed_coef_inter, X_batch=None, y_batch=None):
+        if X_batch is None:
+            X_batch = self.X
+        if y_batch is None:
+            y_batch = self.y
+
+        active = np.abs(np.dot(X_batch, packed_coef_inter) - y_batch) > self.epsilon
+        return ActiveSetHessian(X_batch[active], self.svm.C, X_batch.shape[0])
 
 
 hinge = Hinge
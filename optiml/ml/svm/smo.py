@@ -1,20 +1,73 @@
+import hashlib
+import os
 import sys
 import warnings
 from abc import ABC
+from time import perf_counter
 
 import numpy as np
+import scipy.sparse as sp
 from sklearn.exceptions import PositiveSpectrumWarning
 
 from .kernels import gaussian, LinearKernel
 
 
 class SMO(ABC):
+    """
+    Base class for the sequential minimal optimization algorithms.
+
+    The kernel matrix ``K`` can be either a dense [n x n] array or a
+    ``KernelRowCache``, since SMO only accesses it by rows and needs its
+    diagonal; ``quad`` is only used to print the dual objective and it
+    may be None when the Hessian is not materialized.
+
+    The ``working_set`` selects the multiplier jointly optimized with the
+    examined one: 'first_order' takes the maximal violating one, i.e., the
+    one which gives b_up or b_low, while 'second_order' takes, among the
+    multipliers whose errors are cached, i.e., the ones in I0 and the
+    ones which give b_up and b_low, the violating one which maximizes the
+    second order approximation of the decrease of the dual objective, i.e.,
+    (F_low - F_up)^2 / (K[i,i] + K[j,j] - 2 K[i,j]), as in Fan et al.
+    In the latter case the loops over I0 are replaced by the optimization
+    of b_up_idx with its second order partner until I0 is optimal.
+
+    If ``shrinking`` is True, after each loop over all the examples the
+    multipliers at the bounds which have not violated the optimality wrt
+    the current thresholds in the last two of them are removed from the
+    active set, so that they are not examined anymore, i.e., their kernel
+    rows are not needed, until the optimality over the active set is
+    attained. Then their errors are reconstructed and, if some of them
+    violate the optimality, the whole active set is restored and the
+    optimization goes on, as in libsvm.
+
+    The optimization stops, with ``status`` 'stopped' instead of 'optimal',
+    after ``max_iter`` loops over all the examples, i.e., ``iter``, or after
+    ``max_time`` seconds, if given, in each call to ``minimize``. Its state can be saved to disk by
+    ``save_checkpoint`` and restored by ``load_checkpoint`` to resume the
+    optimization from where it was stopped.
+
+    References
 
-    def __init__(self, quad, X, y, K, kernel=gaussian, C=1., tol=1e-3, verbose=False):
+    R.E. Fan, P.H. Chen, C.J. Lin. Working Set Selection Using Second Order
+    Information for Training Support Vector Machines. JMLR 6, 2005.
+
+    T. Joachims. Making Large-Scale SVM Learning Practical. Advances in
+    Kernel Methods - Support Vector Learning, 1999.
+    """
+
+    def __init__(self, quad, X, y, K, kernel=gaussian, C=1., tol=1e-3, working_set='first_order',
+                 shrinking=True, max_iter=1000, max_time=None, verbose=False):
+        if working_set not in ('first_order', 'second_order'):
+            raise ValueError(f'unknown working set selection {working_set}')
+        if not max_iter > 0:
+            raise ValueError('max_iter must be > 0')
+        if max_time is not None and not max_time > 0:
+            raise ValueError('max_time must be > 0')
         self.quad = quad
         self.X = X
         self.y = y
         self.K = K
+        self.K_diag = K.diagonal()
         self.kernel = kernel
         if isinstance(kernel, LinearKernel):
             self.w = 0.
@@ -22,17 +75,305 @@ class SMO(ABC):
         self.C = C
         self.errors = np.zeros(len(X))
         self.tol = tol
+        self.working_set = working_set
+        self.shrinking = shrinking
+        # {i : i is not shrunk}
+        self.active = np.ones(len(X), dtype=bool)
+        # number of consecutive loops over all the examples in which each
+        # multiplier has been at a bound and optimal
+        self.n_optimal = np.zeros(len(X), dtype=int)
+        self.max_iter = max_iter
+        self.max_time = max_time
+        self.iter = 0
+        self.examine_all = True
+        self.status = 'unknown'
         self.verbose = verbose
 
+    def _free_errors(self, idx):
+        """
+        Return the errors of the multipliers in I0 with index ``idx`` as
+        used in the thresholds b_up and b_low.
+        """
+        raise NotImplementedError
+
+    def _select_second_order(self, i2, F2_up, F2_low):
+        """
+        Select the multiplier i1 to be optimized jointly with i2 by the
+        second order information, where ``F2_up`` and ``F2_low`` are the
+        errors of i2 as a member of I_up and of I_low, respectively, or
+        None if it does not belong to such set.
+        """
+        I0 = np.flatnonzero(self.I0)
+        F = self._free_errors(I0)
+        idx = np.append(I0, (self.b_low_idx, self.b_up_idx))
+        F_low = np.append(F, (self.b_low, -np.inf))
+        F_up = np.append(F, (np.inf, self.b_up))
+
+        violation = np.full(len(idx), -np.inf)
+        if F2_up is not None:  # i2 in I_up, i1 in I_low
+            violation = np.maximum(violation, F_low - F2_up)
+        if F2_low is not None:  # i2 in I_low, i1 in I_up
+            violation = np.maximum(violation, F2_low - F_up)
+        violation[idx == i2] = -np.inf
+
+        eta = self.K_diag[idx] + self.K_diag[i2] - 2 * self.K[i2][idx]
+        eta[eta <= 0] = 1e-12
+        decrease = np.where(violation > 2 * self.tol, violation ** 2 / eta, -np.inf)
+        return idx[np.argmax(decrease)]
+
+    def _optimize_free(self):
+        """
+        Jointly optimize the maximal violating multiplier b_up_idx with the
+        one selected by the second order information until the optimality
+        on I0 is attained, as in item 2 of section 5 in Keerthi et al.
+        """
+        while self.b_up < self.b_low - 2 * self.tol and not self._max_time_reached():
+            i2 = self.b_up_idx
+            i1 = self._select_second_order(i2, self.b_up, None)
+            # fall back to the maximal violating pair if no progress is made
+            if not (self._take_step(i1, i2) or self._take_step(self.b_low_idx, i2)):
+                break
+
+    def _up_low_errors(self):
+        """
+        Return the errors of all the multipliers as members of I_up and of
+        I_low, i.e., +inf and -inf, respectively, if they do not belong to.
+        """
+        raise NotImplementedError
+
+    def _reconstruct_errors(self, idx):
+        """
+        Recompute from scratch the errors of the multipliers with index ``idx``.
+        """
+        raise NotImplementedError
+
+    def _kernel_expansion(self, coef, idx):
+        """
+        Compute sum_j coef[j] K[j, idx] by the kernel rows of the fewer
+        between the support vectors and the given indices.
+        """
+        sv = np.flatnonzero(coef)
+        if len(idx) < len(sv):
+            return np.array([coef[sv].dot(self.K[i][sv]) for i in idx])
+        f = np.zeros(len(idx))
+        for j in sv:
+            f += coef[j] * self.K[j][idx]
+        return f
+
+    def _shrink(self):
+        """
+        Remove from the active set the multipliers at the bounds which have
+        not violated the optimality wrt the current thresholds for a while.
+        """
+        F_up, F_low = self._up_low_errors()
+        optimal = self.active & ~self.I0 & (F_up > self.b_low) & (F_low < self.b_up)
+        optimal[[self.b_low_idx, self.b_up_idx]] = False
+        # a multiplier is considered unlikely to move, i.e., it is shrunk,
+        # if it has been optimal in the last two loops over all examples
+        self.n_optimal = np.where(optimal, self.n_optimal + 1, 0)
+        self.active[self.n_optimal >= 2] = False
+
+    def _unshrink(self):
+        """
+        Reconstruct the errors of the shrunk multipliers, restore the whole
+        active set and the thresholds over it and return True if the
+        optimality is violated.
+        """
+        self._reconstruct_errors(np.flatnonzero(~self.active))
+        self.active[:] = True
+        self._thresholds()
+        return self.b_low > self.b_up + 2 * self.tol
+
+    def _thresholds(self):
+        """
+        Compute the thresholds b_up and b_low over the active examples.
+        """
+        F_up, F_low = self._up_low_errors()
+        F_up[~self.active], F_low[~self.active] = np.inf, -np.inf
+        self.b_up_idx, self.b_low_idx = np.argmin(F_up), np.argmax(F_low)
+        self.b_up, self.b_low = F_up[self.b_up_idx], F_low[self.b_low_idx]
+
+    def _warm_start(self, idx=None):
+        """
+        Rebuild the error cache and the thresholds from the multipliers
+        set by ``warm_start`` and restart from a loop over all the examples.
+        If ``idx`` is given, the other multipliers are known to be optimal
+        but the ones in I0, so only the latter and the ones with index ``idx``
+        are active, while the others are checked at the end as if they were
+        shrunk, i.e., by the kernel rows of the support vectors only.
+        """
+        if idx is None:
+            self.active = np.ones(len(self.y), dtype=bool)
+        else:
+            self.active = self.I0.copy()
+            self.active[idx] = True
+        self._reconstruct_errors(np.flatnonzero(self.active))
+        self._thresholds()
+        self.n_optimal = np.zeros(len(self.y), dtype=int)
+        self.examine_all = True
+
+    def _clip(self, alphas):
+        """
+        Clip the multipliers ``alphas`` into the box [0, C] snapping
+        them to the bounds as in ``_take_step``.
+        """
+        alphas = np.clip(alphas, 0, self.C)
+        alphas[alphas > self.C - 1e-8 * self.C] = self.C
+        alphas[alphas <= 1e-8 * self.C] = 0.
+        return alphas
+
     def _take_step(self, i1, i2):
         raise NotImplementedError
 
     def _examine_example(self, i2):
         raise NotImplementedError
 
-    def minimize(self):
+    def _dual_objective(self):
+        raise NotImplementedError
+
+    def _intercept(self):
         raise NotImplementedError
 
+    def _state_names(self):
+        """
+        Return the names of the attributes which define the state of the
+        optimization, i.e., the multipliers, the error cache, the thresholds
+        and the index sets.
+        """
+        names = ['errors', 'b_up', 'b_low', 'b_up_idx', 'b_low_idx',
+                 'I0', 'I1', 'I2', 'I3', 'active', 'n_optimal', 'iter', 'examine_all']
+        if isinstance(self.kernel, LinearKernel):
+            names.append('w')
+        return names
+
+    def _problem_params(self):
+        """
+        Return the parameters which, together with the data, define the
+        problem, i.e., the kernel with its resolved parameters, e.g., gamma_,
+        the regularization and the tolerance.
+        """
+        kernel = self.kernel
+        if not isinstance(kernel, str):  # precomputed
+            params = kernel.get_params()
+            params.pop('distance_cache', None)  # a training-time cache
+            params.update((name, value) for name, value in vars(kernel).items()
+                          if name.endswith('_') and not name.startswith('_'))
+            kernel = (type(kernel).__name__, sorted(params.items()))
+        return {'kernel': kernel, 'C': self.C, 'tol': self.tol}
+
+    def _fingerprint(self):
+        """
+        Return the sha1 digest of the data and of the parameters of the
+        problem, so that a checkpoint is only restored over the same one.
+        """
+        sha1 = hashlib.sha1()
+        X = self.X
+        for array in ((X.data, X.indices, X.indptr) if sp.issparse(X) else (X,)) + (self.y,):
+            array = np.ascontiguousarray(array)
+            sha1.update(repr((array.dtype.str, array.shape)).encode())
+            sha1.update(array.data)
+        sha1.update(repr(sorted(self._problem_params().items())).encode())
+        return sha1.hexdigest()
+
+    def save_checkpoint(self, file):
+        """
+        Save the state of the optimization into ``file`` in the ``.npz``
+        format, together with the fingerprint of the problem. The file is
+        replaced atomically, so that a previous checkpoint is not lost if
+        the process is interrupted meanwhile.
+        """
+        tmp_file = f'{file}.tmp'
+        with open(tmp_file, 'wb') as f:
+            np.savez(f, fingerprint=self._fingerprint(),
+                     **{name: getattr(self, name) for name in self._state_names()})
+        os.replace(tmp_file, file)
+
+    def load_checkpoint(self, file):
+        """
+        Restore the state of the optimization saved into ``file`` by
+        ``save_checkpoint`` over the same problem, i.e., the same data and
+        parameters, so that ``minimize`` resumes the optimization from it.
+        """
+        with np.load(file) as checkpoint:
+            if 'fingerprint' not in checkpoint or checkpoint['fingerprint'] != self._fingerprint():
+                raise ValueError(f'{file} is not a checkpoint of this problem')
+            for name in self._state_names():
+                state = checkpoint[name]
+                setattr(self, name, state if state.ndim else state.item())
+        return self
+
+    def _max_time_reached(self):
+        return self.max_time is not None and perf_counter() - self._start_time >= self.max_time
+
+    def minimize(self):
+        if self.verbose:
+            print('iter\t cost')
+
+        self._start_time = perf_counter()
+        max_iter = self.iter + self.max_iter
+
+        num_changed = 0
+        while num_changed > 0 or self.examine_all:
+            num_changed = 0
+            interrupted = False
+            # loop over all training examples
+            if self.examine_all:
+                for i in np.flatnonzero(self.active):
+                    num_changed += self._examine_example(i)
+                    if self._max_time_reached():
+                        interrupted = True
+                        break
+                if not interrupted:
+                    if num_changed:
+                        if self.shrinking:
+                            self._shrink()
+                    elif not self.active.all():
+                        # check the optimality over the shrunk examples
+                        # too and, if it is violated, go on over all
+                        num_changed = int(self._unshrink())
+
+                if self.verbose and not self.iter % self.verbose:
+                    print('{:4d}\t{: 1.4e}'.format(self.iter, self._dual_objective()))
+
+                self.iter += 1
+            elif self.working_set == 'second_order':
+                self._optimize_free()
+                interrupted = self._max_time_reached()
+            else:
+                # loop over examples where alphas are not already at their limits
+                for i in np.flatnonzero(self.I0):
+                    if self.I0[i]:
+                        num_changed += self._examine_example(i)
+                        # check if optimality on I0 is attained
+                        if self.b_up > self.b_low - 2 * self.tol:
+                            num_changed = 0
+                            break
+                        if self._max_time_reached():
+                            interrupted = True
+                            break
+            if self.examine_all:
+                self.examine_all = False
+            elif num_changed == 0:
+                self.examine_all = True
+
+            if (interrupted or
+                    (num_changed > 0 or self.examine_all) and
+                    (self.iter >= max_iter or self._max_time_reached())):
+                # the interrupted loop is restarted over all the examples
+                # when resumed, since their optimality is unknown
+                self.examine_all = True
+                self.status = 'stopped'
+                break
+        else:
+            self.status = 'optimal'
+
+        self.b = self._intercept()
+
+        if self.verbose:
+            print()
+
+        return self
+
 
 class SMOClassifier(SMO):
     """
@@ -55,37 +396,143 @@ class SMOClassifier(SMO):
     Algorithm for SVM Classifier Design. Technical Report CD-99-14.
     """
 
-    def __init__(self, quad, X, y, K, kernel=gaussian, C=1., tol=1e-3, verbose=False):
+    def __init__(self, quad, X, y, K, kernel=gaussian, C=1., tol=1e-3, working_set='first_order',
+                 shrinking=True, max_iter=1000, max_time=None, verbose=False):
         self.alphas = np.zeros(len(X))
-        super().__init__(quad, X, y, K, kernel, C, tol, verbose)
+        super().__init__(quad, X, y, K, kernel, C, tol, working_set, shrinking, max_iter, max_time, verbose)
 
         # initialize variables and structures to implement improvements
         # on the original Platt's SMO algorithm described in Keerthi et
         # al. for better performance ed efficiency
 
-        # set of indices
+        # set of indices, kept as boolean masks so that the error cache
+        # update and the thresholds search are vectorized over them
         # {i : 0 < alphas[i] < C}
-        self.I0 = set()
+        self.I0 = np.zeros(len(X), dtype=bool)
         # {i : y[i] = +1, alphas[i] = 0}
-        self.I1 = set(i for i in range(len(X)) if y[i] == 1)
+        self.I1 = y == 1
         # {i : y[i] = -1, alphas[i] = C}
-        self.I2 = set()
+        self.I2 = np.zeros(len(X), dtype=bool)
         # {i : y[i] = +1, alphas[i] = C}
-        self.I3 = set()
+        self.I3 = np.zeros(len(X), dtype=bool)
         # {i : y[i] = -1, alphas[i] = 0}
-        self.I4 = set(i for i in range(len(X)) if y[i] == -1)
+        self.I4 = y == -1
 
         # multiple thresholds
         self.b_up = -1
         self.b_low = 1
         # initialize b_up_idx to any one index of class +1
-        self.b_up_idx = next(i for i in range(len(X)) if y[i] == 1)
+        self.b_up_idx = np.flatnonzero(self.I1)[0]
         # initialize b_low_idx to any one index of class -1
-        self.b_low_idx = next(i for i in range(len(X)) if y[i] == -1)
+        self.b_low_idx = np.flatnonzero(self.I4)[0]
 
         self.errors[self.b_up_idx] = -1
         self.errors[self.b_low_idx] = 1
 
+    def warm_start(self, alphas):
+        """
+        Start the optimization from the multipliers ``alphas``, e.g., the
+        solution of the same problem for a different C, clipped into the
+        box [0, C].
+
+        :param alphas: the initial multipliers.
+        :return: self
+        """
+        self.alphas = self._clip(alphas)
+        self._rebuild()
+        self._warm_start()
+        return self
+
+    def add_samples(self, X, y, K):
+        """
+        Add new examples to the problem with null multipliers, so that the
+        optimality of the old ones still holds and the optimization is
+        restarted over the new ones and the ones in I0 only, which are the
+        only ones whose errors are needed, as in the incremental SVM by
+        Cauwenberghs and Poggio.
+
+        :param X: the data matrix over the old and the new examples,
+                  the latter appended after the former.
+        :param y: the labels of the old and the new examples.
+        :param K: the kernel matrix, or its rows cache, over the
+                  old and the new examples.
+        :return: self
+        """
+        n_new = len(y) - len(self.y)
+        self.X, self.y, self.K, self.K_diag = X, y, K, K.diagonal()
+        self.alphas = np.append(self.alphas, np.zeros(n_new))
+        self.errors = np.append(self.errors, np.zeros(n_new))
+        self._rebuild()
+        self._warm_start(np.arange(len(y) - n_new, len(y)))
+        return self
+
+    def remove_samples(self, idx, X, y, K):
+        """
+        Remove the examples with index ``idx`` from the problem. The removed
+        multipliers break the equality constraint, so it is restored by
+        moving their sum onto the remaining ones of the same class or by
+        taking it from the ones of the other class, the ones in I0 first,
+        and the optimization is restarted over the changed ones and the ones
+        in I0 only, as in the decremental SVM by Cauwenberghs and Poggio.
+
+        :param idx: the indices of the removed examples.
+        :param X:   the data matrix over the remaining examples.
+        :param y:   the labels of the remaining examples.
+        :param K:   the kernel matrix, or its rows cache,
+                    over the remaining examples.
+        :return: self
+        """
+        removed = np.zeros(len(self.y), dtype=bool)
+        removed[idx] = True
+
+        alphas = self.alphas.copy()
+        d = np.dot(alphas[removed], self.y[removed])
+        # restore sum_j alphas_j y_j = 0 moving each multiplier towards its
+        # bound of the sign of d y_j as far as needed, the free ones first
+        room = np.where(self.y * np.sign(d) > 0, self.C - alphas, alphas)
+        room[removed] = 0.
+        order = np.argsort(~self.I0, kind='stable')
+        take = np.zeros(len(alphas))
+        take[order] = np.clip(abs(d) - (np.cumsum(room[order]) - room[order]), 0, room[order])
+        alphas += np.sign(d) * self.y * take
+
+        self.X, self.y, self.K, self.K_diag = X, y, K, K.diagonal()
+        self.alphas = self._clip(alphas[~removed])
+        self.errors = self.errors[~removed]
+        self._rebuild()
+        self._warm_start(np.flatnonzero(take[~removed]))
+        return self
+
+    def _rebuild(self):
+        """
+        Rebuild the index sets and, if the kernel is linear,
+        the weight vector from the multipliers.
+        """
+        self.I0 = (self.alphas > 0) & (self.alphas < self.C)
+        self.I1 = (self.y == 1) & (self.alphas == 0)
+        self.I2 = (self.y == -1) & (self.alphas == self.C)
+        self.I3 = (self.y == 1) & (self.alphas == self.C)
+        self.I4 = (self.y == -1) & (self.alphas == 0)
+
+        if isinstance(self.kernel, LinearKernel):
+            self.w = (self.alphas * self.y).dot(self.X)
+
+    def _free_errors(self, idx):
+        return self.errors[idx]
+
+    def _intercept(self):
+        return -(self.b_low + self.b_up) / 2
+
+    def _state_names(self):
+        return super()._state_names() + ['alphas', 'I4']
+
+    def _up_low_errors(self):
+        return (np.where(self.I0 | self.I1 | self.I2, self.errors, np.inf),
+                np.where(self.I0 | self.I3 | self.I4, self.errors, -np.inf))
+
+    def _reconstruct_errors(self, idx):
+        self.errors[idx] = self._kernel_expansion(self.alphas * self.y, idx) - self.y[idx]
+
     def _take_step(self, i1, i2):
         # skip if chosen alphas are the same
         if i1 == i2:
@@ -113,9 +560,11 @@ class SMOClassifier(SMO):
         if L == H:
             return False
 
+        K1, K2 = self.K[i1], self.K[i2]
+
         # compute the 2nd derivative of the objective function along
         # the diagonal line based on equation 15 in Platt's paper
-        eta = self.K[i1, i1] + self.K[i2, i2] - 2 * self.K[i1, i2]
+        eta = self.K_diag[i1] + self.K_diag[i2] - 2 * K1[i2]
 
         # under normal circumstances, the objective function will be positive
         # definite, there will be a minimum along the direction of the linear
@@ -147,16 +596,16 @@ class SMOClassifier(SMO):
 
         # update weight vector to reflect change in a1 and a2, if
         # kernel is linear, based on equation 22 in Platt's paper
-        if self.kernel == 'linear':
+        if isinstance(self.kernel, LinearKernel):
             self.w += y1 * (a1 - alpha1) * self.X[i1] + y2 * (a2 - alpha2) * self.X[i2]
 
         # update error cache using new alphas
-        for i in self.I0:
-            if i != i1 and i != i2:
-                self.errors[i] += y1 * (a1 - alpha1) * self.K[i1, i] + y2 * (a2 - alpha2) * self.K[i2, i]
+        I0 = self.I0.copy()
+        I0[[i1, i2]] = False
+        self.errors[I0] += y1 * (a1 - alpha1) * K1[I0] + y2 * (a2 - alpha2) * K2[I0]
         # update error cache using new alphas for i1 and i2
-        self.errors[i1] += y1 * (a1 - alpha1) * self.K[i1, i1] + y2 * (a2 - alpha2) * self.K[i1, i2]
-        self.errors[i2] += y1 * (a1 - alpha1) * self.K[i1, i2] + y2 * (a2 - alpha2) * self.K[i2, i2]
+        self.errors[i1] += y1 * (a1 - alpha1) * self.K_diag[i1] + y2 * (a2 - alpha2) * K1[i2]
+        self.errors[i2] += y1 * (a1 - alpha1) * K1[i2] + y2 * (a2 - alpha2) * self.K_diag[i2]
 
         # to prevent precision problems
         if a2 > self.C - 1e-8 * self.C:
@@ -175,26 +624,11 @@ class SMOClassifier(SMO):
 
         # update the sets of indices for i1 and i2
         for i in (i1, i2):
-            if 0 < self.alphas[i] < self.C:
-                self.I0.add(i)
-            else:
-                self.I0.discard(i)
-            if self.y[i] == 1 and self.alphas[i] == 0:
-                self.I1.add(i)
-            else:
-                self.I1.discard(i)
-            if self.y[i] == -1 and self.alphas[i] == self.C:
-                self.I2.add(i)
-            else:
-                self.I2.discard(i)
-            if self.y[i] == 1 and self.alphas[i] == self.C:
-                self.I3.add(i)
-            else:
-                self.I3.discard(i)
-            if self.y[i] == -1 and self.alphas[i] == 0:
-                self.I4.add(i)
-            else:
-                self.I4.discard(i)
+            self.I0[i] = 0 < self.alphas[i] < self.C
+            self.I1[i] = self.y[i] == 1 and self.alphas[i] == 0
+            self.I2[i] = self.y[i] == -1 and self.alphas[i] == self.C
+            self.I3[i] = self.y[i] == 1 and self.alphas[i] == self.C
+            self.I4[i] = self.y[i] == -1 and self.alphas[i] == 0
 
         # update thresholds (b_up, b_up_idx) and (b_low, b_low_idx)
         # by applying equations 11a and 11b, using only i1, i2 and
@@ -205,23 +639,23 @@ class SMOClassifier(SMO):
         self.b_up = sys.float_info.max
         self.b_low = -sys.float_info.max
 
-        for i in self.I0:
-            if self.errors[i] > self.b_low:
-                self.b_low = self.errors[i]
-                self.b_low_idx = i
-            if self.errors[i] < self.b_up:
-                self.b_up = self.errors[i]
-                self.b_up_idx = i
-        if i1 not in self.I0:
-            if i1 in self.I3 or i1 in self.I4:
+        I0 = np.flatnonzero(self.I0)
+        if I0.size:
+            errors = self.errors[I0]
+            self.b_low_idx = I0[np.argmax(errors)]
+            self.b_low = self.errors[self.b_low_idx]
+            self.b_up_idx = I0[np.argmin(errors)]
+            self.b_up = self.errors[self.b_up_idx]
+        if not self.I0[i1]:
+            if self.I3[i1] or self.I4[i1]:
                 if self.errors[i1] > self.b_low:
                     self.b_low = self.errors[i1]
                     self.b_low_idx = i1
             elif self.errors[i1] < self.b_up:
                 self.b_up = self.errors[i1]
                 self.b_up_idx = i1
-        if i2 not in self.I0:
-            if i2 in self.I3 or i2 in self.I4:
+        if not self.I0[i2]:
+            if self.I3[i2] or self.I4[i2]:
                 if self.errors[i2] > self.b_low:
                     self.b_low = self.errors[i2]
                     self.b_low_idx = i2
@@ -235,17 +669,17 @@ class SMOClassifier(SMO):
         return True
 
     def _examine_example(self, i2):
-        if i2 in self.I0:
+        if self.I0[i2]:
             E2 = self.errors[i2]
         else:
             E2 = (self.alphas * self.y).dot(self.K[i2]) - self.y[i2]
             self.errors[i2] = E2
 
             # update (b_up, b_up_idx) or (b_low, b_low_idx) using E2 and i2
-            if (i2 in self.I1 or i2 in self.I2) and E2 < self.b_up:
+            if (self.I1[i2] or self.I2[i2]) and E2 < self.b_up:
                 self.b_up = E2
                 self.b_up_idx = i2
-            elif (i2 in self.I3 or i2 in self.I4) and E2 > self.b_low:
+            elif (self.I3[i2] or self.I4[i2]) and E2 > self.b_low:
                 self.b_low = E2
                 self.b_low_idx = i2
 
@@ -253,11 +687,11 @@ class SMOClassifier(SMO):
         # find another index i1 to do joint optimization with i2
         i1 = -1
         optimal = True
-        if i2 in self.I0 or i2 in self.I1 or i2 in self.I2:
+        if self.I0[i2] or self.I1[i2] or self.I2[i2]:
             if self.b_low - E2 > 2 * self.tol:
                 optimal = False
                 i1 = self.b_low_idx
-        if i2 in self.I0 or i2 in self.I3 or i2 in self.I4:
+        if self.I0[i2] or self.I3[i2] or self.I4[i2]:
             if E2 - self.b_up > 2 * self.tol:
                 optimal = False
                 i1 = self.b_up_idx
@@ -266,7 +700,7 @@ class SMOClassifier(SMO):
             return False
 
         # for i2 in I0 choose the better i1
-        if i2 in self.I0:
+        if self.I0[i2]:
             if self.b_low - E2 > E2 - self.b_up:
                 i1 = self.b_low_idx
             else:
@@ -275,46 +709,24 @@ class SMOClassifier(SMO):
         if i1 == -1:
             raise Exception('the index could not be found')
 
-        return self._take_step(i1, i2)
-
-    def minimize(self):
-        if self.verbose:
-            print('iter\t cost')
-
-        num_changed = 0
-        examine_all = True
-        loop_counter = 0
-        while num_changed > 0 or examine_all:
-            num_changed = 0
-            # loop over all training examples
-            if examine_all:
-                for i in range(len(self.X)):
-                    num_changed += self._examine_example(i)
-            else:
-                # loop over examples where alphas are not already at their limits
-                for i in range(len(self.X)):
-                    if 0 < self.alphas[i] < self.C:
-                        num_changed += self._examine_example(i)
-                        # check if optimality on I0 is attained
-                        if self.b_up > self.b_low - 2 * self.tol:
-                            num_changed = 0
-                            break
-            if examine_all:
-                examine_all = False
-            elif num_changed == 0:
-                examine_all = True
-
-            if self.verbose and not loop_counter % self.verbose:
-                print('{:4d}\t{: 1.4e}'.format(loop_counter, self.quad.function(self.alphas)))
-
-            loop_counter += 1
-
-        self.b = -(self.b_low + self.b_up) / 2
+        if self.working_set == 'second_order':
+            j1 = self._select_second_order(i2,
+                                           E2 if self.I0[i2] or self.I1[i2] or self.I2[i2] else None,
+                                           E2 if self.I0[i2] or self.I3[i2] or self.I4[i2] else None)
+            # fall back to the first order partner if no progress is made
+            if j1 != i1 and self._take_step(j1, i2):
+                return True
 
-        if self.verbose:
-            print()
+        return self._take_step(i1, i2)
 
-        return self
+    def _dual_objective(self):
+        if self.quad is not None:
+            return self.quad.function(self.alphas)
+        # 1/2 alphas^T Q alphas - e^T alphas with Q = K * y y^T,
+        # computed by the kernel rows of the support vectors only
+        alphas_y = self.alphas * self.y
+        return (0.5 * sum(alphas_y[i] * alphas_y.dot(self.K[i]) for i in np.flatnonzero(self.alphas)) -
+                np.sum(self.alphas))
 
 
 class SMORegression(SMO):
@@ -342,25 +754,27 @@ class SMORegression(SMO):
     Algorithm for SVM Regression. Technical Report CD-99-16.
     """
 
-    def __init__(self, quad, X, y, K, kernel=gaussian, C=1., epsilon=0.1, tol=1e-3, verbose=False):
+    def __init__(self, quad, X, y, K, kernel=gaussian, C=1., epsilon=0.1, tol=1e-3, working_set='first_order',
+                 shrinking=True, max_iter=1000, max_time=None, verbose=False):
         self.alphas_p = np.zeros(len(X))
         self.alphas_n = np.zeros(len(X))
-        super().__init__(quad, X, y, K, kernel, C, tol, verbose)
+        super().__init__(quad, X, y, K, kernel, C, tol, working_set, shrinking, max_iter, max_time, verbose)
         self.epsilon = epsilon
 
         # initialize variables and structures to implement improvements
         # on the original Smola and Scholkopf SMO algorithm described in
         # Shevade et al. for better performance ed efficiency
 
-        # set of indices
+        # set of indices, kept as boolean masks so that the error cache
+        # update and the thresholds search are vectorized over them
         # {i : 0 < alphas_p[i] < C, 0 < alphas_n[i] < C}
-        self.I0 = set()
+        self.I0 = np.zeros(len(X), dtype=bool)
         # {i : alphas_p[i] = 0, alphas_n[i] = 0}
-        self.I1 = set(range(len(X)))
+        self.I1 = np.ones(len(X), dtype=bool)
         # {i : alphas_p[i] = 0, alphas_n[i] = C}
-        self.I2 = set()
+        self.I2 = np.zeros(len(X), dtype=bool)
         # {i : alphas_p[i] = C, alphas_n[i] = 0}
-        self.I3 = set()
+        self.I3 = np.zeros(len(X), dtype=bool)
 
         # multiple thresholds
         self.b_up_idx = 0
@@ -368,6 +782,64 @@ class SMORegression(SMO):
         self.b_up = y[self.b_up_idx] + self.epsilon
         self.b_low = y[self.b_low_idx] - self.epsilon
 
+    def warm_start(self, alphas_p, alphas_n):
+        """
+        Start the optimization from the multipliers ``alphas_p`` and ``alphas_n``,
+        e.g., the solution of the same problem for a different C, clipped into
+        the box [0, C], with at most one of them nonzero for each example.
+
+        :param alphas_p: the initial multipliers of the upper constraints.
+        :param alphas_n: the initial multipliers of the lower constraints.
+        :return: self
+        """
+        # keep the net multipliers, and so the equality constraint, since
+        # a nonzero pair can be both reduced without changing the model
+        alphas = np.asarray(alphas_p) - np.asarray(alphas_n)
+        self.alphas_p = self._clip(np.maximum(alphas, 0))
+        self.alphas_n = self._clip(np.maximum(-alphas, 0))
+
+        self.I0 = (((self.alphas_p > 0) & (self.alphas_p < self.C)) |
+                   ((self.alphas_n > 0) & (self.alphas_n < self.C)))
+        self.I1 = (self.alphas_p == 0) & (self.alphas_n == 0)
+        self.I2 = (self.alphas_p == 0) & (self.alphas_n == self.C)
+        self.I3 = (self.alphas_p == self.C) & (self.alphas_n == 0)
+
+        if isinstance(self.kernel, LinearKernel):
+            self.w = (self.alphas_p - self.alphas_n).dot(self.X)
+
+        self._warm_start()
+        return self
+
+    def _free_errors(self, idx):
+        # each i in I0 has either alphas_p[i] or alphas_n[i] in (0, C)
+        alphas_p = self.alphas_p[idx]
+        return np.where(np.logical_and(alphas_p > 0, alphas_p < self.C),
+                        self.errors[idx] - self.epsilon,
+                        self.errors[idx] + self.epsilon)
+
+    def _intercept(self):
+        return (self.b_low + self.b_up) / 2
+
+    def _problem_params(self):
+        return {**super()._problem_params(), 'epsilon': self.epsilon}
+
+    def _state_names(self):
+        return super()._state_names() + ['alphas_p', 'alphas_n']
+
+    def _up_low_errors(self):
+        F_up = np.full(len(self.errors), np.inf)
+        F_low = np.full(len(self.errors), -np.inf)
+        I0 = np.flatnonzero(self.I0)
+        F_up[I0] = F_low[I0] = self._free_errors(I0)
+        F_up[self.I1] = self.errors[self.I1] + self.epsilon
+        F_low[self.I1] = self.errors[self.I1] - self.epsilon
+        F_low[self.I2] = self.errors[self.I2] + self.epsilon
+        F_up[self.I3] = self.errors[self.I3] - self.epsilon
+        return F_up, F_low
+
+    def _reconstruct_errors(self, idx):
+        self.errors[idx] = self.y[idx] - self._kernel_expansion(self.alphas_p - self.alphas_n, idx)
+
     def _take_step(self, i1, i2):
         # skip if chosen alphas are the same
         if i1 == i2:
@@ -379,9 +851,11 @@ class SMORegression(SMO):
         alpha2_p, alpha2_n = self.alphas_p[i2], self.alphas_n[i2]
         E2 = self.errors[i2]
 
+        K1, K2 = self.K[i1], self.K[i2]
+
         # compute kernel and 2nd derivative eta
         # based on equation 15 in Platt's paper
-        eta = self.K[i1, i1] + self.K[i2, i2] - 2 * self.K[i1, i2]
+        eta = self.K_diag[i1] + self.K_diag[i2] - 2 * K1[i2]
 
         if eta < 0:
             eta = 0
@@ -501,16 +975,15 @@ class SMORegression(SMO):
                        ((self.alphas_p[i2] - self.alphas_n[i2]) - (alpha2_p - alpha2_n)) * self.X[i2])
 
         # update error cache using new alphas
-        for i in self.I0:
-            if i != i1 and i != i2:
-                self.errors[i] += (
-                        ((self.alphas_p[i1] - self.alphas_n[i1]) - (alpha1_p - alpha1_n)) * self.K[i1, i] +
-                        ((self.alphas_p[i2] - self.alphas_n[i2]) - (alpha2_p - alpha2_n)) * self.K[i2, i])
+        I0 = self.I0.copy()
+        I0[[i1, i2]] = False
+        self.errors[I0] += (((self.alphas_p[i1] - self.alphas_n[i1]) - (alpha1_p - alpha1_n)) * K1[I0] +
+                            ((self.alphas_p[i2] - self.alphas_n[i2]) - (alpha2_p - alpha2_n)) * K2[I0])
         # update error cache using new alphas for i1 and i2
-        self.errors[i1] += (((self.alphas_p[i1] - self.alphas_n[i1]) - (alpha1_p - alpha1_n)) * self.K[i1, i1] +
-                            ((self.alphas_p[i2] - self.alphas_n[i2]) - (alpha2_p - alpha2_n)) * self.K[i1, i2])
-        self.errors[i2] += (((self.alphas_p[i1] - self.alphas_n[i1]) - (alpha1_p - alpha1_n)) * self.K[i1, i2] +
-                            ((self.alphas_p[i2] - self.alphas_n[i2]) - (alpha2_p - alpha2_n)) * self.K[i2, i2])
+        self.errors[i1] += (((self.alphas_p[i1] - self.alphas_n[i1]) - (alpha1_p - alpha1_n)) * self.K_diag[i1] +
+                            ((self.alphas_p[i2] - self.alphas_n[i2]) - (alpha2_p - alpha2_n)) * K1[i2])
+        self.errors[i2] += (((self.alphas_p[i1] - self.alphas_n[i1]) - (alpha1_p - alpha1_n)) * K1[i2] +
+                            ((self.alphas_p[i2] - self.alphas_n[i2]) - (alpha2_p - alpha2_n)) * self.K_diag[i2])
 
         # to prevent precision problems
         if alpha1_p > self.C - 1e-10 * self.C:
@@ -539,22 +1012,10 @@ class SMORegression(SMO):
 
         # update the sets of indices for i1 and i2
         for i in (i1, i2):
-            if 0 < self.alphas_p[i] < self.C or 0 < self.alphas_n[i] < self.C:
-                self.I0.add(i)
-            else:
-                self.I0.discard(i)
-            if self.alphas_p[i] == 0 and self.alphas_n[i] == 0:
-                self.I1.add(i)
-            else:
-                self.I1.discard(i)
-            if self.alphas_p[i] == 0 and self.alphas_n[i] == self.C:
-                self.I2.add(i)
-            else:
-                self.I2.discard(i)
-            if self.alphas_p[i] == self.C and self.alphas_n[i] == 0:
-                self.I3.add(i)
-            else:
-                self.I3.discard(i)
+            self.I0[i] = 0 < self.alphas_p[i] < self.C or 0 < self.alphas_n[i] < self.C
+            self.I1[i] = self.alphas_p[i] == 0 and self.alphas_n[i] == 0
+            self.I2[i] = self.alphas_p[i] == 0 and self.alphas_n[i] == self.C
+            self.I3[i] = self.alphas_p[i] == self.C and self.alphas_n[i] == 0
 
         # update thresholds
         self.b_up_idx = -1
@@ -562,34 +1023,26 @@ class SMORegression(SMO):
         self.b_up = sys.float_info.max
         self.b_low = -sys.float_info.max
 
-        for i in self.I0:
-            if 0 < self.alphas_p[i] < self.C and self.errors[i] - self.epsilon > self.b_low:
-                self.b_low = self.errors[i] - self.epsilon
-                self.b_low_idx = i
-            elif 0 < self.alphas_n[i] < self.C and self.errors[i] + self.epsilon > self.b_low:
-                self.b_low = self.errors[i] + self.epsilon
-                self.b_low_idx = i
-
-            if 0 < self.alphas_p[i] < self.C and self.errors[i] - self.epsilon < self.b_up:
-                self.b_up = self.errors[i] - self.epsilon
-                self.b_up_idx = i
-            elif 0 < self.alphas_n[i] < self.C and self.errors[i] + self.epsilon < self.b_up:
-                self.b_up = self.errors[i] + self.epsilon
-                self.b_up_idx = i
+        I0 = np.flatnonzero(self.I0)
+        if I0.size:
+            errors = self._free_errors(I0)
+            low, up = np.argmax(errors), np.argmin(errors)
+            self.b_low, self.b_low_idx = errors[low], I0[low]
+            self.b_up, self.b_up_idx = errors[up], I0[up]
 
         for i in (i1, i2):
-            if i not in self.I0:
-                if i in self.I2 and self.errors[i] + self.epsilon > self.b_low:
+            if not self.I0[i]:
+                if self.I2[i] and self.errors[i] + self.epsilon > self.b_low:
                     self.b_low = self.errors[i] + self.epsilon
                     self.b_low_idx = i
-                elif i in self.I1 and self.errors[i] - self.epsilon > self.b_low:
+                elif self.I1[i] and self.errors[i] - self.epsilon > self.b_low:
                     self.b_low = self.errors[i] - self.epsilon
                     self.b_low_idx = i
 
-                if i in self.I3 and self.errors[i] - self.epsilon < self.b_up:
+                if self.I3[i] and self.errors[i] - self.epsilon < self.b_up:
                     self.b_up = self.errors[i] - self.epsilon
                     self.b_up_idx = i
-                elif i in self.I1 and self.errors[i] + self.epsilon < self.b_up:
+                elif self.I1[i] and self.errors[i] + self.epsilon < self.b_up:
                     self.b_up = self.errors[i] + self.epsilon
                     self.b_up_idx = i
 
@@ -601,22 +1054,22 @@ class SMORegression(SMO):
     def _examine_example(self, i2):
         alpha2_p, alpha2_n = self.alphas_p[i2], self.alphas_n[i2]
 
-        if i2 in self.I0:
+        if self.I0[i2]:
             E2 = self.errors[i2]
         else:
             E2 = self.y[i2] - (self.alphas_p - self.alphas_n).dot(self.K[i2])
             self.errors[i2] = E2
-            if i2 in self.I1:
+            if self.I1[i2]:
                 if E2 + self.epsilon < self.b_up:
                     self.b_up = E2 + self.epsilon
                     self.b_up_idx = i2
                 elif E2 - self.epsilon > self.b_low:
                     self.b_low = E2 - self.epsilon
                     self.b_low_idx = i2
-            elif i2 in self.I2 and E2 + self.epsilon > self.b_low:
+            elif self.I2[i2] and E2 + self.epsilon > self.b_low:
                 self.b_low = E2 + self.epsilon
                 self.b_low_idx = i2
-            elif i2 in self.I3 and E2 - self.epsilon < self.b_up:
+            elif self.I3[i2] and E2 - self.epsilon < self.b_up:
                 self.b_up = E2 - self.epsilon
                 self.b_up_idx = i2
 
@@ -624,7 +1077,7 @@ class SMORegression(SMO):
         # find another index i1 to do joint optimization with i2
         i1 = -1
         optimal = True
-        if i2 in self.I0:
+        if self.I0[i2]:
             if 0 < alpha2_p < self.C:
                 if self.b_low - (E2 - self.epsilon) > 2 * self.tol:
                     optimal = False
@@ -647,7 +1100,7 @@ class SMORegression(SMO):
                     i1 = self.b_up_idx
                     if self.b_low - (E2 + self.epsilon) > (E2 + self.epsilon) - self.b_up:
                         i1 = self.b_low_idx
-        elif i2 in self.I1:
+        elif self.I1[i2]:
             if self.b_low - (E2 + self.epsilon) > 2 * self.tol:
                 optimal = False
                 i1 = self.b_low_idx
@@ -658,11 +1111,11 @@ class SMORegression(SMO):
                 i1 = self.b_up_idx
                 if self.b_low - (E2 - self.epsilon) > (E2 - self.epsilon) - self.b_up:
                     i1 = self.b_low_idx
-        elif i2 in self.I2:
+        elif self.I2[i2]:
             if (E2 + self.epsilon) - self.b_up > 2 * self.tol:
                 optimal = False
                 i1 = self.b_up_idx
-        elif i2 in self.I3:
+        elif self.I3[i2]:
             if self.b_low - (E2 - self.epsilon) > 2 * self.tol:
                 optimal = False
                 i1 = self.b_low_idx
@@ -672,44 +1125,28 @@ class SMORegression(SMO):
         if optimal:
             return False
 
-        return self._take_step(i1, i2)
+        if self.working_set == 'second_order':
+            if self.I0[i2]:
+                F2 = E2 - self.epsilon if 0 < alpha2_p < self.C else E2 + self.epsilon
+                j1 = self._select_second_order(i2, F2, F2)
+            elif self.I1[i2]:
+                j1 = self._select_second_order(i2, E2 + self.epsilon, E2 - self.epsilon)
+            elif self.I2[i2]:
+                j1 = self._select_second_order(i2, None, E2 + self.epsilon)
+            else:  # I3
+                j1 = self._select_second_order(i2, E2 - self.epsilon, None)
+            # fall back to the first order partner if no progress is made
+            if j1 != i1 and self._take_step(j1, i2):
+                return True
 
-    def minimize(self):
-        if self.verbose:
-            print('iter\t cost')
-
-        num_changed = 0
-        examine_all = True
-        loop_counter = 0
-        while num_changed > 0 or examine_all:
-            num_changed = 0
-            # loop over all training examples
-            if examine_all:
-                for i in range(len(self.X)):
-                    num_changed += self._examine_example(i)
-            else:
-                # loop over examples where alphas are not already at their limits
-                for i in range(len(self.X)):
-                    if 0 < self.alphas_p[i] < self.C or 0 < self.alphas_n[i] < self.C:
-                        num_changed += self._examine_example(i)
-                        # check if optimality on I0 is attained
-                        if self.b_up > self.b_low - 2 * self.tol:
-                            num_changed = 0
-                            break
-            if examine_all:
-                examine_all = False
-            elif num_changed == 0:
-                examine_all = True
-
-            if self.verbose and not loop_counter % self.verbose:
-                print('{:4d}\t{: 1.4e}'.format(
-                    loop_counter, self.quad.function(np.hstack((self.alphas_p, self.alphas_n)))))
-
-            loop_counter += 1
-
-        self.b = (self.b_low + self.b_up) / 2
-
-        if self.verbose:
-            print()
+        return self._take_step(i1, i2)
 
-        return self
+    def _dual_objective(self):
+        if self.quad is not None:
+            return self.quad.function(np.hstack((self.alphas_p, self.alphas_n)))
+        # 1/2 (alphas_p - alphas_n)^T K (alphas_p - alphas_n) - y^T (alphas_p - alphas_n)
+        # + epsilon e^T (alphas_p + alphas_n), computed by the kernel rows of the
+        # support vectors only
+        beta = self.alphas_p - self.alphas_n
+        return (0.5 * sum(beta[i] * beta.dot(self.K[i]) for i in np.flatnonzero(beta)) -
+                self.y.dot(beta) + self.epsilon * np.sum(self.alphas_p + self.alphas_n))
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from optiml.ml.svm.kernel_approximation import Nystroem, RandomFourierFeatures, TensorSketch
+from optiml.ml.svm.kernels import poly, gaussian, GaussianKernel, PolyKernel
+
+
+def test_nystroem_exact_with_all_landmarks():
+    X = np.random.RandomState(1).randn(50, 5)
+    for kernel in (poly, gaussian):
+        for landmarks in ('uniform', 'kmeans++', 'leverage'):
+            nys = Nystroem(kernel=kernel, n_components=50, landmarks=landmarks, random_state=1).fit(X)
+            Z = nys.transform(X)
+            assert Z.shape == (50, 50)
+            assert np.allclose(np.dot(Z, Z.T), nys.kernel_(X), atol=1e-6)
+
+
+def test_nystroem_approximation():
+    X = np.random.RandomState(1).randn(500, 5)
+    K = GaussianKernel().fit(X)(X)
+    for landmarks in ('uniform', 'kmeans++', 'leverage'):
+        nys = Nystroem(kernel=gaussian, n_components=200, landmarks=landmarks, random_state=1).fit(X)
+        Z = nys.transform(X)
+        assert len(np.unique(nys.component_indices_)) == 200
+        assert np.linalg.norm(K - np.dot(Z, Z.T)) / np.linalg.norm(K) < 0.1
+
+
+def test_random_fourier_features():
+    X = np.random.RandomState(1).randn(200, 5)
+    rff = RandomFourierFeatures(kernel=GaussianKernel(gamma=0.1), n_components=5000, random_state=1).fit(X)
+    Z = rff.transform(X)
+    assert Z.shape == (200, 5000)
+    K = rff.kernel_(X)
+    assert np.linalg.norm(K - np.dot(Z, Z.T)) / np.linalg.norm(K) < 0.05
+    with pytest.raises(TypeError):
+        RandomFourierFeatures(kernel=poly)
+
+
+def test_tensor_sketch():
+    X = np.random.RandomState(1).randn(200, 5)
+    ts = TensorSketch(kernel=PolyKernel(degree=3, coef0=0.5), n_components=8192, random_state=1).fit(X)
+    Z = ts.transform(X)
+    assert Z.shape == (200, 8192)
+    K = ts.kernel_(X)
+    assert np.linalg.norm(K - np.dot(Z, Z.T)) / np.linalg.norm(K) < 0.05
+    with pytest.raises(TypeError):
+        TensorSketch(kernel=gaussian)
+    with pytest.raises(ValueError):
+        TensorSketch(kernel=PolyKernel(degree=2.5))
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,147 @@
+import numpy as np
+import pytest
+from sklearn.base import clone
+
+from optiml.ml.svm.kernels import (GaussianKernel, KernelRowCache, KernelMatrixCache, SquaredDistanceCache,
+                                   squared_euclidean_distances)
+from optiml.ml.svm.kernels import linear, poly, gaussian, sigmoid
+
+
+def test_squared_euclidean_distances():
+    rs = np.random.RandomState(1)
+    X, Y = rs.randn(50, 10), rs.randn(30, 10)
+    assert np.allclose(squared_euclidean_distances(X, Y),
+                       np.linalg.norm(X[:, np.newaxis] - Y[np.newaxis, :], axis=2) ** 2)
+    D = squared_euclidean_distances(X)
+    assert np.allclose(D, np.linalg.norm(X[:, np.newaxis] - X[np.newaxis, :], axis=2) ** 2)
+    assert np.all(np.diag(D) == 0.) and np.all(D >= 0.)
+
+
+def test_gaussian_kernel():
+    rs = np.random.RandomState(1)
+    X, Y = rs.randn(50, 10), rs.randn(30, 10)
+    gamma = 1. / (X.shape[1] * X.var())
+    assert np.allclose(gaussian(X, Y),
+                       np.exp(-gamma * np.linalg.norm(X[:, np.newaxis] - Y[np.newaxis, :], axis=2) ** 2))
+    assert np.allclose(np.diag(gaussian(X)), 1.)
+
+
+def test_fitted_kernel():
+    rs = np.random.RandomState(1)
+    X, Y = rs.randn(50, 10), 3 * rs.randn(30, 10)
+    kernel = GaussianKernel().fit(X)
+    assert kernel.gamma_ == 1. / (X.shape[1] * X.var())
+    # gamma is frozen on X and not computed again from Y
+    assert np.allclose(kernel(Y), np.exp(-kernel.gamma_ * squared_euclidean_distances(Y)))
+    assert np.allclose(kernel.matrix(Y, max_tile_bytes=1000), kernel(Y))
+    assert not np.allclose(GaussianKernel()(Y), kernel(Y))
+
+
+def test_tiled_kernel_matrix():
+    rs = np.random.RandomState(1)
+    X, Y = rs.randn(50, 10), rs.randn(30, 10)
+    for kernel in (gaussian, poly, sigmoid):
+        # the budget fits less than a row so tiles are split by columns too
+        for max_tile_bytes in (2 ** 20, 1000, 100):
+            assert np.allclose(kernel.matrix(X, max_tile_bytes=max_tile_bytes, n_jobs=2), kernel(X))
+            out = np.zeros((50, 30))
+            assert kernel.matrix(X, Y, out=out, max_tile_bytes=max_tile_bytes, n_jobs=2) is out
+            assert np.allclose(out, kernel(X, Y))
+            K = np.zeros((50, 30))
+            for rows, cols, tile in kernel.tiles(X, Y, max_tile_bytes=max_tile_bytes, n_jobs=2):
+                assert tile.nbytes <= max_tile_bytes
+                K[rows, cols] = tile
+            assert np.allclose(K, kernel(X, Y))
+        # an empty matrix has no tiles
+        assert not list(kernel.tiles(X[:0], Y, max_tile_bytes=1000))
+        assert kernel.matrix(X, Y[:0], max_tile_bytes=1000).shape == (50, 0)
+
+
+def test_kernel_diag():
+    X = np.random.RandomState(1).randn(50, 10)
+    for kernel in (linear, poly, gaussian, sigmoid):
+        assert np.allclose(kernel.diag(X), np.diag(kernel(X)))
+
+
+def test_kernel_row_cache():
+    X = np.random.RandomState(1).randn(50, 10)
+    K = gaussian(X)
+    # the budget fits 10 rows of 50 float64 entries
+    cache = KernelRowCache(gaussian, X, cache_size=10 * 50 * 8 / 2 ** 20)
+    assert cache.max_rows == 10
+    assert np.allclose(cache.diagonal(), np.diag(K))
+    for i in range(20):
+        assert np.allclose(cache[i], K[i])
+    assert cache.hits == 0 and cache.misses == 20
+    for i in range(10, 20):
+        assert np.allclose(cache[i], K[i])
+    assert cache.hits == 10 and cache.misses == 20
+    # the least recently used rows have been evicted
+    assert np.allclose(cache[0], K[0])
+    assert cache.misses == 21
+
+
+def test_kernel_row_cache_append_and_remove():
+    rs = np.random.RandomState(1)
+    X, X_new = rs.randn(50, 10), rs.randn(10, 10)
+    cache = KernelRowCache(gaussian, X)
+    for i in range(20):
+        cache[i]
+    # the kernel hyperparameters are frozen on the first examples
+    K = cache.kernel(np.vstack((X, X_new)))
+    cache.append(X_new)
+    assert cache.shape == (60, 60) and np.allclose(cache.diagonal(), np.diag(K))
+    assert np.allclose(cache[5], K[5]) and np.allclose(cache[55], K[55])
+    assert cache.misses == 21
+    idx = [0, 3, 52]
+    keep = np.delete(np.arange(60), idx)
+    cache.remove(idx)
+    assert cache.shape == (57, 57) and np.allclose(cache.diagonal(), np.diag(K)[keep])
+    # the cached rows are reindexed
+    for i in range(17):
+        assert np.allclose(cache[i], K[keep[i]][keep])
+    assert cache.misses == 21
+
+
+def test_kernel_matrix_cache(tmp_path):
+    rs = np.random.RandomState(1)
+    X, Y = rs.randn(50, 10), rs.randn(40, 10)
+    # the budget fits only one of the two matrices
+    cache = KernelMatrixCache(max_bytes=50 * 50 * 8)
+    K = cache.matrix(gaussian, X)
+    assert np.allclose(K, gaussian(X)) and not K.flags.writeable
+    assert cache.matrix(gaussian, X) is K
+    assert not np.allclose(cache.matrix(GaussianKernel(gamma=1.), X), K)
+    assert cache.hits == 1 and cache.misses == 2
+    cache.matrix(gaussian, Y)
+    assert cache.misses == 3 and len(cache) == 1
+    # the evicted matrices are spilled to the disk and memory-mapped back
+    cache = KernelMatrixCache(max_bytes=0, directory=tmp_path)
+    cache.matrix(gaussian, X, max_tile_bytes=1000)
+    K = cache.matrix(gaussian, X)
+    assert isinstance(K, np.memmap) and np.allclose(K, gaussian(X))
+    assert cache.hits == 1 and cache.misses == 1 and len(cache) == 0
+
+
+def test_squared_distance_cache(tmp_path):
+    X = np.random.RandomState(1).randn(50, 10)
+    cache = SquaredDistanceCache()
+    for gamma in (0.1, 1., 10., 'scale'):
+        kernel = GaussianKernel(gamma=gamma, distance_cache=cache)
+        K = kernel(X)
+        assert np.allclose(K, GaussianKernel(gamma=gamma)(X)) and K.flags.writeable
+        assert np.allclose(kernel.matrix(X, max_tile_bytes=1000), K)
+        assert np.allclose(kernel(X, X[:10]), K[:, :10])
+    # the distances are computed only once for all the gammas
+    assert cache.hits == 7 and cache.misses == 1 and len(cache) == 1
+    # the cache is shared, not copied, by the clones of the kernel
+    assert clone(GaussianKernel(distance_cache=cache)).distance_cache is cache
+    # the distances too large to be kept in memory are memory-mapped from the disk
+    cache = SquaredDistanceCache(max_bytes=0, directory=tmp_path)
+    K = GaussianKernel(gamma=1., distance_cache=cache).matrix(X, max_tile_bytes=1000)
+    assert np.allclose(K, GaussianKernel(gamma=1.)(X))
+    assert isinstance(cache.distances(X), np.memmap) and cache.hits == 1 and cache.misses == 1
+
+
+if __name__ == "__main__":
+    pytest.main()
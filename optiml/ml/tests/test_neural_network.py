@@ -56,5 +56,20 @@ def test_neural_network_classifier():
     assert net.score(X_test, ohe.transform(y_test.reshape(-1, 1))) >= 0.95
 
 
+def test_neural_network_predict_in_batches():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    ohe = OneHotEncoder(sparse=False).fit(y.reshape(-1, 1))
+    net = NeuralNetworkClassifier((FullyConnected(4, 4, sigmoid),
+                                   FullyConnected(4, 3, softmax)),
+                                  loss=categorical_cross_entropy, optimizer=Adam, max_iter=10)
+    net.fit(X_scaled, ohe.transform(y.reshape(-1, 1)))
+    # the inference does not overwrite the activations cached for backward
+    X_cached = net.layers[0]._X
+    y_pred = net.predict(X_scaled, batch_size=16, n_jobs=2)
+    assert net.layers[0]._X is X_cached
+    assert np.array_equal(y_pred, net.predict(X_scaled))
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from sklearn.datasets import load_iris, load_boston
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler, MinMaxScaler, OneHotEncoder
+
+from optiml.ml.neural_network import NeuralNetworkClassifier
+from optiml.ml.neural_network.activations import sigmoid, softmax
+from optiml.ml.neural_network.layers import FullyConnected
+from optiml.ml.neural_network.losses import categorical_cross_entropy
+from optiml.ml.persistence import save_model, load_model
+from optiml.ml.svm import PrimalSVC, DualSVC, DualSVR
+from optiml.ml.svm.kernels import gaussian, linear
+from optiml.ml.svm.losses import squared_hinge
+from optiml.opti.unconstrained.line_search import BFGS
+from optiml.opti.unconstrained.stochastic import Adam
+
+
+def test_save_and_load_svc(tmp_path):
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svc = DualSVC(kernel=gaussian, multi_class='ovo').fit(X_train, y_train)
+    save_model(svc, tmp_path / 'svc.optiml')
+    loaded = load_model(tmp_path / 'svc.optiml')
+    assert isinstance(loaded.support_vectors_, np.memmap)
+    assert loaded.support_vectors_.ctypes.data % 64 == 0
+    assert loaded.kernel.gamma_ == svc.kernel.gamma_
+    assert np.allclose(loaded.decision_function(X_test), svc.decision_function(X_test))
+    assert np.array_equal(loaded.predict(X_test), svc.predict(X_test))
+    svc = PrimalSVC(loss=squared_hinge, optimizer=BFGS).fit(X_train, y_train)
+    save_model(svc, tmp_path / 'svc.optiml')
+    loaded = load_model(tmp_path / 'svc.optiml', mmap_mode=None)
+    assert np.array_equal(loaded.predict(X_test), svc.predict(X_test))
+
+
+def test_save_and_load_svr(tmp_path):
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svr = DualSVR(kernel=linear).fit(X_train, y_train)
+    save_model(svr, tmp_path / 'svr.optiml')
+    assert np.allclose(load_model(tmp_path / 'svr.optiml').predict(X_test), svr.predict(X_test))
+
+
+def test_save_and_load_neural_network(tmp_path):
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    ohe = OneHotEncoder(sparse=False).fit(y.reshape(-1, 1))
+    net = NeuralNetworkClassifier((FullyConnected(4, 4, sigmoid),
+                                   FullyConnected(4, 3, softmax)),
+                                  loss=categorical_cross_entropy, optimizer=Adam, max_iter=10)
+    net.fit(X_scaled, ohe.transform(y.reshape(-1, 1)))
+    save_model(net, tmp_path / 'net.optiml')
+    loaded = load_model(tmp_path / 'net.optiml')
+    assert loaded.layers[-1].activation is softmax
+    assert all(isinstance(coef, np.memmap) for coef in loaded.coefs_)
+    assert np.array_equal(loaded.predict(X_scaled), net.predict(X_scaled))
+
+
+def test_load_model_format_version(tmp_path):
+    X, y = load_iris(return_X_y=True)
+    svc = PrimalSVC(loss=squared_hinge, optimizer=BFGS).fit(X, y)
+    file = tmp_path / 'svc.optiml'
+    save_model(svc, file)
+    with open(file, 'r+b') as f:
+        f.seek(7)
+        f.write(bytes([2]))
+    with pytest.raises(ValueError):
+        load_model(file)
+    for model in (DualSVC(kernel=gaussian), DualSVR(kernel=linear), PrimalSVC(loss=squared_hinge)):
+        with pytest.raises(ValueError, match='is not fitted yet'):
+            save_model(model, file)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -1,15 +1,20 @@
+import numpy as np
 import pytest
-from sklearn.datasets import load_iris, load_boston
+import scipy.sparse as sp
+from sklearn.datasets import load_iris, load_boston, make_classification
+from sklearn.exceptions import ConvergenceWarning
 from sklearn.model_selection import train_test_split
 from sklearn.multiclass import OneVsRestClassifier
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 
-from optiml.ml.svm import PrimalSVC, DualSVC, PrimalSVR, DualSVR
-from optiml.ml.svm.kernels import linear, gaussian
+from optiml.ml.svm import PrimalSVC, DualSVC, PrimalSVR, DualSVR, CascadeSVC
+from optiml.ml.svm.dcd import DCDClassifier, DCDRegression
+from optiml.ml.svm.kernels import linear, gaussian, GaussianKernel, PolyKernel, KernelMatrixCache
+from optiml.ml.svm.smo import SMO
 from optiml.ml.svm.losses import hinge, squared_hinge, epsilon_insensitive, squared_epsilon_insensitive
 from optiml.opti.constrained import ProjectedGradient, ActiveSet, InteriorPoint, FrankWolfe
-from optiml.opti.unconstrained import ProximalBundle
-from optiml.opti.unconstrained.line_search import SteepestGradientDescent
+from optiml.opti.unconstrained import ProximalBundle, TrustRegionNewton
+from optiml.opti.unconstrained.line_search import SteepestGradientDescent, BFGS
 from optiml.opti.unconstrained.stochastic import StochasticGradientDescent, AdaGrad
 
 
@@ -40,6 +45,26 @@ def test_solve_linear_svr_with_proximal_bundle_optimizer():
     assert svr.score(X_test, y_test) >= 0.77
 
 
+def test_solve_linear_svr_with_trust_region_newton():
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svr = PrimalSVR(loss=squared_epsilon_insensitive, optimizer=TrustRegionNewton)
+    svr.fit(X_train, y_train)
+    assert svr.optimizer.status == 'optimal'
+    assert svr.score(X_test, y_test) >= 0.77
+
+
+def test_solve_linear_svr_with_dual_coordinate_descent():
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svr = PrimalSVR(C=10., tol=1e-3, loss=epsilon_insensitive, optimizer=DCDRegression, random_state=1)
+    svr.fit(X_train, y_train)
+    assert svr.optimizer.status == 'optimal'
+    assert svr.score(X_test, y_test) >= 0.77
+
+
 def test_solve_svr_with_smo():
     X, y = load_boston(return_X_y=True)
     X_scaled = StandardScaler().fit_transform(X)
@@ -48,6 +73,41 @@ def test_solve_svr_with_smo():
     assert svr.score(X_test, y_test) >= 0.77
 
 
+def test_solve_svr_with_smo_second_order_working_set():
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svr = DualSVR(kernel=linear, working_set='second_order').fit(X_train, y_train)
+    assert svr.score(X_test, y_test) >= 0.77
+
+
+def test_solve_svr_with_nystroem_approximation():
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svr = DualSVR(kernel=gaussian, optimizer=BFGS, approximation='nystroem',
+                  n_components=100, random_state=1).fit(X_train, y_train)
+    assert svr.score(X_test, y_test) >= 0.77
+
+
+def test_solve_svr_with_random_fourier_features_approximation():
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svr = DualSVR(kernel=gaussian, optimizer=BFGS, approximation='random_fourier',
+                  n_components=300, random_state=1).fit(X_train, y_train)
+    assert svr.score(X_test, y_test) >= 0.77
+
+
+def test_solve_svr_with_tensor_sketch_approximation():
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svr = DualSVR(kernel=PolyKernel(degree=2, coef0=1.), optimizer=BFGS, approximation='tensor_sketch',
+                  n_components=300, random_state=1).fit(X_train, y_train)
+    assert svr.score(X_test, y_test) >= 0.77
+
+
 def test_solve_svr_as_bcqp_with_cvxopt():
     X, y = load_boston(return_X_y=True)
     X_scaled = StandardScaler().fit_transform(X)
@@ -64,6 +124,63 @@ def test_solve_svr_as_bcqp_with_projected_gradient():
     assert svr.score(X_test, y_test) >= 0.77
 
 
+def test_svr_intercept_from_dual_gradient():
+    X, y = load_boston(return_X_y=True)
+    X_scaled = np.asfortranarray(StandardScaler().fit_transform(X))
+    svr = DualSVR(kernel=linear, optimizer='cvxopt').fit(X_scaled, y)
+    assert svr.support_vectors_.flags['C_CONTIGUOUS']
+    residuals = (y[svr.support_] - np.dot(np.dot(svr.support_vectors_, svr.support_vectors_.T), svr.dual_coef_) -
+                 svr.epsilon * np.sign(svr.dual_coef_))
+    assert np.isclose(svr.intercept_, np.mean(residuals))
+
+
+def test_solve_svr_as_bcqp_out_of_core(tmp_path):
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svr = DualSVR(kernel=linear, optimizer=ProjectedGradient, memmap_dir=tmp_path,
+                  max_tile_bytes=2 ** 16).fit(X_train, y_train)
+    assert svr.score(X_test, y_test) >= 0.77
+
+
+def test_svr_predict_in_batches(tmp_path):
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svr = DualSVR(kernel=gaussian).fit(X_train, y_train)
+    out = np.lib.format.open_memmap(tmp_path / 'y_pred.npy', mode='w+', shape=(len(X_test),))
+    assert svr.predict(X_test, batch_size=10, n_jobs=2, out=out) is out
+    assert np.allclose(out, svr.predict(X_test))
+
+
+def test_svr_compress():
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svr = DualSVR(kernel=gaussian, random_state=1).fit(X_train, y_train)
+    compressed = svr.compress(len(svr.support_vectors_) // 4, X_test)
+    assert compressed.support_vectors_.shape == (len(svr.support_vectors_) // 4, X.shape[1])
+    assert compressed.compression_error_ <= 0.05
+    assert compressed.score(X_test, y_test) >= svr.score(X_test, y_test) - 0.02
+    assert not hasattr(compressed, 'alphas_p') and not hasattr(compressed, 'obj')
+    assert compressed.optimizer is type(svr.optimizer)
+
+
+def test_svr_dual_block_hessian():
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X)[:50]
+    svr = DualSVR(kernel=gaussian, optimizer=ProjectedGradient, max_iter=10).fit(X_scaled, y[:50])
+    K = svr.kernel(X_scaled)
+    A = np.hstack((np.ones(50), -np.ones(50)))
+    Q = np.vstack((np.hstack((K, -K)),
+                   np.hstack((-K, K)))) + np.outer(A, A)
+    x = np.random.RandomState(1).randn(100)
+    assert np.allclose(svr.obj.Q.dot(x), np.dot(Q, x))
+    assert np.allclose(svr.obj.Q.diagonal(), np.diag(Q))
+    assert np.allclose(svr.obj.Q[np.ix_(x > 0, x < 0)], Q[np.ix_(x > 0, x < 0)])
+    assert np.isclose(svr.obj.function(x), 0.5 * x.dot(Q).dot(x) + svr.obj.q.dot(x))
+
+
 def test_solve_svr_as_bcqp_with_active_set():
     X, y = load_boston(return_X_y=True)
     X_scaled = StandardScaler().fit_transform(X)
@@ -123,6 +240,38 @@ def test_solve_linear_svc_with_proximal_bundle_optimizer():
     assert svc.score(X_test, y_test) >= 0.57
 
 
+def test_solve_linear_svc_with_trust_region_newton():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svc = OneVsRestClassifier(PrimalSVC(loss=squared_hinge, optimizer=TrustRegionNewton))
+    svc.fit(X_train, y_train)
+    assert svc.score(X_test, y_test) >= 0.57
+    with pytest.raises(TypeError):
+        PrimalSVC(loss=hinge, optimizer=TrustRegionNewton)
+
+
+def test_solve_linear_svc_with_dual_coordinate_descent():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    for loss in (hinge, squared_hinge):
+        svc = OneVsRestClassifier(PrimalSVC(loss=loss, optimizer=DCDClassifier, random_state=1))
+        svc.fit(X_train, y_train)
+        assert svc.score(X_test, y_test) >= 0.57
+
+
+def test_linear_svc_dual_coordinate_descent_over_sparse_data():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    y = np.where(y == 2, 1, -1)
+    svc = PrimalSVC(loss=hinge, optimizer=DCDClassifier, random_state=1).fit(X_scaled, y)
+    sparse_svc = PrimalSVC(loss=hinge, optimizer=DCDClassifier, random_state=1).fit(sp.csr_matrix(X_scaled), y)
+    assert svc.optimizer.status == 'optimal'
+    assert np.allclose(sparse_svc.coef_, svc.coef_) and np.isclose(sparse_svc.intercept_, svc.intercept_)
+    assert np.array_equal(sparse_svc.predict(sp.csr_matrix(X_scaled)), svc.predict(X_scaled))
+
+
 def test_solve_svc_with_smo():
     X, y = load_iris(return_X_y=True)
     X_scaled = MinMaxScaler().fit_transform(X)
@@ -131,6 +280,260 @@ def test_solve_svc_with_smo():
     assert svc.score(X_test, y_test) >= 0.97
 
 
+def test_solve_svc_with_smo_second_order_working_set():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svc = OneVsRestClassifier(DualSVC(kernel=gaussian, working_set='second_order')).fit(X_train, y_train)
+    assert svc.score(X_test, y_test) >= 0.97
+
+
+def test_smo_second_order_working_set_falls_back_to_first_order(monkeypatch):
+    # the second order partner never makes progress, so every
+    # step must be taken with the maximal violating pair
+    monkeypatch.setattr(SMO, '_select_second_order', lambda self, i2, *args: i2)
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    y = np.where(y == 2, 1, -1)
+    svc = DualSVC(kernel=gaussian, working_set='second_order').fit(X_scaled, y)
+    assert svc.optimizer.status == 'optimal'
+    assert np.allclose(svc.decision_function(X_scaled),
+                       DualSVC(kernel=gaussian).fit(X_scaled, y).decision_function(X_scaled), atol=1e-2)
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X)
+    svr = DualSVR(kernel=linear, working_set='second_order').fit(X_scaled, y)
+    assert svr.optimizer.status == 'optimal'
+    assert svr.score(X_scaled, y) >= DualSVR(kernel=linear).fit(X_scaled, y).score(X_scaled, y) - 0.01
+
+
+def test_solve_svc_with_smo_and_tiled_kernel():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svc = OneVsRestClassifier(DualSVC(kernel=gaussian, max_tile_bytes=4096, n_jobs=2)).fit(X_train, y_train)
+    assert svc.score(X_test, y_test) >= 0.97
+    assert svc.estimators_[0].decision_function(X_test[:0]).shape == (0,)
+
+
+def test_svc_predict_in_batches():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svc = DualSVC(kernel=gaussian, multi_class='ovo').fit(X_train, y_train)
+    assert np.allclose(svc.decision_function(X_test, batch_size=7, n_jobs=2), svc.decision_function(X_test))
+    assert np.array_equal(svc.predict(X_test, batch_size=7), svc.predict(X_test))
+    assert svc.predict(X_test[:0], batch_size=10).shape == (0,)
+    assert svc.decision_function(X_test[:0], batch_size=10).shape == (0, 3)
+    with pytest.raises(ValueError):
+        svc.predict(X_test, out=np.empty(len(X_test) + 1))
+
+
+def test_svc_compress():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svc = DualSVC(kernel=gaussian, multi_class='ovo', random_state=1).fit(X_train, y_train)
+    compressed = svc.compress(len(svc.support_vectors_) // 3, X_test)
+    assert compressed.dual_coef_.shape == (3, len(svc.support_vectors_) // 3)
+    assert compressed.compression_error_ <= 0.05
+    assert np.array_equal(compressed.predict(X_test), svc.predict(X_test))
+    assert not hasattr(compressed, 'alphas') and not hasattr(compressed, 'estimators_')
+    assert compressed.optimizer is svc.optimizer
+    with pytest.raises(ValueError):
+        svc.compress(len(svc.support_vectors_))
+
+
+def test_solve_svc_with_smo_one_vs_one():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svc = DualSVC(kernel=gaussian, multi_class='ovo', n_jobs=2).fit(X_train, y_train)
+    assert len(svc.estimators_) == 3
+    assert svc.dual_coef_.shape == (3, len(svc.support_))
+    assert svc.decision_function(X_test).shape == (len(X_test), 3)
+    assert svc.score(X_test, y_test) >= 0.97
+
+
+def test_svc_one_vs_rest():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svc = DualSVC(kernel=linear, optimizer=ActiveSet, multi_class='ovr').fit(X_train, y_train)
+    ovr = OneVsRestClassifier(DualSVC(kernel=linear, optimizer=ActiveSet)).fit(X_train, y_train)
+    assert np.allclose(svc.decision_function(X_test), ovr.decision_function(X_test))
+    svc = PrimalSVC(loss=squared_hinge, optimizer=BFGS, multi_class='ovr', n_jobs=2).fit(X_train, y_train)
+    ovr = OneVsRestClassifier(PrimalSVC(loss=squared_hinge, optimizer=BFGS)).fit(X_train, y_train)
+    assert np.allclose(svc.decision_function(X_test), ovr.decision_function(X_test))
+
+
+def test_solve_svc_with_cascade():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    y = np.where(y == 2, 1, -1)
+    svc = DualSVC(kernel=gaussian, C=10.).fit(X_scaled, y)
+    cascade = CascadeSVC(kernel=gaussian, C=10., n_shards=4, random_state=1).fit(X_scaled, y)
+    assert cascade.n_passes_ < cascade.max_passes
+    # the feedback loop reaches the solution of the whole problem
+    assert np.array_equal(cascade.predict(X_scaled), svc.predict(X_scaled))
+    K = svc.kernel(X_scaled)
+    assert np.isclose(0.5 * cascade.dual_coef_ @ K[np.ix_(cascade.support_, cascade.support_)] @ cascade.dual_coef_ -
+                      np.sum(cascade.alphas), svc.optimizer._dual_objective(), rtol=1e-3)
+    # the split is stratified, so that each shard holds both the classes
+    # of imbalanced labels, even if they are less than the shards
+    X, y = make_classification(n_samples=40, weights=[0.925], flip_y=0, random_state=1)
+    y = np.where(y == 1, 1, -1)
+    assert np.count_nonzero(y == 1) == 3
+    svc = DualSVC(kernel=gaussian).fit(X, y)
+    cascade = CascadeSVC(kernel=gaussian, random_state=1).fit(X, y)
+    assert np.array_equal(cascade.predict(X), svc.predict(X))
+    with pytest.raises(ValueError, match='CascadeSVC supports only binary targets'):
+        CascadeSVC(kernel=gaussian).fit(X_scaled, load_iris(return_X_y=True)[1])
+
+
+def test_svc_smo_index_sets():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    y = np.where(y == 2, 1, -1)
+    smo = DualSVC(kernel=gaussian, C=10.).fit(X_scaled, y).optimizer
+    alphas, C = smo.alphas, smo.C
+    assert np.array_equal(smo.I0, np.logical_and(alphas > 0, alphas < C))
+    assert np.array_equal(smo.I1 | smo.I3, np.logical_and(smo.y == 1, ~smo.I0))
+    assert np.array_equal(smo.I2 | smo.I4, np.logical_and(smo.y == -1, ~smo.I0))
+    assert np.sum(smo.I0) + np.sum(smo.I1) + np.sum(smo.I2) + np.sum(smo.I3) + np.sum(smo.I4) == len(X)
+
+
+def test_svc_smo_shrinking():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    y = np.where(y == 2, 1, -1)
+    smo = DualSVC(kernel=gaussian, C=10., shrinking=False).fit(X_scaled, y).optimizer
+    shrunk_smo = DualSVC(kernel=gaussian, C=10., shrinking=True).fit(X_scaled, y).optimizer
+    # the shrunk multipliers are restored at the end
+    assert shrunk_smo.active.all()
+    assert np.isclose(shrunk_smo._dual_objective(), smo._dual_objective())
+    assert np.isclose(shrunk_smo.b, smo.b, atol=1e-3)
+
+
+def test_svc_smo_checkpoint(tmp_path):
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    y = np.where(y == 2, 1, -1)
+    checkpoint = tmp_path / 'smo.npz'
+    with pytest.warns(ConvergenceWarning):
+        svc = DualSVC(kernel=gaussian, C=10., max_iter=1, checkpoint=checkpoint).fit(X_scaled, y)
+    assert svc.optimizer.status == 'stopped' and checkpoint.exists()
+    # resume the optimization from the first loop over all the examples
+    svc = DualSVC(kernel=gaussian, C=10., checkpoint=checkpoint).fit(X_scaled, y)
+    assert svc.optimizer.status == 'optimal' and not checkpoint.exists()
+    smo = DualSVC(kernel=gaussian, C=10.).fit(X_scaled, y).optimizer
+    assert np.isclose(svc.optimizer._dual_objective(), smo._dual_objective())
+    # a checkpoint of a different problem is rejected
+    with pytest.warns(ConvergenceWarning):
+        DualSVC(kernel=gaussian, C=10., max_iter=1, checkpoint=checkpoint).fit(X_scaled, y)
+    with pytest.raises(ValueError):
+        DualSVC(kernel=GaussianKernel(gamma=1.), C=10., checkpoint=checkpoint).fit(X_scaled, y)
+    with pytest.raises(ValueError):
+        DualSVC(kernel=gaussian, C=10., checkpoint=checkpoint).fit(X_scaled[::-1], y[::-1])
+
+
+def test_svc_smo_fit_path():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    y = np.where(y == 2, 1, -1)
+    Cs = [10., 0.1, 1.]
+    svcs = DualSVC(kernel=gaussian).fit_path(X_scaled, y, Cs)
+    assert [svc.C for svc in svcs] == Cs
+    for svc, C in zip(svcs, Cs):
+        smo = DualSVC(kernel=gaussian, C=C).fit(X_scaled, y).optimizer
+        assert svc.optimizer.status == 'optimal'
+        assert np.isclose(svc.optimizer._dual_objective(), smo._dual_objective(), rtol=1e-3)
+    with pytest.raises(ValueError, match='fit_path of DualSVC supports only binary targets'):
+        DualSVC(kernel=gaussian).fit_path(X_scaled, load_iris(return_X_y=True)[1], Cs)
+
+
+def test_svc_fit_path_as_bcqp_with_active_set():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    y = np.where(y == 2, 1, -1)
+    Cs = [1., 0.1, 10.]
+    svcs = DualSVC(kernel=gaussian, optimizer=ActiveSet).fit_path(X_scaled, y, Cs)
+    for svc, C in zip(svcs, Cs):
+        bcqp = DualSVC(kernel=gaussian, C=C, optimizer=ActiveSet).fit(X_scaled, y).optimizer
+        assert svc.optimizer.status == 'optimal'
+        assert np.isclose(svc.optimizer.f_x, bcqp.f_x)
+
+
+def test_svc_smo_partial_fit():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    y = np.where(y == 2, 1, -1)
+    X_scaled, y = X_scaled[::-1], y[::-1]
+    svc = DualSVC(kernel=GaussianKernel(gamma=2.), C=10.).fit(X_scaled[:100], y[:100])
+    svc.partial_fit(X_scaled[100:], y[100:])
+    smo = DualSVC(kernel=GaussianKernel(gamma=2.), C=10.).fit(X_scaled, y).optimizer
+    assert svc.optimizer.status == 'optimal'
+    assert np.isclose(svc.optimizer._dual_objective(), smo._dual_objective(), rtol=1e-3)
+
+
+def test_svc_smo_remove_samples():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    y = np.where(y == 2, 1, -1)
+    svc = DualSVC(kernel=GaussianKernel(gamma=2.), C=10.).fit(X_scaled, y)
+    idx = svc.support_[:5]
+    svc.remove_samples(idx)
+    X_scaled, y = np.delete(X_scaled, idx, axis=0), np.delete(y, idx)
+    smo = DualSVC(kernel=GaussianKernel(gamma=2.), C=10.).fit(X_scaled, y).optimizer
+    assert svc.optimizer.status == 'optimal'
+    assert np.isclose(svc.optimizer._dual_objective(), smo._dual_objective(), rtol=1e-3)
+    for idx in (np.arange(len(y)), np.flatnonzero(y == 1), [len(y)], [-1]):
+        with pytest.raises(ValueError):
+            svc.remove_samples(idx)
+
+
+def test_svc_smo_loo_decision_function():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    y = np.where(y == 2, 1, -1)
+    svc = DualSVC(kernel=GaussianKernel(gamma=2.), C=10.).fit(X_scaled, y)
+    loo = svc.loo_decision_function()
+    for i in svc.support_[:5]:
+        idx = np.delete(np.arange(len(y)), i)
+        svc_i = DualSVC(kernel=GaussianKernel(gamma=2.), C=10.).fit(X_scaled[idx], y[idx])
+        assert np.isclose(loo[i], svc_i.decision_function(X_scaled[i:i + 1])[0], atol=1e-2)
+
+
+def test_solve_svc_with_nystroem_approximation():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svc = OneVsRestClassifier(DualSVC(kernel=gaussian, optimizer=BFGS, approximation='nystroem',
+                                      n_components=50, random_state=1)).fit(X_train, y_train)
+    assert svc.score(X_test, y_test) >= 0.97
+
+
+def test_solve_svc_with_precomputed_kernel():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    kernel = GaussianKernel().fit(X_train)
+    svc = OneVsRestClassifier(DualSVC(kernel='precomputed')).fit(kernel(X_train), y_train)
+    assert svc.score(kernel(X_test, X_train), y_test) >= 0.97
+
+
+def test_solve_svc_with_kernel_cache():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    cache = KernelMatrixCache()
+    for C in (1., 10.):
+        svc = OneVsRestClassifier(DualSVC(kernel=gaussian, C=C, kernel_cache=cache)).fit(X_train, y_train)
+        assert svc.score(X_test, y_test) >= 0.97
+    # one kernel matrix for each binary subproblem (which are
+    # over the same data), computed at the first value of C
+    assert cache.misses == 1 and cache.hits == 5
+
+
 def test_solve_svc_as_bcqp_with_cvxopt():
     X, y = load_iris(return_X_y=True)
     X_scaled = MinMaxScaler().fit_transform(X)
@@ -147,6 +550,32 @@ def test_solve_svc_as_bcqp_with_projected_gradient():
     assert svc.score(X_test, y_test) >= 0.97
 
 
+def test_solve_svc_as_bcqp_in_single_precision():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svc = DualSVC(kernel=gaussian, optimizer=ProjectedGradient, multi_class='ovr').fit(X_train, y_train)
+    svc32 = DualSVC(kernel=gaussian, optimizer=ProjectedGradient, multi_class='ovr',
+                    dtype=np.float32).fit(X_train, y_train)
+    assert np.allclose(svc32.intercept_, svc.intercept_, atol=1e-3)
+    assert np.allclose(svc32.decision_function(X_test), svc.decision_function(X_test), atol=1e-3)
+    assert svc32.score(X_test, y_test) >= 0.97
+    # the intercept is computed from the gradient of the dual problem
+    # once the kernel matrix has been overwritten by the Hessian
+    binary = DualSVC(kernel=gaussian, optimizer=ProjectedGradient, dtype=np.float32)
+    K, Q = binary._dual_matrices(X_train, binary._validate_targets(y_train == 1))
+    assert K is None and Q.dtype == np.float32
+
+
+def test_solve_svc_as_bcqp_out_of_core(tmp_path):
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svc = OneVsRestClassifier(DualSVC(kernel=gaussian, optimizer=ProjectedGradient, memmap_dir=tmp_path,
+                                      max_tile_bytes=2 ** 12)).fit(X_train, y_train)
+    assert svc.score(X_test, y_test) >= 0.97
+
+
 def test_solve_svc_as_bcqp_with_active_set():
     X, y = load_iris(return_X_y=True)
     X_scaled = MinMaxScaler().fit_transform(X)
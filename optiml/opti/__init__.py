@@ -1,3 +1,5 @@
-__all__ = ['Optimizer', 'OptimizationFunction', 'Quadratic', 'quad1', 'quad2', 'quad3', 'quad4', 'quad5']
+__all__ = ['Optimizer', 'OptimizationFunction', 'Quadratic', 'BlockHessian', 'LowPrecisionHessian', 'BlockQuadratic',
+           'quad1', 'quad2', 'quad3', 'quad4', 'quad5']
 
-from ._base import Optimizer, OptimizationFunction, Quadratic, quad1, quad2, quad3, quad4, quad5
+from ._base import (Optimizer, OptimizationFunction, Quadratic, BlockHessian, LowPrecisionHessian, BlockQuadratic,
+                    quad1, quad2, quad3, quad4, quad5)
@@ -1,5 +1,6 @@
 import autograd.numpy as np
 from autograd import jacobian, hessian
+from scipy.sparse.linalg import LinearOperator
 
 
 class Optimizer:
@@ -102,13 +103,16 @@ class Quadratic(OptimizationFunction):
 
         :param Q: ([n x n] real symmetric matrix, not necessarily positive semidefinite):
                            the Hessian (i.e., the quadratic part) of f. If it is not
-                           positive semidefinite, f(x) will be unbounded below.
+                           positive semidefinite, f(x) will be unbounded below. It is
+                           not copied if it is already an array, e.g., a memory-mapped one,
+                           and it may also be given implicitly as a LinearOperator.
         :param q: ([n x 1] real column vector): the linear part of f.
         """
-        Q = np.array(Q)
+        if not isinstance(Q, LinearOperator):
+            Q = np.asarray(Q)
         q = np.array(q)
 
-        n = len(Q)
+        n = Q.shape[0]
         super().__init__(n)
 
         if n <= 1:
@@ -139,7 +143,7 @@ class Quadratic(OptimizationFunction):
         :return:  the value of a general quadratic function if x, the optimal solution of a
                   linear system Qx = q (=> x = Q^-1 q) which has a complexity of O(n^3) otherwise.
         """
-        return 0.5 * x.T.dot(self.Q).dot(x) + self.q.T.dot(x)
+        return 0.5 * x.dot(self.Q.dot(x)) + self.q.dot(x)
 
     def jacobian(self, x):
         """
@@ -153,11 +157,135 @@ class Quadratic(OptimizationFunction):
         """
         The Hessian matrix of a general quadratic function H f(x) = Q.
         :param x: 1D array of points at which the Hessian is to be computed.
-        :return:  the Hessian matrix (i.e., the the quadratic part) of a general quadratic function at x.
+        :return:  the Hessian matrix (i.e., the the quadratic part) of a general quadratic function at x,
+                  materialized as a dense array if it is given implicitly as a LinearOperator.
         """
+        if isinstance(self.Q, LinearOperator):
+            return self.Q.toarray()
         return self.Q
 
 
+class BlockHessian(LinearOperator):
+
+    def __init__(self, K, a):
+        """
+        Represent implicitly the [2n x 2n] symmetric matrix:
+
+                            [[K, -K], [-K, K]] + a a^T
+
+        by the [n x n] matrix K and the [2n x 1] vector a only, so that the products,
+        the diagonal and the sub-blocks are computed in O(n^2) without building it.
+
+        :param K: ([n x n] real symmetric matrix): the repeated block.
+        :param a: ([2n x 1] real column vector): the rank-one term.
+        """
+        if K.shape[0] != K.shape[1]:
+            raise ValueError('K is not square')
+        self.K = K
+        a = np.asarray(a, dtype=float)
+        if a.size != 2 * len(K):
+            raise ValueError('a size does not match with K')
+        self.a = a
+        super().__init__(dtype=np.result_type(K.dtype, a.dtype), shape=(2 * len(K), 2 * len(K)))
+
+    def _matvec(self, x):
+        x = np.ravel(x)
+        x_p, x_n = np.split(x, 2)
+        # the vector is cast to the precision of K, e.g., float32, so that K is never upcast
+        Kx = self.K.dot((x_p - x_n).astype(self.K.dtype, copy=False))
+        return np.hstack((Kx, -Kx)) + self.a * self.a.dot(x)
+
+    def _matmat(self, X):
+        X_p, X_n = np.split(X, 2)
+        KX = self.K.dot((X_p - X_n).astype(self.K.dtype, copy=False))
+        return np.vstack((KX, -KX)) + np.outer(self.a, self.a.dot(X))
+
+    def _adjoint(self):
+        return self
+
+    def diagonal(self):
+        K_diag = np.diagonal(self.K)
+        return np.hstack((K_diag, K_diag)) + self.a ** 2
+
+    def __getitem__(self, key):
+        """
+        Build the dense sub-block Q[rows, cols] where rows and cols may be slices, boolean
+        masks or integer indices, possibly as returned by np.ix_, i.e., the sub-block is
+        always taken at the cross product of rows and cols.
+        """
+        rows, cols = key
+        n = len(self.K)
+        idx = np.arange(2 * n)
+        rows, cols = np.ravel(idx[rows]), np.ravel(idx[cols])
+        sign_rows, sign_cols = np.where(rows < n, 1., -1.), np.where(cols < n, 1., -1.)
+        return (np.asarray(self.K[np.ix_(rows % n, cols % n)]) * np.outer(sign_rows, sign_cols) +
+                np.outer(self.a[rows], self.a[cols]))
+
+    def toarray(self):
+        return self[:, :]
+
+
+class LowPrecisionHessian(LinearOperator):
+
+    def __init__(self, Q):
+        """
+        Wrap the [n x n] symmetric matrix Q stored in a lower precision than the
+        iterates, e.g., float32, so that the products cast the vector to the
+        precision of Q instead of upcasting Q, i.e., without an [n x n] float64
+        temporary copy of it, while the sub-blocks are returned in float64.
+
+        :param Q: ([n x n] real symmetric matrix): the matrix, e.g., a memory-mapped one.
+        """
+        if Q.shape[0] != Q.shape[1]:
+            raise ValueError('Q is not square')
+        self.Q = Q
+        super().__init__(dtype=float, shape=Q.shape)
+
+    def _matvec(self, x):
+        return self.Q.dot(np.ravel(x).astype(self.Q.dtype, copy=False)).astype(float)
+
+    def _matmat(self, X):
+        return self.Q.dot(X.astype(self.Q.dtype, copy=False)).astype(float)
+
+    def _adjoint(self):
+        return self
+
+    def diagonal(self):
+        return np.diagonal(self.Q).astype(float)
+
+    def __getitem__(self, key):
+        return np.asarray(self.Q[key], dtype=float)
+
+    def toarray(self):
+        return np.asarray(self.Q, dtype=float)
+
+
+class BlockQuadratic(Quadratic):
+
+    def __init__(self, K, a, q):
+        """
+        Construct a quadratic function whose Hessian has the block structure:
+
+                    1/2 x^T ([[K, -K], [-K, K]] + a a^T) x + q^T x
+
+        e.g., the dual of the epsilon-insensitive Support Vector Regression, keeping
+        the Hessian implicit as a BlockHessian, i.e., in the memory of K only.
+
+        :param K: ([n x n] real symmetric matrix): the repeated block of the Hessian.
+        :param a: ([2n x 1] real column vector): the rank-one term of the Hessian.
+        :param q: ([2n x 1] real column vector): the linear part of f.
+        """
+        super().__init__(BlockHessian(K, a), q)
+
+    def x_star(self):
+        if not hasattr(self, 'x_opt'):
+            try:
+                self.x_opt = np.linalg.solve(self.Q.toarray(), -self.q)
+            except np.linalg.LinAlgError:
+                self.x_opt = np.full(fill_value=np.nan, shape=self.ndim)
+        return self.x_opt
+
+
 # 2x2 quadratic function with nicely conditioned Hessian
 quad1 = Quadratic(Q=[[6, -2], [-2, 6]], q=[10, 5])
 # 2x2 quadratic function with less nicely conditioned Hessian
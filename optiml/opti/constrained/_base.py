@@ -12,6 +12,7 @@ class BoxConstrainedQuadraticOptimizer(Optimizer, ABC):
     def __init__(self,
                  f,
                  ub,
+                 x=None,
                  eps=1e-6,
                  max_iter=1000,
                  callback=None,
@@ -20,7 +21,9 @@ class BoxConstrainedQuadraticOptimizer(Optimizer, ABC):
         if not isinstance(f, Quadratic):
             raise TypeError(f'{f} is not an allowed quadratic function')
         super().__init__(f=f,
-                         x=ub / 2,  # starts from the middle of the box
+                         # starts from the middle of the box, if not
+                         # warm-started from a given point clipped into it
+                         x=ub / 2 if x is None else np.clip(x, 0, ub),
                          eps=eps,
                          max_iter=max_iter,
                          callback=callback,
@@ -90,7 +93,7 @@ class LagrangianBoxConstrainedQuadratic(Quadratic):
             x = lsqr(self.Q, -ql)[0]
             self.last_lmbda = lmbda
             self.last_x = x
-        return 0.5 * x.T.dot(self.Q).dot(x) + ql.T.dot(x) - lmbda_p.T.dot(self.ub)
+        return 0.5 * x.dot(self.Q.dot(x)) + ql.T.dot(x) - lmbda_p.T.dot(self.ub)
 
     def jacobian(self, lmbda):
         """
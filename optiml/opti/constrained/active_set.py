@@ -36,6 +36,7 @@ class ActiveSet(BoxConstrainedQuadraticOptimizer):
     def __init__(self,
                  f,
                  ub,
+                 x=None,
                  eps=1e-6,
                  max_iter=1000,
                  callback=None,
@@ -43,6 +44,7 @@ class ActiveSet(BoxConstrainedQuadraticOptimizer):
                  verbose=False):
         super().__init__(f=f,
                          ub=ub,
+                         x=x,
                          eps=eps,
                          max_iter=max_iter,
                          callback=callback,
@@ -56,15 +58,15 @@ class ActiveSet(BoxConstrainedQuadraticOptimizer):
         # because all constraints are box ones, the active set is logically
         # partitioned onto the set of lower and upper bound constraints that are
         # active, L and U respectively. Of course, L and U have to be disjoint.
-        # Since we start from the middle of the box, both the initial active sets
-        # are empty
-        L = np.full(self.f.ndim, False)
-        U = np.full(self.f.ndim, False)
+        # If we start from the middle of the box, both the initial active sets
+        # are empty, otherwise, if warm-started, they are the bounds x lies on
+        L = self.x <= 0
+        U = np.logical_and(self.x >= self.ub, np.logical_not(L))
 
         # the set of "active variables", those that do *not* belong to any of the
         # two active sets and therefore are "free", is therefore the complement to
-        # 1 : n of L union U; since L and U are empty now, A = 1 : n
-        A = np.full(self.f.ndim, True)
+        # 1 : n of L union U; if L and U are empty, A = 1 : n
+        A = np.logical_not(np.logical_or(L, U))
 
         if self.verbose:
             print('iter\t cost\t\t|B|\tI/O')
@@ -102,13 +104,13 @@ class ActiveSet(BoxConstrainedQuadraticOptimizer):
             try:
                 # use the Cholesky factorization to solve the linear system if Q_{AA}
                 # is symmetric and positive definite, i.e., the function is convex
-                xs[A] = cholesky_solve(np.linalg.cholesky(self.f.Q[A, :][:, A]),
-                                       -(self.f.q[A] + self.f.Q[A, :][:, U].dot(self.ub[U])))
+                xs[A] = cholesky_solve(np.linalg.cholesky(self.f.Q[np.ix_(A, A)]),
+                                       -(self.f.q[A] + self.f.Q[np.ix_(A, U)].dot(self.ub[U])))
             except np.linalg.LinAlgError:
                 # if Q_{AA} is indefinite, i.e., the function is linear along the eigenvector
                 # correspondent to zero eigenvalues, the system has not solutions, so we
                 # will choose the one that minimize the residue
-                xs[A] = lsqr(self.f.Q[A, :][:, A], -(self.f.q[A] + self.f.Q[A, :][:, U].dot(self.ub[U])))[0]
+                xs[A] = lsqr(self.f.Q[np.ix_(A, A)], -(self.f.q[A] + self.f.Q[np.ix_(A, U)].dot(self.ub[U])))[0]
 
             if np.logical_and(xs[A] <= self.ub[A] + 1e-12, xs[A] >= -1e-12).all():
                 # the solution of the unconstrained problem is actually feasible
@@ -46,6 +46,7 @@ class FrankWolfe(BoxConstrainedQuadraticOptimizer):
     def __init__(self,
                  f,
                  ub,
+                 x=None,
                  t=0.,
                  eps=1e-6,
                  max_iter=1000,
@@ -54,6 +55,7 @@ class FrankWolfe(BoxConstrainedQuadraticOptimizer):
                  verbose=False):
         super().__init__(f=f,
                          ub=ub,
+                         x=x,
                          eps=eps,
                          max_iter=max_iter,
                          callback=callback,
@@ -118,7 +120,7 @@ class FrankWolfe(BoxConstrainedQuadraticOptimizer):
             #
             # ==> a = -d^T * (Q * x + q) / d^T * Q * d
             #
-            den = d.T.dot(self.f.Q).dot(d)
+            den = d.dot(self.f.Q.dot(d))
 
             if den <= 1e-16:  # d^T * Q * d = 0  ==>  f is linear along d
                 a = 1  # just take the maximum possible step size
@@ -40,6 +40,7 @@ class InteriorPoint(BoxConstrainedQuadraticOptimizer):
     def __init__(self,
                  f,
                  ub,
+                 x=None,
                  eps=1e-10,
                  max_iter=1000,
                  callback=None,
@@ -47,6 +48,7 @@ class InteriorPoint(BoxConstrainedQuadraticOptimizer):
                  verbose=False):
         super().__init__(f=f,
                          ub=ub,
+                         x=x,
                          eps=eps,
                          max_iter=max_iter,
                          callback=callback,
@@ -128,7 +130,8 @@ class InteriorPoint(BoxConstrainedQuadraticOptimizer):
         # positive definite and nonsingular and (1') has a unique solution.
         #
         # To initialize the algorithm we take x straight in the middle of the box,
-        # and then it would be simple to satisfy:
+        # or, if warm-started, we move it slightly toward the middle to make it
+        # strictly interior, and then it would be simple to satisfy:
         #
         #   Q x + q + lp - lm = 0
         #
@@ -136,6 +139,8 @@ class InteriorPoint(BoxConstrainedQuadraticOptimizer):
         # so lm and lp would not be interior. The obvious solution is to add to
         # both a term eps * e with some small eps (1e-6)
 
+        self.x = 0.99 * self.x + 0.01 * self.ub / 2
+
         # compute a feasible interior dual solution satisfying SKKTS with x for some
         # \mu we don't care much of
         self.g_x = self.f.jacobian(self.x)
@@ -151,7 +156,7 @@ class InteriorPoint(BoxConstrainedQuadraticOptimizer):
 
         while True:
             self.f_x = self.f.function(self.x)
-            xQx = self.x.dot(self.f.Q).dot(self.x)
+            xQx = self.x.dot(self.f.Q.dot(self.x))
             p = -lp.T.dot(self.ub) - 0.5 * xQx
             gap = (self.f_x - p) / max(abs(self.f_x), 1)
 
@@ -186,7 +191,7 @@ class InteriorPoint(BoxConstrainedQuadraticOptimizer):
             mu = (self.f_x - p) / (4 * self.f.ndim * self.f.ndim)  # use \rho = 1 / (# of constraints)
 
             umx = self.ub - self.x
-            H = self.f.Q + np.diag(lp / umx + lm / self.x)
+            H = self.f.hessian(self.x) + np.diag(lp / umx + lm / self.x)
             # w = \mu (np.ones(n) / umx - np.ones(n) / self.x) + lp - lm
             w = mu * (self.ub - 2 * self.x) / (umx * self.x) + lp - lm
 
@@ -38,6 +38,7 @@ class ProjectedGradient(BoxConstrainedQuadraticOptimizer):
     def __init__(self,
                  f,
                  ub,
+                 x=None,
                  eps=1e-6,
                  max_iter=1000,
                  callback=None,
@@ -45,6 +46,7 @@ class ProjectedGradient(BoxConstrainedQuadraticOptimizer):
                  verbose=False):
         super().__init__(f=f,
                          ub=ub,
+                         x=x,
                          eps=eps,
                          max_iter=max_iter,
                          callback=callback,
@@ -96,7 +98,7 @@ class ProjectedGradient(BoxConstrainedQuadraticOptimizer):
             # min { 1/2 a^2 (d^T Q d) + a d^T (Q x + q) } [ + const ]
             #
             # => a = - d^T (Q x + q) / d^T Q d
-            den = d.T.dot(self.f.Q).dot(d)
+            den = d.dot(self.f.Q.dot(d))
 
             if den <= 1e-16:  # d^T Q d = 0 ==> f is linear along d
                 t = max_t  # just take the maximum possible step size
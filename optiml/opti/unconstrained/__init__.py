@@ -1,6 +1,7 @@
 __all__ = ['Rosenbrock', 'Ackley', 'SixHumpCamel',
-           'ProximalBundle']
+           'ProximalBundle', 'TrustRegionNewton']
 
 from ._base import Rosenbrock, Ackley, SixHumpCamel
 
 from .proximal_bundle import ProximalBundle
+from .trust_region import TrustRegionNewton
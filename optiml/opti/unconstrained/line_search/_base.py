@@ -77,5 +77,5 @@ class LineSearchOptimizer(Optimizer, ABC):
         if 0 < m2 < 1:
             self.line_search = ArmijoWolfeLineSearch(f, max_f_eval, m1, m2, a_start, tau, sfgrd, min_a)
         else:
-            self.line_search = BacktrackingLineSearch(f, max_f_eval, m1, a_start, min_a, tau)
+            self.line_search = BacktrackingLineSearch(f, max_f_eval, m1, a_start, tau, min_a)
         self.f_eval = 1
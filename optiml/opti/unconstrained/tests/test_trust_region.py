@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from optiml.opti import quad1, quad2
+from optiml.opti.unconstrained import Rosenbrock, TrustRegionNewton
+
+
+def test_quadratic():
+    rs = np.random.RandomState(1)
+    assert np.allclose(TrustRegionNewton(f=quad1, x=rs.uniform(size=2)).minimize().x, quad1.x_star())
+    assert np.allclose(TrustRegionNewton(f=quad2, x=rs.uniform(size=2)).minimize().x, quad2.x_star())
+
+
+def test_Rosenbrock():
+    rosen = Rosenbrock()
+    x = np.random.RandomState(1).uniform(size=2)
+    assert np.allclose(TrustRegionNewton(f=rosen, x=x).minimize().x, rosen.x_star())
+
+
+def test_Rosenbrock_from_indefinite_hessian():
+    rosen = Rosenbrock()
+    x = np.array([-0.815, 1.236])
+    assert np.any(np.linalg.eigvalsh(rosen.hessian(x)) < 0)
+    assert np.allclose(TrustRegionNewton(f=rosen, x=x).minimize().x, rosen.x_star())
+
+
+if __name__ == "__main__":
+    pytest.main()
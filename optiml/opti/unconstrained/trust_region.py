@@ -0,0 +1,274 @@
+import numpy as np
+
+from .. import Optimizer
+
+
+class TrustRegionNewton(Optimizer):
+    # Apply the Trust Region Newton method (TRON) for the minimization of the
+    # provided twice differentiable (almost everywhere) function f.
+    #
+    # At each iteration the quadratic model of f() around x is approximately
+    # minimized within the trust region ||d|| <= delta by the Steihaug
+    # conjugate gradient method, which only needs the products between the
+    # Hessian and a vector, so f.hessian(x) can be either a matrix or a
+    # LinearOperator that never forms it explicitly, e.g., the generalized
+    # Hessian of the squared hinge loss. The step is accepted if the actual
+    # reduction of f() is a large enough fraction of the predicted one, and
+    # the radius delta is updated according to their ratio.
+    #
+    # Input:
+    #
+    # - x is either a [n x 1] real (column) vector denoting the input of
+    #   f(), or [] (empty).
+    #
+    # The other [optional] input parameters are:
+    #
+    # - eps (real scalar, optional, default value 1e-6): the accuracy in the
+    #   stopping criterion: the algorithm is stopped when the norm of the
+    #   gradient is less than or equal to eps. If a negative value is provided,
+    #   this is used in a *relative* stopping criterion: the algorithm is
+    #   stopped when the norm of the gradient is less than or equal to
+    #   (- eps) * || norm of the first gradient ||.
+    #
+    # - cg_eps (real scalar, optional, default value 0.1): the relative
+    #   accuracy of the conjugate gradient method: the inner iterations are
+    #   stopped when the norm of the residual is less than or equal to
+    #   cg_eps * || norm of the gradient ||. Has to be in (0,1).
+    #
+    # - max_cg_iter (integer scalar, optional, default value None): the
+    #   maximum number of conjugate gradient iterations per Newton iteration,
+    #   None meaning the number of variables.
+    #
+    # - eta0, eta1, eta2 (real scalars, optional, default values 1e-4, 0.25
+    #   and 0.75): the thresholds of the ratio between the actual and the
+    #   predicted reduction used to accept the step, i.e., if it is > eta0,
+    #   and to update the radius of the trust region.
+    #
+    # - sigma1, sigma2, sigma3 (real scalars, optional, default values 0.25,
+    #   0.5 and 4): the factors used to shrink and enlarge the radius of the
+    #   trust region.
+    #
+    # - m_inf (real scalar, optional, default value -inf): if the algorithm
+    #   determines a value for f() <= m_inf this is taken as an indication that
+    #   the problem is unbounded below and computation is stopped
+    #   (a "finite -inf").
+    #
+    # Output:
+    #
+    # - x ([n x 1] real column vector): the best solution found so far.
+    #
+    # - status (string): a string describing the status of the algorithm at
+    #   termination
+    #
+    #   = 'optimal': the algorithm terminated having proven that x is a(n
+    #     approximately) optimal solution, i.e., the norm of the gradient at x
+    #     is less than the required threshold
+    #
+    #   = 'unbounded': the algorithm has determined an extremely large negative
+    #     value for f() that is taken as an indication that the problem is
+    #     unbounded below (a "finite -inf", see m_inf above)
+    #
+    #   = 'stopped': the algorithm terminated having exhausted the maximum
+    #     number of iterations: x is the bast solution found so far, but not
+    #     necessarily the optimal one
+    #
+    #   = 'error': neither the actual nor the predicted reduction is
+    #     significant anymore, i.e., the algorithm cannot make progress,
+    #     mostly because of the numerical errors near the optimum
+    #
+    # References
+    #
+    # C.J. Lin, J.J. Moré. Newton's Method for Large Bound-Constrained
+    # Optimization Problems. SIAM Journal on Optimization 9, 1999.
+    #
+    # C.J. Lin, R.C. Weng, S.S. Keerthi. Trust Region Newton Method for
+    # Large-Scale Logistic Regression. JMLR 9, 2008.
+
+    def __init__(self,
+                 f,
+                 x,
+                 eps=1e-6,
+                 max_iter=1000,
+                 cg_eps=0.1,
+                 max_cg_iter=None,
+                 eta0=1e-4,
+                 eta1=0.25,
+                 eta2=0.75,
+                 sigma1=0.25,
+                 sigma2=0.5,
+                 sigma3=4.,
+                 m_inf=-np.inf,
+                 callback=None,
+                 callback_args=(),
+                 verbose=False):
+        super().__init__(f=f,
+                         x=x,
+                         eps=eps,
+                         max_iter=max_iter,
+                         callback=callback,
+                         callback_args=callback_args,
+                         verbose=verbose)
+        if not 0 < cg_eps < 1:
+            raise ValueError('cg_eps has to lie in (0,1)')
+        self.cg_eps = cg_eps
+        if max_cg_iter is not None and not max_cg_iter > 0:
+            raise ValueError('max_cg_iter must be > 0')
+        self.max_cg_iter = max_cg_iter
+        if not 0 < eta0 < eta1 < eta2 < 1:
+            raise ValueError('eta0, eta1 and eta2 have to be 0 < eta0 < eta1 < eta2 < 1')
+        self.eta0 = eta0
+        self.eta1 = eta1
+        self.eta2 = eta2
+        if not 0 < sigma1 < sigma2 < 1 < sigma3:
+            raise ValueError('sigma1, sigma2 and sigma3 have to be 0 < sigma1 < sigma2 < 1 < sigma3')
+        self.sigma1 = sigma1
+        self.sigma2 = sigma2
+        self.sigma3 = sigma3
+        self.m_inf = m_inf
+        self.cg_iter = 0
+
+    @staticmethod
+    def _to_boundary(d, p, delta):
+        """
+        Return the step a > 0 such that ||d + a p|| = delta, given ||d|| <= delta.
+        """
+        d_p, d_d, p_p = d.dot(p), d.dot(d), p.dot(p)
+        rad = np.sqrt(d_p ** 2 + p_p * (delta ** 2 - d_d))
+        if d_p >= 0:
+            return (delta ** 2 - d_d) / (d_p + rad)
+        return (rad - d_p) / p_p
+
+    def _truncated_cg(self, H, delta):
+        """
+        Approximately minimize the quadratic model g^T d + 1/2 d^T H d within
+        ||d|| <= delta by the Steihaug conjugate gradient method and return
+        the step d and the residual r = -g - H d.
+        """
+        d = np.zeros_like(self.g_x)
+        r = -self.g_x
+        p = r.copy()
+        r_r = r.dot(r)
+        cg_tol = self.cg_eps * np.linalg.norm(self.g_x)
+
+        for _ in range(self.max_cg_iter or self.f.ndim):
+            if np.sqrt(r_r) <= cg_tol:
+                break
+
+            self.cg_iter += 1
+            Hp = H.dot(p)
+            p_Hp = p.dot(Hp)
+
+            if p_Hp <= 0:
+                # p is a direction of negative curvature, so the
+                # model decreases along it up to the boundary
+                a = self._to_boundary(d, p, delta)
+                d += a * p
+                r -= a * Hp
+                break
+
+            a = r_r / p_Hp
+            d += a * p
+
+            if np.linalg.norm(d) > delta:
+                # go back and move along p up to the trust region boundary
+                d -= a * p
+                a = self._to_boundary(d, p, delta)
+                d += a * p
+                r -= a * Hp
+                break
+
+            r -= a * Hp
+            r_r_new = r.dot(r)
+            p = r + (r_r_new / r_r) * p
+            r_r = r_r_new
+
+        return d, r
+
+    def minimize(self):
+
+        if self.verbose:
+            print('iter\t cost\t\t gnorm\t\t delta\t\t cg_iter\t ratio', end='')
+
+        self.f_x, self.g_x = self.f.function(self.x), self.f.jacobian(self.x)
+        ng = np.linalg.norm(self.g_x)
+
+        if self.eps < 0:
+            ng0 = -ng  # norm of first gradient
+        else:
+            ng0 = 1  # un-scaled stopping criterion
+
+        delta = ng
+
+        while True:
+
+            if self.is_verbose():
+                print('\n{:4d}\t{: 1.4e}\t{: 1.4e}\t{: 1.4e}\t{:4d}'.format(
+                    self.iter, self.f_x, ng, delta, self.cg_iter), end='')
+
+            # stopping criteria
+            if ng <= self.eps * ng0:
+                self.status = 'optimal'
+                break
+
+            if self.iter >= self.max_iter:
+                self.status = 'stopped'
+                break
+
+            d, r = self._truncated_cg(self.f.hessian(self.x), delta)
+
+            last_x = self.x + d
+            last_f_x = self.f.function(last_x)
+
+            g_d = self.g_x.dot(d)
+            pred_red = -0.5 * (g_d - d.dot(r))
+            act_red = self.f_x - last_f_x
+
+            nd = np.linalg.norm(d)
+            if self.iter == 0:
+                delta = min(delta, nd)
+
+            # the step size which minimizes the quadratic interpolation of f() along d
+            if last_f_x - self.f_x - g_d <= 0:
+                a = self.sigma3
+            else:
+                a = max(self.sigma1, -0.5 * g_d / (last_f_x - self.f_x - g_d))
+
+            # update the trust region radius
+            if act_red < self.eta0 * pred_red:
+                delta = min(max(a, self.sigma1) * nd, self.sigma2 * delta)
+            elif act_red < self.eta1 * pred_red:
+                delta = max(self.sigma1 * delta, min(a * nd, self.sigma2 * delta))
+            elif act_red < self.eta2 * pred_red:
+                delta = max(self.sigma1 * delta, min(a * nd, self.sigma3 * delta))
+            else:
+                delta = max(delta, min(a * nd, self.sigma3 * delta))
+
+            if self.is_verbose():
+                print('\t{: 1.4e}'.format(act_red / pred_red if pred_red else np.nan), end='')
+
+            if act_red > self.eta0 * pred_red:
+                # accept the step
+                self.x, self.f_x = last_x, last_f_x
+                self.g_x = self.f.jacobian(self.x)
+                ng = np.linalg.norm(self.g_x)
+
+                try:
+                    self.callback()
+                except StopIteration:
+                    break
+
+                self.iter += 1
+
+            if self.f_x <= self.m_inf:
+                self.status = 'unbounded'
+                break
+
+            if (act_red <= 0 and pred_red <= 0 or
+                    abs(act_red) <= 1e-12 * abs(self.f_x) and abs(pred_red) <= 1e-12 * abs(self.f_x)):
+                self.status = 'error'
+                break
+
+        if self.verbose:
+            print('\n')
+
+        return self